@@ -1,27 +1,22 @@
 import pandas as pd
-import glob
 import os
+import sys
 
-# Get the parent directory (where CSV files are located)
-parent_dir = os.path.dirname(os.path.dirname(__file__))
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'storage'))
+from paper_store import list_month_files, load_corpus, month_of
 
-# Find all CSV files matching the pattern (monthly papers) in data folder
-csv_pattern = os.path.join(parent_dir, 'data', '25[0-9][0-9]_arxiv_papers.csv')
-csv_files = sorted(glob.glob(csv_pattern))
+# Find all 2025 monthly CSV files in the data folder
+csv_files = [f for f in list_month_files() if month_of(f).startswith('25')]
 
 print(f"Found {len(csv_files)} CSV files:")
 for file in csv_files:
     print(f"  - {os.path.basename(file)}")
 
-# Read and concatenate all CSV files
-dfs = []
-for file in csv_files:
-    df = pd.read_csv(file)
-    dfs.append(df)
-    print(f"Loaded {os.path.basename(file)}: {len(df)} papers")
-
-# Combine all dataframes
-combined_df = pd.concat(dfs, ignore_index=True)
+# Read only the exported columns of those months from the corpus cache
+combined_df = load_corpus(
+    columns=['paper_id', 'abstract', 'subcategory'],
+    months=[month_of(f) for f in csv_files]
+)
 print(f"\nTotal papers combined: {len(combined_df)}")
 
 # Get unique subcategories
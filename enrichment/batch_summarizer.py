@@ -1,83 +1,392 @@
 #!/usr/bin/env python3
 """
 Script to enrich arXiv papers with AI summaries in place.
-Finds rows with empty summaries and processes them in batches.
+Takes papers without a summary from the enrichment queue, across every
+month file, and processes them in batches.
 
 Usage:
+    python batch_summarizer.py [batch_size] [--workers N] [--pack K] [--no-cache]
+                               [--backend B] [--timeout T] [--retries R]
+                               [--priority P] [--digest-week W] [--months YYMM ...]
+                               [--report PATH] [--prometheus PATH]
+    python batch_summarizer.py --status
+    
+    batch_size:  Number of papers to summarize (default: 10)
+    --workers N: Number of Codex calls kept in flight at once (default: 1)
+    --pack K:    Abstracts per Codex call (default: 1); packed replies are
+                 JSON lines keyed by paper_id, and papers missing from a
+                 reply are retried one at a time
+    --no-cache:  Call Codex even for abstracts in the summary cache
+    --backend B: codex-cli (default), process, http or stub (see llm_backends.py);
+                 --backend-command, --backend-url and --model configure them
+    --timeout T: Seconds per call before it is abandoned (default: 300)
+    --retries R: Retries after a timeout, crash or HTTP 5xx (default: 2)
+    --priority P: digest (default: the digest week's papers first, then
+                 newest), newest, oldest or file (month and row order)
+    --digest-week W: Week for --priority digest (e.g., 2025WK46; default:
+                 the week extract_weekly_papers.py would use)
+    --months YYMM ...: Only summarize papers of these months
+    --lease-minutes M: How long leased papers stay reserved (default: 30)
+    --all:       Keep going until no paper is waiting, instead of batch_size
+    --compact-every N: Merge a month's journal into its CSV every N
+                 summaries (default: 100)
+    --report PATH: Where to write the JSON run report (default:
+                 data/enrichment_runs/YYYYMMDD-HHMMSS-PID.json)
+    --prometheus PATH: Also write the metrics in Prometheus text format
+                 (e.g. for node_exporter's textfile collector)
+    --status:    Print papers, summarized and missing counts per month and
+                 exit (reads only the queue counters, no month files)
+
+Examples:
     python batch_summarizer.py          # Process 10 papers (default)
     python batch_summarizer.py 50       # Process 50 papers
-    python batch_summarizer.py 100      # Process 100 papers
+    python batch_summarizer.py 100 --workers 4   # Process 100 papers, 4 at a time
+    python batch_summarizer.py 100 --workers 4 --pack 8   # ...with 8 abstracts per call
+    python batch_summarizer.py 50 --months 2511 --priority file   # The old behaviour: 2511 in file order
+    python batch_summarizer.py --all --workers 8 --pack 8   # Drain the whole queue
+    python batch_summarizer.py 20 --backend stub --no-cache   # Placeholder summaries, for testing on a copy of data/
+    python batch_summarizer.py --all --workers 8 --prometheus /var/lib/node_exporter/enrichment.prom
+
+Papers are leased from the queue (enrichment_queue.py), so several
+batch_summarizer processes can run at once without summarizing the same
+paper twice; papers still leased when a run stops are returned.
+
+Enrichment is a stream: papers are leased a few at a time and their
+abstracts read one row at a time only when a worker is free, and each
+summary is journaled as soon as it completes. Memory use does not grow
+with the batch or month size, and a slow model slows the reading down
+instead of filling a buffer.
+Abstracts already in the summary cache (storage/summary_cache.py) are
+answered without calling Codex. Each group of --pack abstracts is one
+`codex exec` call, so with --workers N up to N codex processes run at
+once. Summaries are journaled as they complete, in whatever order they
+finish. To try the script without Codex, use --backend stub, or put an
+executable named `codex` that prints a line first on PATH.
+
+Every call attempt is timed (enrichment_metrics.py): the run report has
+latency percentiles and a histogram per backend, success, failure, timeout
+and empty-reply counts, exit statuses, prompt and reply sizes, packed-reply
+coverage and cache hits. It is rewritten every minute during the run and at
+the end; `python enrichment_metrics.py` shows the latest one.
 """
 
+import argparse
+import os
+import socket
 import sys
-import pandas as pd
-from codex_abstract_summarizer import summarize_abstract
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from codex_abstract_summarizer import (
+    get_summary_cache, iter_packed, set_backend, summarize_abstract, summarize_abstracts_packed
+)
+from enrichment_metrics import EnrichmentMetrics, default_report_path
+from enrichment_queue import PRIORITY_ORDER, EnrichmentQueue, print_status
+from llm_backends import BACKENDS, DEFAULT_MAX_RETRIES, DEFAULT_TIMEOUT, create_backend
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'storage'))
+from paper_index import PaperIndex
+from paper_store import list_month_files, month_file
+from summary_journal import SummaryJournal, get_journal_path
 
 # Configuration
-CSV_FILE = '../data/2511_arxiv_papers.csv'
 DEFAULT_BATCH_SIZE = 10
+COMPACT_EVERY = 100  # Merge a month's summary journal into its CSV every N summaries (default)
+REPORT_INTERVAL = 60  # Seconds between rewrites of the run report while papers are processed
+
+def format_duration(seconds):
+    """Format a duration in seconds as e.g. 1h02m, 3m05s or 42s."""
+    seconds = int(round(seconds))
+    if seconds >= 3600:
+        return f"{seconds // 3600}h{seconds % 3600 // 60:02d}m"
+    if seconds >= 60:
+        return f"{seconds // 60}m{seconds % 60:02d}s"
+    return f"{seconds}s"
+
+def summarize_group(papers, pack=1, use_cache=True):
+    """
+    Summarize a group of papers: one call per paper, or packed prompts.
+    
+    Args:
+        papers (list): (paper_id, abstract) pairs
+        pack (int): Maximum abstracts per Codex call (1 = one call per paper)
+        use_cache (bool): Consult and fill the summary cache
+    
+    Returns:
+        dict: paper_id -> summary
+    """
+    if pack == 1:
+        return {paper_id: summarize_abstract(abstract, use_cache) for paper_id, abstract in papers}
+    return summarize_abstracts_packed(papers, pack_size=pack, use_cache=use_cache)
+
+def iter_queued_papers(queue, owner, limit=None, chunk=10, **lease_options):
+    """
+    Lease papers from the queue a few at a time and yield them with their abstracts.
+    
+    Nothing is leased or read until the consumer asks for the next paper, so
+    a slow consumer leases slowly and memory holds at most one chunk of IDs.
+    Papers whose abstract cannot be read are marked failed and skipped.
+    
+    Args:
+        queue (EnrichmentQueue): Queue to lease from
+        owner (str): Worker name for the leases
+        limit (int): Stop after this many papers (default: until the queue is empty)
+        chunk (int): Papers leased per queue transaction
+        **lease_options: Passed to EnrichmentQueue.lease() (lease_seconds, priority, week, months)
+    
+    Yields:
+        tuple: (month, paper_id, abstract)
+    """
+    index = PaperIndex()
+    refreshed = set()
+    yielded = 0
+    try:
+        while limit is None or yielded < limit:
+            size = chunk if limit is None else min(chunk, limit - yielded)
+            leased = queue.lease(owner, size, **lease_options)
+            if not leased:
+                return
+            for month, paper_id in leased:
+                if month not in refreshed:
+                    index.refresh_month(month_file(month))
+                    refreshed.add(month)
+                # Refreshes the month and retries if the CSV was rewritten since
+                row = index.read_paper(paper_id, month)
+                if not row or not row.get('abstract'):
+                    print(f"⚠ {paper_id}: no abstract in {month_file(month)}")
+                    queue.fail(month, paper_id)
+                    continue
+                yielded += 1
+                yield month, paper_id, row['abstract']
+    finally:
+        index.close()
+
+def summarize_stream(papers, on_summary, on_failure, workers=1, pack=1, use_cache=True, total=None):
+    """
+    Summarize a stream of papers with up to `workers` calls in flight.
+    
+    Papers are pulled from the iterator only when a worker is free, grouped
+    into prompts of up to `pack` (see iter_packed()), so a slow backend
+    slows down the reading instead of growing a buffer. Results are handled
+    on the calling thread as they complete, through the two callbacks, so
+    they do not need to be thread-safe. On an exception (including Ctrl+C),
+    only the calls already running are waited for.
+    
+    Args:
+        papers (iterable): (month, paper_id, abstract) tuples, e.g. from iter_queued_papers()
+        on_summary (callable): Called as on_summary(month, paper_id, summary)
+        on_failure (callable): Called as on_failure(month, paper_id)
+        workers (int): Number of concurrent groups
+        pack (int): Maximum abstracts per Codex call
+        use_cache (bool): Consult and fill the summary cache
+        total (int): Expected number of papers, for the ETA (optional)
+    
+    Returns:
+        tuple: (succeeded, failed) counts
+    """
+    groups = iter_packed((((month, paper_id), abstract) for month, paper_id, abstract in papers), pack_size=pack)
+    in_flight = {}
+    succeeded = failed = 0
+    start = time.perf_counter()
+    
+    def submit_next():
+        group = next(groups, None)
+        if group is not None:
+            items = [(paper_id, abstract) for (_, paper_id), abstract in group]
+            in_flight[executor.submit(summarize_group, items, pack, use_cache)] = [key for key, _ in group]
+    
+    executor = ThreadPoolExecutor(max_workers=workers)
+    try:
+        for _ in range(workers):
+            submit_next()
+        while in_flight:
+            done, _ = wait(in_flight, return_when=FIRST_COMPLETED)
+            for future in done:
+                keys = in_flight.pop(future)
+                try:
+                    summaries = future.result()
+                    error = None
+                except Exception as e:
+                    summaries, error = {}, e
+                
+                for month, paper_id in keys:
+                    summary = summaries.get(paper_id)
+                    progress = f"[{succeeded + failed + 1}/{total}]" if total else f"[{succeeded + failed + 1}]"
+                    if summary:
+                        on_summary(month, paper_id, summary)
+                        succeeded += 1
+                        print(f"{progress} ✓ {paper_id}: {summary}")
+                    else:
+                        on_failure(month, paper_id)
+                        failed += 1
+                        print(f"{progress} ✗ {paper_id}: {error or 'empty response from Codex'}")
+                
+                finished = succeeded + failed
+                elapsed = time.perf_counter() - start
+                rate = f"  {finished / elapsed * 60:.1f} papers/min, elapsed {format_duration(elapsed)}"
+                if total:
+                    rate += f", ETA {format_duration(elapsed / finished * max(total - finished, 0))}"
+                print(rate)
+                # Refill after the results are recorded, so the next lease sees them
+                submit_next()
+    finally:
+        executor.shutdown(wait=True, cancel_futures=True)
+    return succeeded, failed
 
 def main():
+    parser = argparse.ArgumentParser(description='Add AI summaries to papers that have none.')
+    parser.add_argument('batch_size', nargs='?', help=f'Number of papers to summarize (default: {DEFAULT_BATCH_SIZE})')
+    parser.add_argument('--workers', type=int, default=1, help='Number of Codex calls kept in flight (default: 1)')
+    parser.add_argument('--pack', type=int, default=1, help='Abstracts per Codex call (default: 1)')
+    parser.add_argument('--no-cache', action='store_true', help='Always call Codex, ignoring the summary cache')
+    parser.add_argument('--backend', choices=list(BACKENDS), default='codex-cli', help='LLM backend (default: codex-cli)')
+    parser.add_argument('--backend-command', help="Command for the codex-cli or process backend (default: 'codex exec')")
+    parser.add_argument('--backend-url', help='Chat completions URL for the http backend')
+    parser.add_argument('--model', help='Model name for the http backend')
+    parser.add_argument('--timeout', type=float, default=DEFAULT_TIMEOUT,
+                        help=f'Seconds per call before giving up (default: {DEFAULT_TIMEOUT:.0f})')
+    parser.add_argument('--retries', type=int, default=DEFAULT_MAX_RETRIES,
+                        help=f'Retries after a timeout or crash (default: {DEFAULT_MAX_RETRIES})')
+    parser.add_argument('--priority', choices=list(PRIORITY_ORDER), default='digest',
+                        help='Which papers go first: digest week then newest (default), newest, oldest, file')
+    parser.add_argument('--digest-week', help="Digest week for --priority digest (e.g., 2025WK46; default: last Friday's)")
+    parser.add_argument('--months', nargs='+', help='Only summarize papers of these months (e.g., 2511)')
+    parser.add_argument('--lease-minutes', type=float, default=30,
+                        help='How long leased papers stay reserved for this worker (default: 30)')
+    parser.add_argument('--all', action='store_true', help='Keep going until no paper is waiting (ignores batch_size)')
+    parser.add_argument('--compact-every', type=int, default=COMPACT_EVERY,
+                        help=f'Merge a month journal into its CSV every N summaries (default: {COMPACT_EVERY})')
+    parser.add_argument('--report', help='JSON run report path (default: data/enrichment_runs/<time>-<pid>.json)')
+    parser.add_argument('--prometheus', help='Also write metrics in Prometheus text format to this path')
+    parser.add_argument('--status', action='store_true', help='Show summary progress per month and exit')
+    args = parser.parse_args()
+    if args.status:
+        queue = EnrichmentQueue()
+        print_status(queue)
+        queue.close()
+        return
+    if args.workers <= 0 or args.pack <= 0:
+        parser.error('--workers and --pack must be positive')
+    if args.backend == 'process' and not args.backend_command:
+        parser.error('--backend process needs --backend-command')
+    
+    metrics = EnrichmentMetrics()
+    metrics.set_info(backend=args.backend, workers=args.workers, pack=args.pack, cache=not args.no_cache,
+                     timeout=args.timeout, retries=args.retries, priority=args.priority)
+    report_path = args.report or default_report_path()
+    options = {'timeout': args.timeout, 'max_retries': args.retries, 'metrics': metrics}
+    if args.backend_command and args.backend in ('codex-cli', 'process'):
+        options['command'] = args.backend_command
+    if args.backend == 'http':
+        options.update({key: value for key, value in (('url', args.backend_url), ('model', args.model)) if value})
+        options['pool_size'] = args.workers
+    backend = create_backend(args.backend, **options)
+    set_backend(backend)
+    
     # Get batch size from command line argument or use default
     batch_size = DEFAULT_BATCH_SIZE
-    if len(sys.argv) > 1:
+    if args.batch_size is not None:
         try:
-            batch_size = int(sys.argv[1])
+            batch_size = int(args.batch_size)
             if batch_size <= 0:
                 print("Error: Batch size must be a positive integer")
                 sys.exit(1)
         except ValueError:
-            print(f"Error: Invalid batch size '{sys.argv[1]}'. Using default: {DEFAULT_BATCH_SIZE}")
+            print(f"Error: Invalid batch size '{args.batch_size}'. Using default: {DEFAULT_BATCH_SIZE}")
             batch_size = DEFAULT_BATCH_SIZE
     
-    # Load CSV
-    print(f"Loading {CSV_FILE}...")
-    df = pd.read_csv(CSV_FILE)
-    
-    # Find rows with empty summaries
-    empty_summaries = df['summary'].isna() | (df['summary'] == '')
-    empty_indices = df[empty_summaries].index.tolist()
+    # Entries left in the journals by an interrupted run are merged first
+    for csv_path in list_month_files():
+        if os.path.isfile(get_journal_path(csv_path)):
+            journal = SummaryJournal(csv_path)
+            journal.compact()
+            journal.close()
     
-    if not empty_indices:
-        print("✓ All papers already have summaries!")
+    print("Syncing the enrichment queue...")
+    queue = EnrichmentQueue()
+    queue.sync(verbose=True)
+    owner = f"{socket.gethostname()}:{os.getpid()}"
+    limit = None if args.all else batch_size
+    waiting = sum(missing for month, _, missing, _ in queue.status() if not args.months or month in args.months)
+    if not waiting:
+        queue.close()
+        backend.close()
+        print("✓ No papers waiting for a summary!")
         return
+    total = waiting if limit is None else min(limit, waiting)
+    
+    # Papers are leased a few at a time as workers free up, and each abstract
+    # is read with one seek through the paper index
+    papers = iter_queued_papers(
+        queue, owner, limit, chunk=max(args.workers * args.pack, 10),
+        lease_seconds=args.lease_minutes * 60, priority=args.priority, week=args.digest_week, months=args.months
+    )
+    
+    # Summaries are appended to a journal next to each month CSV and merged into it in batches
+    journals = {}
+    last_report = time.perf_counter()
     
-    # Get first N rows that need summaries
-    to_process = empty_indices[:batch_size]
+    def save_report():
+        nonlocal last_report
+        last_report = time.perf_counter()
+        if not args.no_cache:
+            cache = get_summary_cache()
+            metrics.set_counters(cache_hits=cache.hits, cache_misses=cache.misses)
+        metrics.write_report(report_path)
+        if args.prometheus:
+            metrics.write_prometheus(args.prometheus)
     
-    print(f"\nFound {len(empty_indices)} papers without summaries")
-    print(f"Processing next {len(to_process)} papers (rows {to_process[0]} to {to_process[-1]})...")
+    def record_summary(month, paper_id, summary):
+        if month not in journals:
+            journals[month] = SummaryJournal(month_file(month))
+        journal = journals[month]
+        journal.append(paper_id, summary)
+        queue.complete(month, paper_id)
+        metrics.count('papers_summarized')
+        if len(journal) >= args.compact_every:
+            journal.compact()
+        if time.perf_counter() - last_report >= REPORT_INTERVAL:
+            save_report()
+    
+    def record_failure(month, paper_id):
+        queue.fail(month, paper_id)
+        metrics.count('papers_failed')
+    
+    print(f"\nSummarizing {'all ' if limit is None else 'up to '}{total:,} papers ({args.priority} order) "
+          f"with {args.workers} worker(s)...")
     print("=" * 80)
     
-    # Process each row
-    for idx in to_process:
-        paper = df.loc[idx]
-        print(f"\n[{to_process.index(idx) + 1}/{len(to_process)}] Processing: {paper['paper_id']}")
-        print(f"Title: {paper['og_title'][:80]}...")
-        
-        try:
-            # Get summary from Codex using the proper prompt
-            summary = summarize_abstract(paper['abstract'])
-            
-            # Update the dataframe
-            df.at[idx, 'summary'] = summary
-            
-            # Save immediately after each successful summary
-            df.to_csv(CSV_FILE, index=False)
-            
-            print(f"✓ Summary: {summary}")
-            print(f"✓ Saved to CSV")
-            
-        except Exception as e:
-            print(f"✗ Error: {e}")
-            continue
+    try:
+        succeeded, failed = summarize_stream(papers, record_summary, record_failure, args.workers, args.pack,
+                                             not args.no_cache, total)
+    finally:
+        papers.close()
+        # Also runs on Ctrl+C, so finished summaries reach the CSVs and unfinished papers go back to the queue
+        queue.release(owner)
+        for journal in journals.values():
+            journal.compact()
+            journal.close()
+            # Record the compacted CSV, so the next sync does not re-read it and --status stays exact
+            queue.sync_month(journal.csv_path)
+        backend.close()
+        save_report()
     
     # Final summary
     print("\n" + "=" * 80)
-    print("✓ Batch processing complete!")
+    print(f"✓ Batch processing complete! {succeeded} summarized, {failed} failed")
+    if not args.no_cache:
+        cache = get_summary_cache()
+        print(f"Summary cache: {cache.hits} hits, {cache.misses} misses ({cache.hit_rate():.0%} hit rate), "
+              f"{len(cache):,} summaries cached")
+    for name, stats in metrics.report()['backends'].items():
+        latency = stats['latency_seconds']
+        if latency['count']:
+            print(f"{name}: {stats['calls']} calls, latency p50 {latency['p50']:.2f}s, p95 {latency['p95']:.2f}s, "
+                  f"p99 {latency['p99']:.2f}s; {stats['outcomes']['ok']} ok")
+    print(f"Run report: {report_path}")
     
     # Show remaining
-    remaining = len(df[df['summary'].isna() | (df['summary'] == '')])
+    remaining = queue.remaining()
+    queue.close()
     print(f"\nRemaining papers without summaries: {remaining}")
 
 if __name__ == "__main__":
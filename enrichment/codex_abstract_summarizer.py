@@ -2,44 +2,278 @@
 """
 Script to interact with Codex CLI to summarize academic paper abstracts.
 Processes batches of abstracts and returns results in a DataFrame.
+
+summarize_abstracts_packed() sends several abstracts per `codex exec` call
+and asks for one JSON line per paper, so the CLI start-up cost is paid once
+per group instead of once per paper. Papers missing from the reply, or
+with an invalid entry, are summarized one at a time instead.
+
+Both summarize_abstract() and summarize_abstracts_packed() look abstracts
+up in the summary cache (storage/summary_cache.py) first and only send the
+misses to Codex.
+
+Calls go through the backend set with set_backend() (see llm_backends.py);
+the default runs `codex exec` for every prompt. If that backend has metrics
+attached, packed prompts also count how many papers their replies covered.
 """
 
-import subprocess
-import shlex
+import json
+import os
+import sys
+import threading
 import pandas as pd
-from typing import List, Optional
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Tuple
+
+from llm_backends import BackendError, CodexCliBackend, LLMBackend
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'storage'))
+from summary_cache import SummaryCache
+
+# Bump when a prompt changes, so summaries cached for the old prompt are not reused;
+# each template has its own version, and lookups accept a summary from either
+PROMPT_VERSION = 1
+PACKED_PROMPT_VERSION = 'packed-1'
+CACHE_LOOKUP_VERSIONS = (PROMPT_VERSION, PACKED_PROMPT_VERSION)
+
+# Packed prompts: at most this many abstracts, and roughly this many prompt tokens, per call
+DEFAULT_PACK_SIZE = 8
+DEFAULT_TOKEN_BUDGET = 6000
+# Replies longer than this are treated as malformed (the prompt asks for 20-25 words)
+MAX_SUMMARY_WORDS = 60
+
+SINGLE_PROMPT = """Describe what they built/discovered in 20-25 words. Be specific and clear, but cut unnecessary words.
+
+Abstract: "{abstract}"
+"""
+
+
+_summary_cache = None
+_summary_cache_lock = threading.Lock()
+
+
+def get_summary_cache() -> SummaryCache:
+    """Return the shared summary cache, opening it on first use."""
+    global _summary_cache
+    with _summary_cache_lock:
+        if _summary_cache is None:
+            _summary_cache = SummaryCache()
+    return _summary_cache
+
+
+_backend = None
+
+
+def set_backend(backend: LLMBackend) -> None:
+    """Send all following prompts to this backend (see llm_backends.create_backend)."""
+    global _backend
+    _backend = backend
+
+
+def get_backend() -> LLMBackend:
+    """Return the current backend, creating the default Codex CLI backend on first use."""
+    global _backend
+    if _backend is None:
+        _backend = CodexCliBackend()
+    return _backend
 
 
 def ask_codex(prompt: str) -> str:
-    """Send a prompt to Codex CLI and get response."""
-    escaped_prompt = shlex.quote(prompt)
-    
-    result = subprocess.run(
-        f'codex exec {escaped_prompt}',
-        shell=True,
-        capture_output=True,
-        text=True
-    )
-    
-    return result.stdout.strip()
+    """
+    Send a prompt to the current backend and get its response.
+        
+    Raises:
+        BackendError: If the call failed after the backend's retries
+    """
+    return get_backend().complete(prompt)
+
 
+def is_valid_summary(summary: str) -> bool:
+    """Return True for a non-empty reply of at most MAX_SUMMARY_WORDS words."""
+    return bool(summary.strip()) and len(summary.split()) <= MAX_SUMMARY_WORDS
 
-def summarize_abstract(abstract: str) -> str:
+
+def summarize_abstract(abstract: str, use_cache: bool = True) -> str:
     """
     Summarize a single abstract using Codex.
     
     Args:
         abstract: The paper abstract to summarize
+        use_cache: Return a cached summary if there is one, and cache new ones
         
     Returns:
         The summary from Codex
+        
+    Raises:
+        BackendError: If the backend call failed
     """
-    prompt = f"""Describe what they built/discovered in 20-25 words. Be specific and clear, but cut unnecessary words.
+    cache = get_summary_cache() if use_cache else None
+    if cache is not None:
+        summary = cache.get(abstract, CACHE_LOOKUP_VERSIONS)
+        if summary is not None:
+            return summary
+    summary = ask_codex(SINGLE_PROMPT.format(abstract=abstract))
+    # Malformed replies are returned but not cached, so the next run asks again
+    if cache is not None and is_valid_summary(summary):
+        cache.put(abstract, PROMPT_VERSION, summary)
+    return summary
 
-Abstract: "{abstract}"
+
+def estimate_tokens(text: str) -> int:
+    """Rough token count for English text (about 4 characters per token)."""
+    return len(text) // 4 + 1
+
+
+def iter_packed(papers: Iterable[Tuple[Any, str]], pack_size: int = DEFAULT_PACK_SIZE,
+                token_budget: int = DEFAULT_TOKEN_BUDGET) -> Iterator[List[Tuple[Any, str]]]:
+    """
+    Group papers for packed prompts as they arrive, keeping their order.
+    
+    Only the group being filled is held in memory, so papers can come from
+    a generator of any length.
+    
+    Args:
+        papers: (key, abstract) pairs; the key is passed through unchanged
+        pack_size: Maximum abstracts per group
+        token_budget: Maximum estimated abstract tokens per group; an abstract
+            over the budget on its own gets a group to itself
+        
+    Yields:
+        Groups of (key, abstract) pairs
+    """
+    group, group_tokens = [], 0
+    for key, abstract in papers:
+        tokens = estimate_tokens(abstract)
+        if group and (len(group) >= pack_size or group_tokens + tokens > token_budget):
+            yield group
+            group, group_tokens = [], 0
+        group.append((key, abstract))
+        group_tokens += tokens
+    if group:
+        yield group
+
+
+def pack_abstracts(papers: List[Tuple[str, str]], pack_size: int = DEFAULT_PACK_SIZE,
+                   token_budget: int = DEFAULT_TOKEN_BUDGET) -> List[List[Tuple[str, str]]]:
+    """
+    Group papers for packed prompts, keeping their order.
+    
+    Args:
+        papers: (paper_id, abstract) pairs
+        pack_size: Maximum abstracts per group
+        token_budget: Maximum estimated abstract tokens per group
+        
+    Returns:
+        List of groups of (paper_id, abstract) pairs
+    """
+    return list(iter_packed(papers, pack_size, token_budget))
+
+
+def build_packed_prompt(group: List[Tuple[str, str]]) -> str:
+    """Build one prompt asking for a JSON line per paper in the group."""
+    abstracts = "\n\n".join(f'Paper {paper_id}\nAbstract: "{abstract}"' for paper_id, abstract in group)
+    return f"""For each paper below, describe what they built/discovered in 20-25 words. Be specific and clear, but cut unnecessary words.
+
+Reply with exactly one JSON object per line and nothing else, one line per paper:
+{{"paper_id": "<paper id>", "summary": "<summary>"}}
+
+{abstracts}
 """
+
+
+def parse_packed_response(response: str, paper_ids: List[str]) -> Dict[str, str]:
+    """
+    Extract valid summaries from a packed reply.
+    
+    Lines that are not JSON objects, name an unexpected paper, or carry an
+    empty or overlong summary are ignored; the first valid line per paper wins.
+    
+    Args:
+        response: Raw model output
+        paper_ids: IDs that were in the prompt
+        
+    Returns:
+        Dictionary of paper_id -> summary
+    """
+    expected = set(paper_ids)
+    summaries = {}
+    for line in response.splitlines():
+        line = line.strip().rstrip(',')
+        if not line.startswith('{'):
+            continue  # Code fences, blank lines, commentary
+        try:
+            entry = json.loads(line)
+        except ValueError:
+            continue
+        if not isinstance(entry, dict):
+            continue
+        paper_id = str(entry.get('paper_id', '')).strip()
+        summary = entry.get('summary')
+        if paper_id not in expected or paper_id in summaries or not isinstance(summary, str):
+            continue
+        summary = summary.strip()
+        if is_valid_summary(summary):
+            summaries[paper_id] = summary
+    return summaries
+
+
+def summarize_abstracts_packed(papers: List[Tuple[str, str]], pack_size: int = DEFAULT_PACK_SIZE,
+                               token_budget: int = DEFAULT_TOKEN_BUDGET,
+                               ask: Callable[[str], str] = ask_codex,
+                               use_cache: bool = True) -> Dict[str, str]:
+    """
+    Summarize several abstracts with as few Codex calls as possible.
+    
+    Args:
+        papers: (paper_id, abstract) pairs
+        pack_size: Maximum abstracts per call
+        token_budget: Maximum estimated abstract tokens per call
+        ask: Function sending a prompt to the model and returning its reply
+        use_cache: Skip abstracts with a cached summary, and cache new ones
+        
+    Returns:
+        Dictionary of paper_id -> summary; papers whose single call failed
+        as well are left out
+    """
+    cache = get_summary_cache() if use_cache else None
+    metrics = get_backend().metrics
+    summaries = {}
+    misses = []
+    for paper_id, abstract in papers:
+        summary = cache.get(abstract, CACHE_LOOKUP_VERSIONS) if cache is not None else None
+        if summary is not None:
+            summaries[paper_id] = summary
+        else:
+            misses.append((paper_id, abstract))
     
-    return ask_codex(prompt)
+    for group in pack_abstracts(misses, pack_size, token_budget):
+        if len(group) > 1:
+            try:
+                answered = parse_packed_response(ask(build_packed_prompt(group)), [pid for pid, _ in group])
+                summaries.update(answered)
+                if cache is not None:
+                    for paper_id, abstract in group:
+                        if paper_id in answered:
+                            cache.put(abstract, PACKED_PROMPT_VERSION, answered[paper_id])
+            except BackendError as e:
+                answered = {}
+                print(f"⚠ Packed call for {len(group)} papers failed ({e}); summarizing them one by one")
+            if metrics is not None:
+                metrics.count('packed_prompts')
+                metrics.count('packed_papers_answered', len(answered))
+                metrics.count('packed_papers_fallback', len(group) - len(answered))
+        # Fall back to one call per paper the packed reply did not cover
+        for paper_id, abstract in group:
+            if paper_id in summaries:
+                continue
+            try:
+                summary = ask(SINGLE_PROMPT.format(abstract=abstract))
+            except BackendError as e:
+                print(f"✗ {paper_id}: {e}")
+                continue
+            summaries[paper_id] = summary
+            if cache is not None and is_valid_summary(summary):
+                cache.put(abstract, PROMPT_VERSION, summary)
+    return summaries
 
 
 def summarize_abstracts_batch(df: pd.DataFrame, abstract_column: str = 'abstract') -> pd.DataFrame:
@@ -0,0 +1,385 @@
+#!/usr/bin/env python3
+"""
+Enrichment instrumentation
+
+Records every LLM call made during an enrichment run (latency, outcome,
+exit status, prompt and reply sizes) plus run-level counters, and turns
+them into a JSON run report and, optionally, Prometheus text exposition
+format. The numbers answer "how many workers does this backend take?" and
+"did the model get slower or start failing?" without reading the log.
+
+A backend records into its metrics object from LLMBackend.complete(), one
+entry per attempt, so retries show up as separate calls:
+    ok           Non-empty reply
+    empty        The backend answered with nothing
+    timeout      BackendTimeoutError
+    unavailable  BackendUnavailableError (crash, non-zero exit, HTTP 429/5xx)
+    bad_response BackendResponseError (unusable reply, HTTP 4xx)
+    error        Any other BackendError (e.g. the command cannot be run)
+
+Memory does not grow with the number of calls: each backend keeps
+counters, running sums, fixed histogram buckets (LATENCY_BUCKETS) and, for
+p50/p95/p99, a uniform sample of at most RESERVOIR_SIZE values per
+statistic. Percentiles are exact until a run has made that many calls and
+a close estimate after.
+
+Usage from other folders:
+    from enrichment_metrics import EnrichmentMetrics
+    metrics = EnrichmentMetrics()
+    backend = create_backend('codex-cli', metrics=metrics)
+    ...
+    metrics.write_report('../data/enrichment_runs/run.json')
+
+Usage as a script:
+    python enrichment_metrics.py                    # Show the latest run report
+    python enrichment_metrics.py REPORT.json        # Show a run report
+    python enrichment_metrics.py REPORT.json --prometheus   # ...as Prometheus text
+"""
+
+import argparse
+import glob
+import json
+import math
+import os
+import random
+import sys
+import threading
+import time
+from datetime import datetime
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'storage'))
+from paper_store import DATA_DIR
+
+REPORTS_DIR = os.path.join(DATA_DIR, 'enrichment_runs')
+
+# Upper bounds (seconds) of the call latency histogram; codex exec takes seconds to minutes
+LATENCY_BUCKETS = (0.5, 1, 2, 5, 10, 20, 30, 60, 120, 300, 600)
+OUTCOMES = ('ok', 'empty', 'timeout', 'unavailable', 'bad_response', 'error')
+# Most recent failure messages (with stderr, where there is one) kept for the report
+MAX_RECENT_ERRORS = 20
+# Values sampled per statistic for percentiles
+RESERVOIR_SIZE = 4096
+
+def percentile(values, q):
+    """
+    Return the q-th percentile of sorted values, interpolating between ranks.
+    
+    Args:
+        values (list): Sorted numbers
+        q (float): Percentile, 0-100
+    
+    Returns:
+        float: The percentile, or None for no values
+    """
+    if not values:
+        return None
+    rank = (len(values) - 1) * q / 100
+    low = math.floor(rank)
+    high = min(low + 1, len(values) - 1)
+    return values[low] + (values[high] - values[low]) * (rank - low)
+
+class RunningStats:
+    """
+    Count, total and maximum of a stream of numbers, plus a bounded sample for percentiles.
+    
+    The first `size` values are all kept; after that each new value replaces
+    a random kept one with probability size/count (reservoir sampling), so
+    the sample stays uniform over the whole stream.
+    """
+    
+    def __init__(self, size=RESERVOIR_SIZE):
+        self.size = size
+        self.count = 0
+        self.total = 0.0
+        self.max = None
+        self.sample = []
+        self.random = random.Random(0)
+    
+    def add(self, value):
+        """Add one value."""
+        self.count += 1
+        self.total += value
+        self.max = value if self.max is None else max(self.max, value)
+        if len(self.sample) < self.size:
+            self.sample.append(value)
+        else:
+            slot = self.random.randrange(self.count)
+            if slot < self.size:
+                self.sample[slot] = value
+    
+    def summary(self):
+        """Return count, total, mean, max and p50/p95/p99 of the values added."""
+        values = sorted(self.sample)
+        return {
+            'count': self.count,
+            'total': round(self.total, 3),
+            'mean': round(self.total / self.count, 3) if self.count else None,
+            'max': round(self.max, 3) if self.count else None,
+            'p50': round(percentile(values, 50), 3) if values else None,
+            'p95': round(percentile(values, 95), 3) if values else None,
+            'p99': round(percentile(values, 99), 3) if values else None,
+        }
+
+class BackendStats:
+    """Call statistics of one backend: outcome counts, latency histogram and running stats."""
+    
+    def __init__(self):
+        self.outcomes = dict.fromkeys(OUTCOMES, 0)
+        self.buckets = [0] * len(LATENCY_BUCKETS)
+        self.latency = RunningStats()
+        self.ok_latency = RunningStats()
+        self.prompt_chars = RunningStats()
+        self.response_chars = RunningStats()
+    
+    def add(self, seconds, outcome, prompt_chars, response_chars):
+        """Record one call attempt."""
+        self.outcomes[outcome] = self.outcomes.get(outcome, 0) + 1
+        for i, bound in enumerate(LATENCY_BUCKETS):
+            if seconds <= bound:
+                self.buckets[i] += 1
+                break
+        self.latency.add(seconds)
+        self.prompt_chars.add(prompt_chars)
+        if outcome == 'ok':
+            self.ok_latency.add(seconds)
+            self.response_chars.add(response_chars)
+    
+    def summary(self, elapsed):
+        """Return the report section for this backend."""
+        calls = self.latency.count
+        histogram, cumulative = {}, 0
+        for bound, count in zip(LATENCY_BUCKETS, self.buckets):
+            cumulative += count
+            histogram[str(bound)] = cumulative
+        histogram['+Inf'] = calls
+        return {
+            'calls': calls,
+            'outcomes': dict(self.outcomes),
+            'latency_seconds': self.latency.summary(),
+            'ok_latency_seconds': self.ok_latency.summary(),
+            'latency_histogram': histogram,
+            'prompt_chars': self.prompt_chars.summary(),
+            'response_chars': self.response_chars.summary(),
+            'calls_per_minute': round(calls / elapsed * 60, 2) if elapsed else None,
+        }
+
+class EnrichmentMetrics:
+    """Thread-safe collector for LLM call measurements and run counters."""
+    
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.started = time.time()
+        self.start_clock = time.perf_counter()
+        self.calls = {}  # backend name -> BackendStats
+        self.return_codes = {}  # exit status -> count (process-based backends)
+        self.recent_errors = []
+        self.counters = {}
+        self.info = {}
+    
+    def record_call(self, backend, seconds, outcome, prompt_chars, response_chars=0, returncode=None, error=None):
+        """
+        Record one backend call attempt.
+        
+        Args:
+            backend (str): Backend name (e.g., codex-cli)
+            seconds (float): Wall time of the attempt
+            outcome (str): One of OUTCOMES
+            prompt_chars (int): Prompt length
+            response_chars (int): Reply length (0 on failure)
+            returncode (int): Exit status, for backends that run a command
+            error (str): Failure message, including stderr if any
+        """
+        with self.lock:
+            if backend not in self.calls:
+                self.calls[backend] = BackendStats()
+            self.calls[backend].add(seconds, outcome, prompt_chars, response_chars)
+            if returncode is not None:
+                self.return_codes[returncode] = self.return_codes.get(returncode, 0) + 1
+            if error:
+                self.recent_errors.append({'at': datetime.now().isoformat(timespec='seconds'), 'backend': backend,
+                                           'outcome': outcome, 'error': error[:500]})
+                del self.recent_errors[:-MAX_RECENT_ERRORS]
+    
+    def count(self, name, amount=1):
+        """Add to a run counter (e.g. papers_summarized, packed_fallbacks)."""
+        with self.lock:
+            self.counters[name] = self.counters.get(name, 0) + amount
+    
+    def set_counters(self, **values):
+        """Set run counters to absolute values (e.g. cache hits taken from the cache)."""
+        with self.lock:
+            self.counters.update(values)
+    
+    def set_info(self, **info):
+        """Attach run settings (backend, workers, pack, ...) to the report."""
+        with self.lock:
+            self.info.update(info)
+    
+    def elapsed(self):
+        """Seconds since the metrics were created."""
+        return time.perf_counter() - self.start_clock
+    
+    def report(self):
+        """
+        Build the run report.
+        
+        Returns:
+            dict: JSON-serializable report with settings, counters and one
+                  section of call statistics per backend
+        """
+        elapsed = self.elapsed()
+        with self.lock:
+            backends = {name: stats.summary(elapsed) for name, stats in self.calls.items()}
+            counters = dict(self.counters)
+            return_codes = dict(self.return_codes)
+            recent_errors = list(self.recent_errors)
+            info = dict(self.info)
+        
+        papers = counters.get('papers_summarized', 0) + counters.get('papers_failed', 0)
+        return {
+            'started_at': datetime.fromtimestamp(self.started).isoformat(timespec='seconds'),
+            'finished_at': datetime.now().isoformat(timespec='seconds'),
+            'elapsed_seconds': round(elapsed, 3),
+            'settings': info,
+            'counters': counters,
+            'papers_per_minute': round(papers / elapsed * 60, 2) if elapsed else None,
+            'backends': backends,
+            'return_codes': {str(code): count for code, count in sorted(return_codes.items())},
+            'recent_errors': recent_errors,
+        }
+    
+    def write_report(self, path):
+        """
+        Write the run report as JSON (via a temp file, so a reader never sees half a report).
+        
+        Returns:
+            dict: The report written
+        """
+        report = self.report()
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(report, f, indent=2, ensure_ascii=False)
+            f.write('\n')
+        os.replace(tmp_path, path)
+        return report
+    
+    def write_prometheus(self, path):
+        """Write the current metrics in Prometheus text exposition format."""
+        text = prometheus_text(self.report())
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            f.write(text)
+        os.replace(tmp_path, path)
+
+def prometheus_text(report):
+    """
+    Render a run report in Prometheus text exposition format (e.g. for node_exporter's textfile collector).
+    
+    Args:
+        report (dict): Report from EnrichmentMetrics.report() or a saved JSON report
+    
+    Returns:
+        str: Metric families, one sample per line
+    """
+    lines = [
+        '# HELP enrichment_llm_call_duration_seconds Wall time of LLM backend call attempts.',
+        '# TYPE enrichment_llm_call_duration_seconds histogram',
+    ]
+    for name, stats in report['backends'].items():
+        for bound, count in stats['latency_histogram'].items():
+            lines.append(f'enrichment_llm_call_duration_seconds_bucket{{backend="{name}",le="{bound}"}} {count}')
+        lines.append(f'enrichment_llm_call_duration_seconds_sum{{backend="{name}"}} {stats["latency_seconds"]["total"]}')
+        lines.append(f'enrichment_llm_call_duration_seconds_count{{backend="{name}"}} {stats["calls"]}')
+    
+    lines += ['# HELP enrichment_llm_call_latency_seconds Call latency percentiles over the run.',
+              '# TYPE enrichment_llm_call_latency_seconds gauge']
+    for name, stats in report['backends'].items():
+        for key, quantile in (('p50', '0.5'), ('p95', '0.95'), ('p99', '0.99')):
+            value = stats['latency_seconds'][key]
+            if value is not None:
+                lines.append(f'enrichment_llm_call_latency_seconds{{backend="{name}",quantile="{quantile}"}} {value}')
+    
+    lines += ['# HELP enrichment_llm_calls_total LLM backend call attempts by outcome.',
+              '# TYPE enrichment_llm_calls_total counter']
+    for name, stats in report['backends'].items():
+        for outcome, count in stats['outcomes'].items():
+            lines.append(f'enrichment_llm_calls_total{{backend="{name}",outcome="{outcome}"}} {count}')
+    
+    for metric, key, help_text in (
+        ('enrichment_llm_prompt_chars_total', 'prompt_chars', 'Characters sent in prompts.'),
+        ('enrichment_llm_response_chars_total', 'response_chars', 'Characters received in successful replies.'),
+    ):
+        lines += [f'# HELP {metric} {help_text}', f'# TYPE {metric} counter']
+        for name, stats in report['backends'].items():
+            lines.append(f'{metric}{{backend="{name}"}} {int(stats[key]["total"])}')
+    
+    if report['return_codes']:
+        lines += ['# HELP enrichment_llm_exit_status_total Exit statuses of command-line backend calls.',
+                  '# TYPE enrichment_llm_exit_status_total counter']
+        for code, count in report['return_codes'].items():
+            lines.append(f'enrichment_llm_exit_status_total{{code="{code}"}} {count}')
+    
+    lines += ['# HELP enrichment_run_events_total Run counters (papers, cache hits, packed fallbacks).',
+              '# TYPE enrichment_run_events_total counter']
+    for name, count in sorted(report['counters'].items()):
+        lines.append(f'enrichment_run_events_total{{event="{name}"}} {count}')
+    lines += ['# HELP enrichment_run_elapsed_seconds Duration of the run so far.',
+              '# TYPE enrichment_run_elapsed_seconds gauge',
+              f'enrichment_run_elapsed_seconds {report["elapsed_seconds"]}']
+    return '\n'.join(lines) + '\n'
+
+def default_report_path():
+    """Return a new report path in data/enrichment_runs/, named after the current time and process."""
+    return os.path.join(REPORTS_DIR, f"{datetime.now():%Y%m%d-%H%M%S}-{os.getpid()}.json")
+
+def print_report(report):
+    """Print the main numbers of a run report."""
+    counters = report['counters']
+    print("=" * 80)
+    print(f"Enrichment run {report['started_at']} ({report['elapsed_seconds']:.0f}s)")
+    if report['settings']:
+        print("Settings: " + ", ".join(f"{key}={value}" for key, value in report['settings'].items()))
+    print(f"Papers: {counters.get('papers_summarized', 0):,} summarized, {counters.get('papers_failed', 0):,} failed"
+          f" ({report['papers_per_minute'] or 0:.1f}/min); cache hits {counters.get('cache_hits', 0):,}")
+    for name, stats in report['backends'].items():
+        latency = stats['latency_seconds']
+        outcomes = ", ".join(f"{outcome} {count}" for outcome, count in stats['outcomes'].items() if count)
+        print(f"\n{name}: {stats['calls']:,} calls ({outcomes})")
+        if latency['count']:
+            print(f"  Latency: p50 {latency['p50']:.2f}s, p95 {latency['p95']:.2f}s, p99 {latency['p99']:.2f}s, "
+                  f"max {latency['max']:.2f}s")
+            print(f"  Prompt: {stats['prompt_chars']['mean']:.0f} chars on average; "
+                  f"reply: {stats['response_chars']['mean'] or 0:.0f} chars")
+    if report['return_codes']:
+        print("\nExit statuses: " + ", ".join(f"{code}: {count}" for code, count in report['return_codes'].items()))
+    if report['recent_errors']:
+        print("\nRecent errors:")
+        for entry in report['recent_errors'][-5:]:
+            print(f"  ✗ {entry['at']} {entry['outcome']}: {entry['error'].splitlines()[0][:120]}")
+    print("=" * 80)
+
+def main():
+    """Print a saved run report (default: the latest), or convert it to Prometheus text."""
+    parser = argparse.ArgumentParser(description='Show an enrichment run report.')
+    parser.add_argument('report', nargs='?', help='Report JSON file (default: latest in data/enrichment_runs/)')
+    parser.add_argument('--prometheus', action='store_true', help='Print Prometheus text format instead')
+    args = parser.parse_args()
+    
+    path = args.report
+    if path is None:
+        reports = sorted(glob.glob(os.path.join(REPORTS_DIR, '*.json')), key=os.path.getmtime)
+        if not reports:
+            print(f"✗ No run reports in {REPORTS_DIR}")
+            sys.exit(1)
+        path = reports[-1]
+    with open(path, 'r', encoding='utf-8') as f:
+        report = json.load(f)
+    if args.prometheus:
+        sys.stdout.write(prometheus_text(report))
+    else:
+        print(f"Report: {path}")
+        print_report(report)
+
+if __name__ == "__main__":
+    main()
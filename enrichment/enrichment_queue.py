@@ -0,0 +1,386 @@
+#!/usr/bin/env python3
+"""
+Multi-month enrichment queue
+
+A SQLite queue (data/enrichment_queue.sqlite) of every paper, across all
+month files, that still has no summary. sync() brings it up to date: months
+whose CSV changed since the last sync are re-read (paper_id, summary and
+submitted_on only, through the Parquet mirrors), new papers without a
+summary are queued and papers that gained one are dropped. Papers with a
+summary waiting in a month's journal count as summarized.
+
+Workers take papers with lease(): the chosen rows are marked with the
+worker's name and an expiry time in one transaction, so several workers
+(threads or processes) can drain the queue without picking the same paper.
+complete() removes a paper, fail() puts it back with one more failed
+attempt, and release() returns a worker's unfinished leases. A lease that
+expires (e.g. the worker was killed) makes the paper available again.
+
+The order papers are leased in is a policy:
+    digest   Papers of the weekly digest's target week first, then newest
+    newest   Most recently submitted first
+    oldest   Oldest submission first
+    file     Month by month, in file order (the old batch_summarizer order)
+
+Usage from other folders:
+    from enrichment_queue import EnrichmentQueue
+    queue = EnrichmentQueue()
+    queue.sync()
+    for month, paper_id in queue.lease('worker-1', 10):
+        ...
+        queue.complete(month, paper_id)
+
+Each month's paper and missing-summary counts are kept in month_counts,
+updated by triggers as papers enter and leave the queue, so remaining()
+and status() answer without scanning the queue or reading any CSV.
+
+Usage as a script:
+    python enrichment_queue.py [--priority P] [--digest-week 2025WK46]   # Sync, show counts and next papers
+    python enrichment_queue.py --status   # Progress per month from the counters only
+"""
+
+import argparse
+import os
+import sqlite3
+import sys
+import threading
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'storage'))
+from paper_store import DATA_DIR, list_month_files, month_file, month_of, read_month, source_signature
+from summary_journal import get_journal_path, read_journal
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'weekly_digest'))
+from extract_weekly_papers import (
+    get_last_friday_and_week, get_monday_from_week, get_week_date_range, get_week_from_string
+)
+
+QUEUE_PATH = os.path.join(DATA_DIR, 'enrichment_queue.sqlite')
+DEFAULT_LEASE_SECONDS = 30 * 60
+DEFAULT_MAX_ATTEMPTS = 3
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS items (
+    month TEXT NOT NULL,
+    paper_id TEXT NOT NULL,
+    submitted_on TEXT,
+    position INTEGER NOT NULL,
+    attempts INTEGER NOT NULL DEFAULT 0,
+    lease_owner TEXT,
+    lease_expires REAL,
+    PRIMARY KEY (month, paper_id)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS items_by_submitted ON items (submitted_on);
+CREATE INDEX IF NOT EXISTS items_by_position ON items (month, position);
+CREATE INDEX IF NOT EXISTS items_by_lease ON items (lease_expires);
+CREATE INDEX IF NOT EXISTS items_by_attempts ON items (attempts) WHERE attempts > 0;
+CREATE TABLE IF NOT EXISTS files (
+    month TEXT PRIMARY KEY,
+    size INTEGER NOT NULL,
+    mtime_ns INTEGER NOT NULL
+);
+CREATE TABLE IF NOT EXISTS month_counts (
+    month TEXT PRIMARY KEY,
+    papers INTEGER NOT NULL DEFAULT 0,
+    missing INTEGER NOT NULL DEFAULT 0
+);
+CREATE TRIGGER IF NOT EXISTS items_counted_in AFTER INSERT ON items BEGIN
+    INSERT INTO month_counts (month, missing) VALUES (NEW.month, 1)
+        ON CONFLICT (month) DO UPDATE SET missing = missing + 1;
+END;
+CREATE TRIGGER IF NOT EXISTS items_counted_out AFTER DELETE ON items BEGIN
+    UPDATE month_counts SET missing = missing - 1 WHERE month = OLD.month;
+END;
+"""
+
+# ORDER BY clauses per policy; NULL dates sort last under DESC
+PRIORITY_ORDER = {
+    'digest': '(submitted_on BETWEEN :week_start AND :week_end) DESC, submitted_on DESC, month DESC, position',
+    'newest': 'submitted_on DESC, month DESC, position',
+    'oldest': 'submitted_on IS NULL, submitted_on, month, position',
+    'file': 'month, position',
+}
+
+def digest_week_range(week=None):
+    """
+    Return the (monday, sunday) ISO date strings of a digest week.
+    
+    Args:
+        week (str): Week like 2025WK46 (default: the week extract_weekly_papers.py
+                    would use today, i.e. last Friday's)
+    
+    Raises:
+        ValueError: If the week string is not valid
+    """
+    if week:
+        year, week_number = get_week_from_string(week)
+        if year is None:
+            raise ValueError(f"Invalid week '{week}' (use a format like 2025WK46)")
+        reference_date = get_monday_from_week(year, week_number)
+    else:
+        reference_date, _, _ = get_last_friday_and_week()
+    monday, sunday = get_week_date_range(reference_date)
+    return monday.strftime('%Y-%m-%d'), sunday.strftime('%Y-%m-%d')
+
+class EnrichmentQueue:
+    """Thread-safe handle on the queue of papers waiting for a summary."""
+    
+    def __init__(self, path=QUEUE_PATH, data_dir=DATA_DIR):
+        self.path = path
+        self.data_dir = data_dir
+        self.lock = threading.Lock()
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        # Several enrichment workers share the queue; isolation_level=None so
+        # lease() can take the write lock up front with BEGIN IMMEDIATE
+        self.db = sqlite3.connect(path, timeout=60, check_same_thread=False, isolation_level=None)
+        self.db.execute('PRAGMA journal_mode=WAL')
+        self.db.execute('PRAGMA synchronous=NORMAL')
+        counted = self.db.execute("SELECT 1 FROM sqlite_master WHERE name = 'month_counts'").fetchone()
+        self.db.executescript(SCHEMA)
+        if not counted:
+            # Queue created before the counters existed: count what is queued, and
+            # have the next sync re-read every month to fill in the paper totals
+            with self._transaction():
+                self.db.execute('INSERT OR REPLACE INTO month_counts (month, missing) '
+                                'SELECT month, COUNT(*) FROM items GROUP BY month')
+                self.db.execute('DELETE FROM files')
+    
+    def close(self):
+        with self.lock:
+            self.db.close()
+    
+    def _transaction(self):
+        """Context manager for a write transaction (caller holds the lock)."""
+        self.db.execute('BEGIN IMMEDIATE')
+        return _Transaction(self.db)
+    
+    def sync_month(self, csv_path):
+        """
+        Bring the queued papers of one month up to date with its CSV.
+        
+        Returns:
+            int: Papers of the month waiting for a summary (None if unchanged)
+        """
+        month = month_of(csv_path)
+        size, mtime_ns = source_signature(csv_path)
+        with self.lock:
+            entry = self.db.execute('SELECT size, mtime_ns FROM files WHERE month = ?', (month,)).fetchone()
+        if entry is not None and tuple(entry) == (size, mtime_ns):
+            return None
+        
+        df = read_month(csv_path, columns=['paper_id', 'summary', 'submitted_on'])
+        missing = df['summary'].isna() | (df['summary'].astype(str).str.strip() == '')
+        journaled = read_journal(get_journal_path(csv_path))
+        if journaled:
+            missing &= ~df['paper_id'].isin(list(journaled))
+        unique = df['paper_id'].notna() & ~df['paper_id'].duplicated()
+        papers = int(unique.sum())
+        df = df[missing & unique]
+        dates = df['submitted_on'].dt.strftime('%Y-%m-%d')
+        rows = [(month, paper_id, None if isinstance(date, float) else date, position)
+                for position, paper_id, date in zip(df.index, df['paper_id'], dates)]
+        
+        with self.lock, self._transaction():
+            self.db.execute('CREATE TEMP TABLE IF NOT EXISTS synced (paper_id TEXT PRIMARY KEY)')
+            self.db.execute('DELETE FROM synced')
+            self.db.executemany('INSERT OR IGNORE INTO synced VALUES (?)', [(row[1],) for row in rows])
+            # Papers that got a summary since the last sync leave the queue
+            self.db.execute('DELETE FROM items WHERE month = ? AND paper_id NOT IN (SELECT paper_id FROM synced)', (month,))
+            self.db.executemany(
+                'INSERT INTO items (month, paper_id, submitted_on, position) VALUES (?, ?, ?, ?) '
+                'ON CONFLICT (month, paper_id) DO UPDATE SET submitted_on = excluded.submitted_on, position = excluded.position',
+                rows
+            )
+            self.db.execute('INSERT OR REPLACE INTO files VALUES (?, ?, ?)', (month, size, mtime_ns))
+            self.db.execute('INSERT INTO month_counts (month, papers) VALUES (?, ?) '
+                            'ON CONFLICT (month) DO UPDATE SET papers = excluded.papers', (month, papers))
+        return len(rows)
+    
+    def sync(self, verbose=False):
+        """
+        Sync every month, and drop months whose CSV no longer exists.
+        
+        Returns:
+            int: Number of months that were re-read
+        """
+        csv_files = list_month_files(self.data_dir)
+        changed = 0
+        for csv_path in csv_files:
+            waiting = self.sync_month(csv_path)
+            if waiting is not None:
+                changed += 1
+                if verbose:
+                    print(f"  ✓ {os.path.basename(csv_path)}: {waiting:,} papers without a summary")
+        present = [month_of(f) for f in csv_files]
+        with self.lock, self._transaction():
+            placeholders = ','.join('?' * len(present))
+            for table in ('items', 'files', 'month_counts'):
+                self.db.execute(f'DELETE FROM {table} WHERE month NOT IN ({placeholders})', present)
+        return changed
+    
+    def lease(self, owner, limit, lease_seconds=DEFAULT_LEASE_SECONDS, priority='digest', week=None,
+              months=None, max_attempts=DEFAULT_MAX_ATTEMPTS):
+        """
+        Take up to `limit` papers for one worker.
+        
+        Args:
+            owner (str): Worker name (e.g., hostname:pid)
+            limit (int): Maximum papers to lease
+            lease_seconds (float): How long the papers stay reserved
+            priority (str): Ordering policy (see PRIORITY_ORDER)
+            week (str): Digest week for the 'digest' policy (e.g., 2025WK46; default: current)
+            months (list): Only lease papers of these YYMM months (default: all)
+            max_attempts (int): Skip papers that already failed this many times
+        
+        Returns:
+            list: (month, paper_id) tuples in priority order
+        """
+        week_start, week_end = digest_week_range(week) if priority == 'digest' else (None, None)
+        params = {'now': time.time(), 'max_attempts': max_attempts, 'limit': limit,
+                  'week_start': week_start, 'week_end': week_end}
+        month_filter = ''
+        if months:
+            month_filter = 'AND month IN (' + ','.join(f':month{i}' for i in range(len(months))) + ')'
+            params.update({f'month{i}': month for i, month in enumerate(months)})
+        
+        with self.lock, self._transaction():
+            rows = self.db.execute(
+                f'SELECT month, paper_id FROM items '
+                f'WHERE (lease_expires IS NULL OR lease_expires < :now) AND attempts < :max_attempts {month_filter} '
+                f'ORDER BY {PRIORITY_ORDER[priority]} LIMIT :limit',
+                params
+            ).fetchall()
+            self.db.executemany(
+                'UPDATE items SET lease_owner = ?, lease_expires = ? WHERE month = ? AND paper_id = ?',
+                [(owner, params['now'] + lease_seconds, month, paper_id) for month, paper_id in rows]
+            )
+        return [tuple(row) for row in rows]
+    
+    def complete(self, month, paper_id):
+        """Remove a summarized paper from the queue."""
+        with self.lock, self._transaction():
+            self.db.execute('DELETE FROM items WHERE month = ? AND paper_id = ?', (month, paper_id))
+    
+    def fail(self, month, paper_id):
+        """Return a paper whose summarization failed, counting the attempt."""
+        with self.lock, self._transaction():
+            self.db.execute(
+                'UPDATE items SET attempts = attempts + 1, lease_owner = NULL, lease_expires = NULL '
+                'WHERE month = ? AND paper_id = ?', (month, paper_id)
+            )
+    
+    def release(self, owner):
+        """Return every paper still leased by a worker (e.g. when it stops early)."""
+        with self.lock, self._transaction():
+            self.db.execute('UPDATE items SET lease_owner = NULL, lease_expires = NULL WHERE lease_owner = ?', (owner,))
+    
+    def peek(self, limit=10, priority='digest', week=None):
+        """Return the next (month, paper_id, submitted_on) tuples a lease would take, without leasing them."""
+        week_start, week_end = digest_week_range(week) if priority == 'digest' else (None, None)
+        with self.lock:
+            rows = self.db.execute(
+                f'SELECT month, paper_id, submitted_on FROM items '
+                f'WHERE (lease_expires IS NULL OR lease_expires < :now) AND attempts < :max_attempts '
+                f'ORDER BY {PRIORITY_ORDER[priority]} LIMIT :limit',
+                {'now': time.time(), 'max_attempts': DEFAULT_MAX_ATTEMPTS, 'limit': limit,
+                 'week_start': week_start, 'week_end': week_end}
+            ).fetchall()
+        return [tuple(row) for row in rows]
+    
+    def remaining(self):
+        """Return the number of papers without a summary, from the per-month counters."""
+        with self.lock:
+            return self.db.execute('SELECT COALESCE(SUM(missing), 0) FROM month_counts').fetchone()[0]
+    
+    def status(self):
+        """
+        Summarize progress per month from the counters, without reading any month.
+        
+        Returns:
+            list: (month, papers, missing, stale) tuples, where stale means the
+                  CSV changed since the last sync (run sync() for exact numbers)
+        """
+        with self.lock:
+            counts = self.db.execute('SELECT month, papers, missing FROM month_counts ORDER BY month').fetchall()
+            files = {month: (size, mtime_ns) for month, size, mtime_ns in self.db.execute('SELECT * FROM files')}
+        status = []
+        for month, papers, missing in counts:
+            csv_path = month_file(month, self.data_dir)
+            signature = source_signature(csv_path) if os.path.isfile(csv_path) else None
+            status.append((month, papers, missing, files.get(month) != signature))
+        return status
+    
+    def failed(self, max_attempts=DEFAULT_MAX_ATTEMPTS):
+        """Return the number of papers that failed max_attempts times and are no longer leased."""
+        with self.lock:
+            return self.db.execute('SELECT COUNT(*) FROM items WHERE attempts > 0 AND attempts >= ?', (max_attempts,)).fetchone()[0]
+    
+    def leased(self):
+        """Return the number of papers currently leased by any worker."""
+        with self.lock:
+            return self.db.execute('SELECT COUNT(*) FROM items WHERE lease_expires >= ?', (time.time(),)).fetchone()[0]
+
+class _Transaction:
+    """Commit on success, roll back on error."""
+    
+    def __init__(self, db):
+        self.db = db
+    
+    def __enter__(self):
+        return self.db
+    
+    def __exit__(self, exc_type, exc, tb):
+        self.db.execute('ROLLBACK' if exc_type else 'COMMIT')
+        return False
+
+def print_status(queue):
+    """Print per-month summary progress from the queue counters (reads no month files)."""
+    status = queue.status()
+    print("=" * 80)
+    print(f"{'Month':<8} {'Papers':>10} {'Summarized':>12} {'Missing':>10} {'Done':>7}")
+    print("-" * 80)
+    for month, papers, missing, stale in status:
+        note = '  ⚠ CSV changed since last sync' if stale else ''
+        if papers < missing:
+            # Paper total not known until the month is synced
+            print(f"{month:<8} {'?':>10} {'?':>12} {missing:>10,} {'?':>7}{note}")
+            continue
+        done = (papers - missing) / papers if papers else 1.0
+        print(f"{month:<8} {papers:>10,} {papers - missing:>12,} {missing:>10,} {done:>7.1%}{note}")
+    papers = sum(row[1] for row in status)
+    missing = sum(row[2] for row in status)
+    print("-" * 80)
+    print(f"{'Total':<8} {papers:>10,} {papers - missing:>12,} {missing:>10,} "
+          f"{(papers - missing) / papers if papers else 1.0:>7.1%}")
+    print(f"Leased right now: {queue.leased():,}, given up after {DEFAULT_MAX_ATTEMPTS} failures: {queue.failed():,}")
+    print("=" * 80)
+
+def main():
+    """Sync the queue and print what is waiting."""
+    parser = argparse.ArgumentParser(description='Show the queue of papers waiting for a summary.')
+    parser.add_argument('--priority', choices=list(PRIORITY_ORDER), default='digest', help='Ordering policy (default: digest)')
+    parser.add_argument('--digest-week', help='Digest week for the digest policy (e.g., 2025WK46; default: last Friday\'s)')
+    parser.add_argument('--next', type=int, default=10, help='How many upcoming papers to list (default: 10)')
+    parser.add_argument('--status', action='store_true',
+                        help='Only print progress from the counters, without syncing or reading any month')
+    args = parser.parse_args()
+    
+    queue = EnrichmentQueue()
+    if args.status:
+        print_status(queue)
+        queue.close()
+        return
+    queue.sync(verbose=True)
+    print_status(queue)
+    
+    if args.priority == 'digest':
+        week_start, week_end = digest_week_range(args.digest_week)
+        print(f"\nDigest week: {week_start} to {week_end}")
+    print(f"Next {args.next} papers ({args.priority} order):")
+    for month, paper_id, submitted_on in queue.peek(args.next, args.priority, args.digest_week):
+        print(f"  - {paper_id} ({month}, submitted {submitted_on or 'unknown'})")
+    print("=" * 80)
+    queue.close()
+
+if __name__ == "__main__":
+    main()
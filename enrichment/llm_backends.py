@@ -0,0 +1,360 @@
+#!/usr/bin/env python3
+"""
+LLM backends for enrichment
+
+Every summarization call goes through an LLMBackend, so the model behind
+the summaries can be swapped without touching the summarizer. A backend
+implements _complete(prompt, timeout); complete() adds the timeout, retries
+with exponential backoff, and error classification shared by all of them.
+
+Backends:
+    codex-cli  `codex exec PROMPT` per call (the original behaviour, without
+               the shell in between, and with its exit status checked)
+    process    One long-lived worker process per thread, speaking JSON lines
+               on stdin/stdout: {"prompt": ...} in, {"response": ...} or
+               {"error": ...} out. The start-up cost is paid once.
+    http       OpenAI-compatible /chat/completions endpoint over a pooled
+               keep-alive session
+    stub       Deterministic local summaries built from the abstract text,
+               for testing the pipeline without any model
+
+Errors:
+    BackendError          Base class; `retryable` says whether to try again
+    BackendTimeoutError   The call took longer than the timeout (retryable)
+    BackendUnavailableError  Crash, non-zero exit, connection error, HTTP 429
+                          or 5xx (retryable)
+    BackendResponseError  Empty or unusable reply, HTTP 4xx (not retryable)
+    Errors from a command carry its `returncode` and the tail of its `stderr`.
+
+Pass metrics=EnrichmentMetrics() (enrichment_metrics.py) to any backend to
+record the latency, outcome, exit status and sizes of every attempt.
+
+Usage:
+    from llm_backends import create_backend
+    backend = create_backend('codex-cli', timeout=300)
+    print(backend.complete('Describe ...'))
+"""
+
+import hashlib
+import json
+import os
+import queue
+import re
+import shlex
+import subprocess
+import threading
+import time
+
+import requests
+from requests.adapters import HTTPAdapter
+
+DEFAULT_TIMEOUT = 300.0  # Seconds per call; codex exec can take minutes
+DEFAULT_MAX_RETRIES = 2
+DEFAULT_BACKOFF = 2.0  # Seconds before the first retry, doubled after each
+
+class BackendError(Exception):
+    """A backend call failed; returncode and stderr are set when a command failed."""
+    
+    retryable = False
+    
+    def __init__(self, message, returncode=None, stderr=None):
+        super().__init__(message)
+        self.returncode = returncode
+        self.stderr = stderr
+
+class BackendTimeoutError(BackendError):
+    """The backend did not answer within the timeout."""
+    
+    retryable = True
+
+class BackendUnavailableError(BackendError):
+    """The backend crashed, exited with an error, or could not be reached."""
+    
+    retryable = True
+
+class BackendResponseError(BackendError):
+    """The backend answered, but the reply cannot be used."""
+
+def call_outcome(error):
+    """Classify a failed call for the metrics (see enrichment_metrics.OUTCOMES)."""
+    if isinstance(error, BackendTimeoutError):
+        return 'timeout'
+    if isinstance(error, BackendUnavailableError):
+        return 'unavailable'
+    if isinstance(error, BackendResponseError):
+        return 'bad_response'
+    return 'error'
+
+class LLMBackend:
+    """
+    Base class: subclasses implement _complete() and, if they hold resources, close().
+    
+    With a metrics object (enrichment_metrics.EnrichmentMetrics), every
+    attempt is recorded with its latency, outcome and sizes.
+    """
+    
+    name = 'base'
+    runs_command = False  # Each successful call is a command that exited with status 0
+    
+    def __init__(self, timeout=DEFAULT_TIMEOUT, max_retries=DEFAULT_MAX_RETRIES, backoff=DEFAULT_BACKOFF, metrics=None):
+        self.timeout = timeout
+        self.max_retries = max_retries
+        self.backoff = backoff
+        self.metrics = metrics
+    
+    def complete(self, prompt):
+        """
+        Send a prompt and return the model's reply, retrying transient failures.
+        
+        Args:
+            prompt (str): Full prompt text
+        
+        Returns:
+            str: Reply text, stripped (never empty)
+        
+        Raises:
+            BackendError: If the call failed and retries (if any) were exhausted
+        """
+        for attempt in range(self.max_retries + 1):
+            start = time.perf_counter()
+            try:
+                try:
+                    reply = self._complete(prompt, self.timeout).strip()
+                except BackendError as e:
+                    self._record(start, call_outcome(e), prompt, error=e)
+                    raise
+                if not reply:
+                    self._record(start, 'empty', prompt)
+                    raise BackendResponseError(f"{self.name} returned an empty reply")
+                self._record(start, 'ok', prompt, reply)
+                return reply
+            except BackendError as e:
+                if not e.retryable or attempt == self.max_retries:
+                    raise
+                delay = self.backoff * 2 ** attempt
+                print(f"⚠ {self.name}: {e}; retrying in {delay:g}s ({attempt + 1}/{self.max_retries})")
+                time.sleep(delay)
+    
+    def _record(self, start, outcome, prompt, reply='', error=None):
+        if self.metrics is None:
+            return
+        message = None
+        if error is not None:
+            message = str(error)
+            if error.stderr:
+                message += f"\n{error.stderr}"
+        self.metrics.record_call(self.name, time.perf_counter() - start, outcome, len(prompt), len(reply),
+                                 returncode=error.returncode if error is not None else (0 if self.runs_command else None),
+                                 error=message)
+    
+    def _complete(self, prompt, timeout):
+        raise NotImplementedError
+    
+    def close(self):
+        """Release processes or connections held by the backend."""
+
+class CodexCliBackend(LLMBackend):
+    """Run `codex exec PROMPT` for every call."""
+    
+    name = 'codex-cli'
+    runs_command = True
+    
+    def __init__(self, command='codex exec', **kwargs):
+        super().__init__(**kwargs)
+        self.command = shlex.split(command)
+    
+    def _complete(self, prompt, timeout):
+        try:
+            result = subprocess.run(self.command + [prompt], stdin=subprocess.DEVNULL,
+                                    capture_output=True, text=True, timeout=timeout)
+        except subprocess.TimeoutExpired as e:
+            stderr = e.stderr.decode('utf-8', 'replace') if isinstance(e.stderr, bytes) else e.stderr
+            raise BackendTimeoutError(f"{self.command[0]} did not finish within {timeout:.0f}s",
+                                      stderr=stderr.strip()[-1000:] if stderr else None)
+        except OSError as e:
+            raise BackendError(f"cannot run {self.command[0]}: {e}")
+        if result.returncode != 0:
+            stderr = result.stderr.strip().splitlines()
+            detail = stderr[-1] if stderr else 'no output on stderr'
+            raise BackendUnavailableError(f"{self.command[0]} exited with status {result.returncode}: {detail}",
+                                          returncode=result.returncode, stderr='\n'.join(stderr[-10:]))
+        return result.stdout
+
+class ProcessBackend(LLMBackend):
+    """
+    Keep one worker process per thread and exchange JSON lines with it.
+    
+    A worker that times out or dies is killed and replaced on the next call.
+    """
+    
+    name = 'process'
+    
+    def __init__(self, command, **kwargs):
+        super().__init__(**kwargs)
+        self.command = shlex.split(command)
+        self.local = threading.local()
+        self.lock = threading.Lock()
+        self.workers = []
+    
+    def _start_worker(self):
+        try:
+            process = subprocess.Popen(self.command, stdin=subprocess.PIPE, stdout=subprocess.PIPE,
+                                       stderr=subprocess.DEVNULL, text=True, encoding='utf-8', bufsize=1)
+        except OSError as e:
+            raise BackendError(f"cannot run {self.command[0]}: {e}")
+        replies = queue.Queue()
+        
+        def read_replies():
+            for line in process.stdout:
+                replies.put(line)
+            replies.put(None)  # End of output: the worker exited
+        
+        threading.Thread(target=read_replies, daemon=True).start()
+        worker = (process, replies)
+        with self.lock:
+            self.workers.append(worker)
+        return worker
+    
+    def _stop_worker(self, worker):
+        process, _ = worker
+        if process.poll() is None:
+            process.kill()
+        process.wait()
+        with self.lock:
+            if worker in self.workers:
+                self.workers.remove(worker)
+        self.local.worker = None
+    
+    def _complete(self, prompt, timeout):
+        worker = getattr(self.local, 'worker', None)
+        if worker is not None and worker[0].poll() is not None:
+            self._stop_worker(worker)
+            worker = None
+        if worker is None:
+            worker = self.local.worker = self._start_worker()
+        process, replies = worker
+        
+        try:
+            process.stdin.write(json.dumps({'prompt': prompt}) + '\n')
+            process.stdin.flush()
+            line = replies.get(timeout=timeout)
+        except (BrokenPipeError, OSError):
+            self._stop_worker(worker)
+            raise BackendUnavailableError(f"{self.command[0]} worker is not accepting requests")
+        except queue.Empty:
+            self._stop_worker(worker)
+            raise BackendTimeoutError(f"{self.command[0]} worker did not answer within {timeout:.0f}s")
+        if line is None:
+            self._stop_worker(worker)
+            raise BackendUnavailableError(f"{self.command[0]} worker exited with status {process.returncode}",
+                                          returncode=process.returncode)
+        
+        try:
+            reply = json.loads(line)
+        except ValueError:
+            raise BackendResponseError(f"{self.command[0]} worker sent a line that is not JSON: {line[:80]!r}")
+        if reply.get('error'):
+            raise BackendUnavailableError(f"{self.command[0]} worker: {reply['error']}")
+        return str(reply.get('response') or '')
+    
+    def close(self):
+        with self.lock:
+            workers = list(self.workers)
+        for process, _ in workers:
+            if process.poll() is None:
+                process.stdin.close()
+                try:
+                    process.wait(timeout=5)
+                except subprocess.TimeoutExpired:
+                    process.kill()
+        with self.lock:
+            self.workers = []
+
+class HttpBackend(LLMBackend):
+    """Call an OpenAI-compatible chat completions endpoint over one keep-alive session."""
+    
+    name = 'http'
+    
+    def __init__(self, url='http://localhost:8000/v1/chat/completions', model='default',
+                 api_key_env='LLM_API_KEY', pool_size=16, **kwargs):
+        super().__init__(**kwargs)
+        self.url = url
+        self.model = model
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=pool_size)
+        self.session.mount('http://', adapter)
+        self.session.mount('https://', adapter)
+        api_key = os.environ.get(api_key_env)
+        if api_key:
+            self.session.headers['Authorization'] = f"Bearer {api_key}"
+    
+    def _complete(self, prompt, timeout):
+        payload = {'model': self.model, 'messages': [{'role': 'user', 'content': prompt}]}
+        try:
+            response = self.session.post(self.url, json=payload, timeout=timeout)
+        except requests.Timeout:
+            raise BackendTimeoutError(f"{self.url} did not answer within {timeout:.0f}s")
+        except requests.RequestException as e:
+            raise BackendUnavailableError(f"{self.url}: {e}")
+        if response.status_code == 429 or response.status_code >= 500:
+            raise BackendUnavailableError(f"{self.url} returned HTTP {response.status_code}")
+        if response.status_code >= 400:
+            raise BackendResponseError(f"{self.url} returned HTTP {response.status_code}: {response.text[:200]}")
+        try:
+            return response.json()['choices'][0]['message']['content'] or ''
+        except (ValueError, KeyError, IndexError, TypeError):
+            raise BackendResponseError(f"{self.url} returned an unexpected body: {response.text[:200]}")
+    
+    def close(self):
+        self.session.close()
+
+class StubBackend(LLMBackend):
+    """
+    Answer from the prompt itself: the first words of each abstract.
+    
+    Packed prompts (with "Paper ID" lines) get one JSON line per paper, so
+    the whole summarization pipeline can run without a model.
+    """
+    
+    name = 'stub'
+    
+    def __init__(self, words=20, delay=0.0, **kwargs):
+        super().__init__(**kwargs)
+        self.words = words
+        self.delay = delay
+    
+    def _summary(self, abstract):
+        digest = hashlib.sha256(abstract.encode('utf-8')).hexdigest()[:8]
+        return f"[stub {digest}] " + ' '.join(abstract.split()[:self.words])
+    
+    def _complete(self, prompt, timeout):
+        if self.delay:
+            time.sleep(self.delay)
+        papers = re.findall(r'^Paper (\S+)\nAbstract: "(.*?)"$', prompt, re.M | re.S)
+        if papers:
+            return '\n'.join(json.dumps({'paper_id': paper_id, 'summary': self._summary(abstract)})
+                             for paper_id, abstract in papers)
+        match = re.search(r'^Abstract: "(.*)"$', prompt, re.M | re.S)
+        return self._summary(match.group(1) if match else prompt)
+
+BACKENDS = {
+    'codex-cli': CodexCliBackend,
+    'process': ProcessBackend,
+    'http': HttpBackend,
+    'stub': StubBackend,
+}
+
+def create_backend(name, **options):
+    """
+    Create a backend by name.
+    
+    Args:
+        name (str): One of BACKENDS (codex-cli, process, http, stub)
+        **options: Constructor arguments (timeout, max_retries, command, url, ...)
+    
+    Raises:
+        ValueError: If the name is unknown
+    """
+    if name not in BACKENDS:
+        raise ValueError(f"Unknown backend '{name}' (choose from {', '.join(BACKENDS)})")
+    return BACKENDS[name](**options)
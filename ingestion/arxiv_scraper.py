@@ -11,111 +11,408 @@ This script scrapes arXiv papers and extracts metadata including:
 The data is saved to a CSV file for further analysis.
 
 Usage:
-    python arxiv_scraper.py [YYMM]
+    python arxiv_scraper.py [YYMM] [--workers N] [--rate R] [--adaptive] [--parser lxml|bs4]
     
     YYMM (optional): Year-month prefix (e.g., 2511 for November 2025)
                      If not provided, uses current year-month
+    --workers N:     Number of requests kept in flight (default: 1)
+    --rate R:        Maximum requests per second across all workers (default: 1.0)
+    --adaptive:      Raise the rate while responses are healthy and back off on
+                     429/503, Retry-After or blank pages (AIMD), starting at --rate
+                     and staying between --min-rate and --max-rate
+    --parser NAME:   HTML parser backend, lxml (fast, default) or bs4
+    --full-parse:    Download and parse non-CS pages in full instead of
+                     stopping as soon as their category is known
+    --cache:         Keep compressed raw pages in ../data/page_cache so
+                     reparse.py can rebuild the CSV without re-fetching
+    --cache-max-gb G: Page cache size cap (default: 2)
+    --flush-rows N:  Flush the CSV every N saved papers (default: 50)
+    --flush-interval T: Flush the CSV at least every T seconds (default: 30)
 """
 
 import requests
-import csv
+import argparse
 import re
+import html
 import time
-import sys
+import threading
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
 from bs4 import BeautifulSoup
-from urllib.parse import urlparse
+import lxml.html
+from page_cache import PageCache
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 import os
+import sys
+import json
 from datetime import datetime
+from email.utils import parsedate_to_datetime
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'storage'))
+from paper_index import PaperIndex
+from paper_store import month_lock, source_signature
+
+USER_AGENT = 'Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'
+REQUEST_TIMEOUT = 30  # seconds
+
+_default_session = None
+
+# HTTP statuses arXiv uses to ask clients to slow down
+THROTTLE_STATUSES = (429, 503)
+# Result yielded by fetch_in_order() for a request that stayed throttled, so
+# rate limiting is not mistaken for a missing paper
+THROTTLED = object()
+
+class ThrottledError(requests.HTTPError):
+    """Raised when arXiv answers 429 or 503; carries the Retry-After delay in seconds (or None)."""
+    
+    def __init__(self, message, retry_after=None, response=None):
+        super().__init__(message, response=response)
+        self.retry_after = retry_after
 
-def scrape_arxiv_paper(url):
+def parse_retry_after(value):
     """
-    Scrape an arXiv paper page and extract metadata.
+    Convert a Retry-After header (seconds or HTTP date) into seconds.
     
-    Args:
-        url (str): The arXiv paper URL
-        
     Returns:
-        dict: Dictionary containing extracted metadata
+        float: Delay in seconds, or None if missing or unparseable
     """
+    if not value:
+        return None
     try:
-        # Send GET request
-        headers = {
-            'User-Agent': 'Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'
-        }
-        response = requests.get(url, headers=headers)
-        response.raise_for_status()
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        retry_at = parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    return max(0.0, (retry_at - datetime.now(retry_at.tzinfo)).total_seconds())
+
+def create_session(pool_size=10, max_retries=3, backoff_factor=1.0, retry_statuses=(429, 500, 502, 503, 504)):
+    """
+    Create a pooled HTTP session for talking to arXiv.
+    
+    Connections are kept alive and reused across papers, and transient
+    errors (connection resets, 5xx, 429) are retried with exponential backoff.
+    
+    Args:
+        pool_size (int): Maximum number of pooled connections per host
+        max_retries (int): Retries per request before giving up
+        backoff_factor (float): Base delay in seconds for exponential backoff
+        retry_statuses (tuple): HTTP statuses retried inside the session; the
+                                adaptive limiter leaves 429/503 out so it can
+                                react to them itself
         
-        # Parse HTML
-        soup = BeautifulSoup(response.content, 'html.parser')
+    Returns:
+        requests.Session: Configured session
+    """
+    retry = Retry(
+        total=max_retries,
+        backoff_factor=backoff_factor,
+        status_forcelist=retry_statuses,
+        allowed_methods=('GET', 'HEAD'),
+        respect_retry_after_header=True,
+        raise_on_status=False
+    )
+    adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size, max_retries=retry)
+    
+    session = requests.Session()
+    session.headers['User-Agent'] = USER_AGENT
+    session.mount('https://', adapter)
+    session.mount('http://', adapter)
+    return session
+
+def get_default_session():
+    """Return the module-wide session, creating it on first use."""
+    global _default_session
+    if _default_session is None:
+        _default_session = create_session()
+    return _default_session
+
+def fetch_page(url, session=None, stream=False):
+    """
+    Fetch a page.
+    
+    Args:
+        url (str): Page URL
+        session (requests.Session): Session to use (default: module-wide session)
+        stream (bool): Return before the body is downloaded; the caller reads
+                       it with iter_content() and must close the response
         
-        # Extract og:title
-        og_title_tag = soup.find('meta', property='og:title')
-        og_title = og_title_tag.get('content', '') if og_title_tag else ''
+    Returns:
+        requests.Response: The successful response
         
-        # Extract original submission date from the dateline div (e.g., "[Submitted on 28 Dec 2024]")
-        submitted_on = ''
-        dateline_div = soup.find('div', class_='dateline')
-        if dateline_div:
-            dateline_text = dateline_div.get_text()
-            # Extract the original submission date using regex
-            # Format: [Submitted on 28 Dec 2024 (v1), last revised 25 Apr 2025 (this version, v2)]
-            match = re.search(r'\[Submitted on (\d{1,2} \w{3} \d{4})', dateline_text)
-            if match:
-                date_str = match.group(1)
-                # Convert to YYYY-MM-DD format
-                try:
-                    date_obj = datetime.strptime(date_str, '%d %b %Y')
-                    submitted_on = date_obj.strftime('%Y-%m-%d')
-                except ValueError:
-                    submitted_on = ''
+    Raises:
+        ThrottledError: On 429/503 responses
+        requests.RequestException: On connection errors or other HTTP error statuses
+    """
+    session = session or get_default_session()
+    response = session.get(url, timeout=REQUEST_TIMEOUT, stream=stream)
+    if response.status_code in THROTTLE_STATUSES:
+        response.close()
+        raise ThrottledError(
+            f"{response.status_code} Throttled for url: {url}",
+            retry_after=parse_retry_after(response.headers.get('Retry-After')),
+            response=response
+        )
+    try:
+        response.raise_for_status()
+    except requests.HTTPError:
+        response.close()
+        raise
+    return response
+
+def _has_class(class_name):
+    """XPath predicate matching elements whose class list contains class_name (like BeautifulSoup's class_)."""
+    return f"contains(concat(' ', normalize-space(@class), ' '), ' {class_name} ')"
+
+# XPath expressions for the lxml backend, mirroring the BeautifulSoup lookups
+_XPATH_OG_TITLE = '//meta[@property="og:title"]/@content'
+_XPATH_DATELINE = f'//div[{_has_class("dateline")}]'
+_XPATH_ABSTRACT = f'//div[@id="content-inner"]//div[@id="abs"]//blockquote[{_has_class("abstract")}]'
+_XPATH_CATEGORY = f'//div[{_has_class("leftcolumn")}]//div[{_has_class("subheader")}]//h1'
+
+def _extract_fields_bs4(content):
+    """
+    Pull the raw text fields out of a page with BeautifulSoup's html.parser.
+    
+    Returns:
+        tuple: (og_title, dateline_text, abstract_text, category_text); missing
+               elements are returned as None (og_title as '')
+    """
+    soup = BeautifulSoup(content, 'html.parser')
+    
+    # Extract og:title
+    og_title_tag = soup.find('meta', property='og:title')
+    og_title = og_title_tag.get('content', '') if og_title_tag else ''
+    
+    dateline_div = soup.find('div', class_='dateline')
+    dateline_text = dateline_div.get_text() if dateline_div else None
+    
+    abstract_text = None
+    content_inner = soup.find('div', id='content-inner')
+    if content_inner:
+        abs_div = content_inner.find('div', id='abs')
+        if abs_div:
+            abstract_blockquote = abs_div.find('blockquote', class_='abstract')
+            if abstract_blockquote:
+                abstract_text = abstract_blockquote.get_text(strip=True)
+    
+    category_text = None
+    leftcolumn = soup.find('div', class_='leftcolumn')
+    if leftcolumn:
+        subheader = leftcolumn.find('div', class_='subheader')
+        if subheader:
+            h1_tag = subheader.find('h1')
+            if h1_tag:
+                category_text = h1_tag.get_text(strip=True)
+    
+    return og_title, dateline_text, abstract_text, category_text
+
+def _extract_fields_lxml(content):
+    """
+    Pull the raw text fields out of a page with lxml and XPath.
+    
+    Produces the same values as _extract_fields_bs4() at a fraction of the
+    cost, since lxml builds its tree in C and the lookups are compiled XPath.
+    """
+    if not content or not content.strip():
+        return '', None, None, None
+    
+    tree = lxml.html.fromstring(content)
+    
+    def first(xpath):
+        matches = tree.xpath(xpath)
+        return matches[0] if matches else None
+    
+    def stripped_text(element):
+        # Equivalent of BeautifulSoup's get_text(strip=True)
+        return ''.join(text.strip() for text in element.itertext())
+    
+    og_title = first(_XPATH_OG_TITLE)
+    dateline_div = first(_XPATH_DATELINE)
+    abstract_blockquote = first(_XPATH_ABSTRACT)
+    h1_tag = first(_XPATH_CATEGORY)
+    
+    return (
+        str(og_title) if og_title is not None else '',
+        dateline_div.text_content() if dateline_div is not None else None,
+        stripped_text(abstract_blockquote) if abstract_blockquote is not None else None,
+        stripped_text(h1_tag) if h1_tag is not None else None
+    )
+
+# Available HTML parser backends, selectable with --parser
+PARSER_BACKENDS = {
+    'lxml': _extract_fields_lxml,
+    'bs4': _extract_fields_bs4,
+}
+DEFAULT_PARSER = 'lxml'
+
+def parse_paper_html(content, url, parser=DEFAULT_PARSER):
+    """
+    Extract paper metadata from the HTML of an arXiv abstract page.
+    
+    Args:
+        content (bytes): Raw page HTML
+        url (str): The arXiv paper URL
+        parser (str): Parser backend name from PARSER_BACKENDS
         
-        # Extract abstract content
-        abstract_content = ''
-        content_inner = soup.find('div', id='content-inner')
-        if content_inner:
-            abs_div = content_inner.find('div', id='abs')
-            if abs_div:
-                # Look for the abstract text (usually in a blockquote or div after the dateline)
-                abstract_blockquote = abs_div.find('blockquote', class_='abstract')
-                if abstract_blockquote:
-                    abstract_content = abstract_blockquote.get_text(strip=True)
-                    # Remove "Abstract:" prefix if present
-                    abstract_content = re.sub(r'^Abstract:\s*', '', abstract_content)
+    Returns:
+        dict: Dictionary containing extracted metadata
+    """
+    og_title, dateline_text, abstract_text, category_text = PARSER_BACKENDS[parser](content)
+    
+    # Extract original submission date from the dateline div (e.g., "[Submitted on 28 Dec 2024]")
+    submitted_on = ''
+    if dateline_text:
+        # Extract the original submission date using regex
+        # Format: [Submitted on 28 Dec 2024 (v1), last revised 25 Apr 2025 (this version, v2)]
+        match = re.search(r'\[Submitted on (\d{1,2} \w{3} \d{4})', dateline_text)
+        if match:
+            date_str = match.group(1)
+            # Convert to YYYY-MM-DD format
+            try:
+                date_obj = datetime.strptime(date_str, '%d %b %Y')
+                submitted_on = date_obj.strftime('%Y-%m-%d')
+            except ValueError:
+                submitted_on = ''
+    
+    # Extract abstract content
+    abstract_content = ''
+    if abstract_text:
+        # Remove "Abstract:" prefix if present
+        abstract_content = re.sub(r'^Abstract:\s*', '', abstract_text)
+    
+    # Extract category and subcategory from leftcolumn
+    category = ''
+    subcategory = ''
+    if category_text:
+        # Parse format like "Mathematics > Numerical Analysis"; if there is no
+        # subcategory, everything goes in category
+        category, subcategory = _split_category(category_text)
+    
+    # Extract paper ID from URL
+    paper_id = url.split('/')[-1] if '/' in url else url
+    
+    return {
+        'paper_id': paper_id,
+        'url': url,
+        'og_title': og_title,
+        'category': category,
+        'subcategory': subcategory,
+        'submitted_on': submitted_on,
+        'abstract': abstract_content,
+        'summary': '',  # Empty column to be filled later by Codex summarization
+        'scraped_at': datetime.now().isoformat()
+    }
+
+# Patterns used to spot the category while the page is still downloading
+_SUBHEADER_PATTERN = re.compile(rb'<div class="subheader">\s*<h1>(.*?)</h1>', re.DOTALL)
+_OG_TITLE_PATTERN = re.compile(rb'<meta property="og:title" content="([^"]*)"')
+STREAM_CHUNK_SIZE = 8192
+# When a page is skipped, a remainder this small is drained instead of
+# aborted, so the pooled keep-alive connection can be reused
+DRAIN_LIMIT = 16 * 1024
+
+def _split_category(category_text):
+    """Split "Mathematics > Numerical Analysis" into (category, subcategory)."""
+    if ' > ' in category_text:
+        category, subcategory = category_text.split(' > ', 1)
+        return category.strip(), subcategory.strip()
+    return category_text, ''
+
+def _read_until_category(response, keep_category, url):
+    """
+    Read a streamed response, stopping early for papers outside keep_category.
+    
+    Returns:
+        tuple: (content, skipped) where content is the full body, or None with
+               `skipped` holding a partial record if the download was cut short
+    """
+    content = bytearray()
+    searched = 0
+    for chunk in response.iter_content(STREAM_CHUNK_SIZE):
+        content += chunk
+        # Only rescan the tail, with some overlap for tags split across chunks
+        match = _SUBHEADER_PATTERN.search(content, max(0, searched - 256))
+        searched = len(content)
+        if not match:
+            continue
         
-        # Extract category and subcategory from leftcolumn
-        category = ''
-        subcategory = ''
-        leftcolumn = soup.find('div', class_='leftcolumn')
-        if leftcolumn:
-            subheader = leftcolumn.find('div', class_='subheader')
-            if subheader:
-                h1_tag = subheader.find('h1')
-                if h1_tag:
-                    category_text = h1_tag.get_text(strip=True)
-                    # Parse format like "Mathematics > Numerical Analysis"
-                    if ' > ' in category_text:
-                        parts = category_text.split(' > ', 1)
-                        category = parts[0].strip()
-                        subcategory = parts[1].strip()
-                    else:
-                        # If no subcategory, put everything in category
-                        category = category_text
+        category_text = html.unescape(re.sub(r'<[^>]+>', '', match.group(1).decode('utf-8', 'replace'))).strip()
+        category, subcategory = _split_category(category_text)
+        if category == keep_category:
+            # Wanted paper: download the rest and parse it in full
+            for rest in response.iter_content(STREAM_CHUNK_SIZE):
+                content += rest
+            return bytes(content), None
         
-        # Extract paper ID from URL
-        paper_id = url.split('/')[-1] if '/' in url else url
+        remaining = int(response.headers.get('Content-Length', 0) or 0) - response.raw.tell()
+        if 0 <= remaining <= DRAIN_LIMIT:
+            for _ in response.iter_content(STREAM_CHUNK_SIZE):
+                pass
+        response.close()
         
-        return {
-            'paper_id': paper_id,
+        title_match = _OG_TITLE_PATTERN.search(content)
+        og_title = html.unescape(title_match.group(1).decode('utf-8', 'replace')) if title_match else ''
+        return None, {
+            'paper_id': url.split('/')[-1] if '/' in url else url,
             'url': url,
             'og_title': og_title,
             'category': category,
             'subcategory': subcategory,
-            'submitted_on': submitted_on,
-            'abstract': abstract_content,
-            'summary': '',  # Empty column to be filled later by Codex summarization
+            'submitted_on': '',
+            'abstract': '',
+            'summary': '',
             'scraped_at': datetime.now().isoformat()
         }
+    
+    return bytes(content), None
+
+def scrape_arxiv_paper(url, session=None, parser=DEFAULT_PARSER, keep_category=None, page_cache=None):
+    """
+    Scrape an arXiv paper page and extract metadata.
+    
+    Args:
+        url (str): The arXiv paper URL
+        session (requests.Session): Session to use (default: module-wide session)
+        parser (str): Parser backend name from PARSER_BACKENDS
+        keep_category (str): If set (e.g. 'Computer Science'), the page is
+                             streamed and, as soon as the subheader shows a
+                             different category, the download and parse are
+                             skipped; only paper_id, url, og_title, category
+                             and subcategory are filled in for such papers
+        page_cache (PageCache): If set, fully downloaded, non-blank pages are
+                                stored so they can be re-parsed later
         
+    Returns:
+        dict: Dictionary containing extracted metadata, or None on errors
+        
+    Raises:
+        ThrottledError: If arXiv answers 429/503
+    """
+    try:
+        if keep_category:
+            response = fetch_page(url, session, stream=True)
+            try:
+                content, skipped = _read_until_category(response, keep_category, url)
+            finally:
+                response.close()
+            if skipped:
+                return skipped
+        else:
+            content = fetch_page(url, session).content
+        paper_data = parse_paper_html(content, url, parser)
+        if page_cache is not None and not is_blank_response(paper_data):
+            page_cache.put(paper_data['paper_id'], content)
+        return paper_data
+        
+    except ThrottledError:
+        # Left to the caller, which decides whether to back off and retry
+        raise
     except requests.RequestException as e:
         print(f"Error fetching URL {url}: {e}")
         return None
@@ -123,6 +420,35 @@ def scrape_arxiv_paper(url):
         print(f"Error parsing content from {url}: {e}")
         return None
 
+# CSV fieldnames, in file order
+FIELDNAMES = ['paper_id', 'url', 'og_title', 'category', 'subcategory', 'submitted_on', 'abstract', 'summary', 'scraped_at']
+
+# Columns that should have quotes (all text columns except url)
+QUOTED_COLUMNS = {'paper_id', 'og_title', 'category', 'subcategory', 'submitted_on', 'abstract', 'summary', 'scraped_at'}
+
+def format_csv_row(data):
+    """
+    Format paper metadata as one CSV line (including the trailing newline).
+    
+    Args:
+        data (dict): Paper metadata
+        
+    Returns:
+        str: CSV line
+    """
+    row_parts = []
+    for field in FIELDNAMES:
+        value = str(data.get(field, ''))
+        if field in QUOTED_COLUMNS:
+            # Escape quotes by doubling them and wrap in quotes
+            escaped_value = value.replace('"', '""')
+            row_parts.append(f'"{escaped_value}"')
+        else:
+            # URL - no quotes
+            row_parts.append(value)
+    
+    return ','.join(row_parts) + '\n'
+
 def save_to_csv(data, filename):
     """
     Save scraped data to CSV file.
@@ -133,33 +459,122 @@ def save_to_csv(data, filename):
     """
     file_exists = os.path.isfile(filename)
     
-    # Define CSV fieldnames
-    fieldnames = ['paper_id', 'url', 'og_title', 'category', 'subcategory', 'submitted_on', 'abstract', 'summary', 'scraped_at']
-    
-    # Columns that should have quotes (all text columns except url)
-    quoted_columns = {'paper_id', 'og_title', 'category', 'subcategory', 'submitted_on', 'abstract', 'summary', 'scraped_at'}
-    
     with open(filename, 'a', newline='', encoding='utf-8') as csvfile:
         # Write header if file is new
         if not file_exists:
-            csvfile.write(','.join(fieldnames) + '\n')
-        
-        # Build the CSV row manually
-        row_parts = []
-        for field in fieldnames:
-            value = str(data.get(field, ''))
-            if field in quoted_columns:
-                # Escape quotes by doubling them and wrap in quotes
-                escaped_value = value.replace('"', '""')
-                row_parts.append(f'"{escaped_value}"')
-            else:
-                # URL - no quotes
-                row_parts.append(value)
-        
-        csvfile.write(','.join(row_parts) + '\n')
+            csvfile.write(','.join(FIELDNAMES) + '\n')
+        csvfile.write(format_csv_row(data))
     
     print(f"Data saved to {filename}")
 
+class BufferedCsvWriter:
+    """
+    Long-lived CSV writer that buffers rows and flushes them in batches.
+    
+    Rows are flushed every `flush_rows` rows or `flush_interval` seconds,
+    whichever comes first. Each flush is followed by an fsync and then by the
+    optional `on_flush` callback, so anything recorded by the callback (such
+    as the resume checkpoint) never runs ahead of the data on disk. With a
+    PaperIndex, the byte offset of every flushed row is recorded in it.
+    
+    Flushes hold the month lock (paper_store.month_lock), which tools that
+    replace the CSV (summary journal compaction, reparse.py) take as well. If
+    the CSV was replaced since the last flush, the writer reopens it first,
+    so no row goes to the old, unlinked file.
+    """
+    
+    def __init__(self, filename, flush_rows=50, flush_interval=30.0, on_flush=None, index=None):
+        self.filename = filename
+        self.flush_rows = flush_rows
+        self.flush_interval = flush_interval
+        self.on_flush = on_flush
+        self.index = index
+        self.buffer = []
+        self.dirty = False
+        self.last_flush = time.monotonic()
+        self.lock = threading.Lock()
+        self.file = None
+        with month_lock(filename):
+            self._open()
+    
+    def _open(self):
+        """Open the CSV for appending, writing the header if it is new or empty. Caller holds the month lock."""
+        if self.file is not None and not self.file.closed:
+            self.file.close()
+        is_new = not os.path.isfile(self.filename) or os.path.getsize(self.filename) == 0
+        self.file = open(self.filename, 'a', newline='', encoding='utf-8')
+        if is_new:
+            self.file.write(','.join(FIELDNAMES) + '\n')
+            self.file.flush()
+    
+    def _replaced(self):
+        """Return True if the path no longer refers to the open file (e.g. it was compacted)."""
+        try:
+            stat = os.stat(self.filename)
+        except FileNotFoundError:
+            return True
+        opened = os.fstat(self.file.fileno())
+        return (stat.st_dev, stat.st_ino) != (opened.st_dev, opened.st_ino)
+    
+    def write(self, data):
+        """Buffer one paper row, flushing if the buffer is full or stale."""
+        with self.lock:
+            self.buffer.append((data['paper_id'], format_csv_row(data)))
+            self.dirty = True
+        self.tick()
+    
+    def tick(self):
+        """
+        Record that progress was made without a new row (e.g. a skipped
+        paper) and flush if the time interval has elapsed.
+        """
+        with self.lock:
+            self.dirty = True
+            due = (len(self.buffer) >= self.flush_rows or
+                   time.monotonic() - self.last_flush >= self.flush_interval)
+        if due:
+            self.flush()
+    
+    def flush(self):
+        """Write buffered rows, fsync the file and run the on_flush callback."""
+        with self.lock:
+            if self.file.closed or not self.dirty:
+                return
+            rows = len(self.buffer)
+            with month_lock(self.filename):
+                if rows:
+                    self.file.flush()
+                    if self._replaced():
+                        self._open()
+                    previous_size = os.fstat(self.file.fileno()).st_size
+                    offset = previous_size
+                    index_entries = []
+                    for paper_id, line in self.buffer:
+                        length = len(line.encode('utf-8'))
+                        index_entries.append((paper_id, offset, length))
+                        offset += length
+                    self.file.write(''.join(line for _, line in self.buffer))
+                    self.buffer.clear()
+                self.file.flush()
+                os.fsync(self.file.fileno())
+                if rows and self.index is not None:
+                    self.index.record_rows(self.filename, index_entries, previous_size)
+                # Still under the lock, so a checkpoint saved here describes
+                # the file as this flush left it
+                if self.on_flush:
+                    self.on_flush()
+            self.dirty = False
+            self.last_flush = time.monotonic()
+        if rows:
+            print(f"Flushed {rows} rows to {self.filename}")
+    
+    def close(self):
+        """Flush remaining rows and close the file. Safe to call more than once."""
+        self.flush()
+        with self.lock:
+            if not self.file.closed:
+                self.file.close()
+
 def get_max_paper_id(filename):
     """
     Get the maximum paper_id from the existing CSV file.
@@ -171,35 +586,30 @@ def get_max_paper_id(filename):
         tuple: (max_paper_number, year_month_prefix) or (0, prefix_from_filename) if no file exists
     """
     # Extract year_month prefix from filename (e.g., "2511" from "2511_arxiv_papers.csv")
-    default_prefix = filename.split('_')[0] if '_' in filename else '2511'
+    basename = os.path.basename(filename)
+    default_prefix = basename.split('_')[0] if '_' in basename else '2511'
     
     if not os.path.isfile(filename):
         print(f"No existing CSV file found. Starting from {default_prefix}.00001")
         return 0, default_prefix
     
     try:
-        paper_numbers = []
-        latest_prefix = '2511'  # default
+        # The paper ID index answers this without reading the month
+        index = PaperIndex()
+        try:
+            index.refresh_month(filename)
+            max_paper_id = index.max_paper_id(default_prefix)
+        finally:
+            index.close()
         
-        with open(filename, 'r', encoding='utf-8') as csvfile:
-            reader = csv.DictReader(csvfile)
-            
-            for row in reader:
-                paper_id = row['paper_id'].strip().strip('"')  # Remove quotes if present
-                
-                # Extract year.month and paper number from format like "2511.00010"
-                match = re.match(r'(\d{4})\.(\d{5})', paper_id)
-                if match:
-                    year_month = match.group(1)
-                    paper_num = int(match.group(2))
-                    paper_numbers.append(paper_num)
-                    latest_prefix = year_month  # Keep track of the latest prefix
-        
-        if not paper_numbers:
+        # Extract year.month and paper number from format like "2511.00010"
+        match = re.match(r'(\d{4})\.(\d{5})', max_paper_id or '')
+        if not match:
             print(f"No valid paper IDs found. Starting from {default_prefix}.00001")
             return 0, default_prefix
         
-        max_paper_num = max(paper_numbers)
+        latest_prefix = match.group(1)
+        max_paper_num = int(match.group(2))
         print(f"Found maximum paper ID: {latest_prefix}.{max_paper_num:05d}")
         return max_paper_num, latest_prefix
         
@@ -207,6 +617,78 @@ def get_max_paper_id(filename):
         print(f"Error reading CSV file: {e}. Starting from {default_prefix}.00001")
         return 0, default_prefix
 
+def get_checkpoint_path(csv_filename):
+    """Return the checkpoint sidecar path for a month CSV (e.g. 2511_arxiv_papers.checkpoint.json)."""
+    return os.path.splitext(csv_filename)[0] + '.checkpoint.json'
+
+def load_checkpoint(csv_filename, max_stored_num=None):
+    """
+    Load the resume checkpoint stored next to a month CSV.
+    
+    The checkpoint records the size and modification time the CSV had when
+    it was saved. Journal compaction, reparse.py and oai_harvester.py all
+    change the CSV legitimately, so a different signature alone does not
+    invalidate it. The checkpoint is ignored only if the CSV shrank or no
+    longer reaches the last paper the scraper saved (e.g. it was restored
+    from an older backup).
+    
+    Args:
+        csv_filename (str): CSV filename
+        max_stored_num (int): Highest paper number now in the CSV, if known
+        
+    Returns:
+        dict: Checkpoint with 'year_month_prefix', 'last_paper_num' and counters,
+              or None if there is no readable checkpoint consistent with the CSV
+    """
+    checkpoint_path = get_checkpoint_path(csv_filename)
+    if not os.path.isfile(checkpoint_path):
+        return None
+    
+    try:
+        with open(checkpoint_path, 'r', encoding='utf-8') as f:
+            checkpoint = json.load(f)
+        int(checkpoint['last_paper_num'])
+    except (OSError, ValueError, KeyError, TypeError) as e:
+        print(f"Ignoring unreadable checkpoint {checkpoint_path}: {e}")
+        return None
+    
+    try:
+        signature = list(source_signature(csv_filename))
+    except OSError:
+        signature = None
+    saved_signature = checkpoint.get('csv_signature')
+    if saved_signature is None or signature == saved_signature:
+        return checkpoint
+    if signature is None or signature[0] < saved_signature[0]:
+        print(f"Ignoring checkpoint {checkpoint_path}: the CSV shrank since it was written")
+        return None
+    if max_stored_num is not None and max_stored_num < checkpoint.get('last_saved_num', 0):
+        print(f"Ignoring checkpoint {checkpoint_path}: the CSV no longer contains the papers it covers")
+        return None
+    return checkpoint
+
+def save_checkpoint(csv_filename, checkpoint):
+    """
+    Atomically write the resume checkpoint for a month CSV.
+    
+    The checkpoint is written to a temporary file in the same directory and
+    renamed over the old one, so a crash never leaves a half-written file.
+    The CSV's current (size, mtime_ns) is stored with it for load_checkpoint().
+    
+    Args:
+        csv_filename (str): CSV filename
+        checkpoint (dict): Checkpoint data
+    """
+    checkpoint_path = get_checkpoint_path(csv_filename)
+    checkpoint = dict(checkpoint, csv_signature=list(source_signature(csv_filename)),
+                      updated_at=datetime.now().isoformat())
+    tmp_path = checkpoint_path + '.tmp'
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(checkpoint, f, indent=2)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_path, checkpoint_path)
+
 def get_year_month_prefix():
     """
     Get the current year-month prefix (e.g., '2511' for November 2025).
@@ -219,24 +701,232 @@ def get_year_month_prefix():
     month = now.month
     return f"{year:02d}{month:02d}"
 
-def main():
-    """Main function to scrape multiple arXiv papers starting from the maximum existing paper_id."""
-    # Check if year_month prefix is provided as command-line argument
-    if len(sys.argv) > 1:
-        year_month_prefix = sys.argv[1]
-        print(f"Using provided year-month prefix: {year_month_prefix}")
-    else:
-        year_month_prefix = get_year_month_prefix()
-        print(f"Using current year-month prefix: {year_month_prefix}")
+def is_blank_response(paper_data):
+    """Return True for pages with neither title nor category (arXiv's rate-limiting signature)."""
+    return not paper_data['og_title'].strip() and not paper_data['category'].strip()
+
+class TokenBucket:
+    """
+    Thread-safe token bucket shared by all fetch workers.
+    
+    Tokens refill continuously at `rate` per second up to `capacity`, so the
+    overall request rate stays bounded no matter how many workers are running.
+    """
+    
+    def __init__(self, rate, capacity=1):
+        self.rate = float(rate)
+        self.capacity = float(capacity)
+        self.tokens = float(capacity)
+        self.last_refill = time.monotonic()
+        self.lock = threading.Lock()
+    
+    def acquire(self):
+        """Block until a token is available, then consume it."""
+        while True:
+            with self.lock:
+                now = time.monotonic()
+                self.tokens = min(self.capacity, self.tokens + (now - self.last_refill) * self.rate)
+                self.last_refill = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                wait = (1 - self.tokens) / self.rate
+            time.sleep(wait)
+
+class AdaptiveRateLimiter(TokenBucket):
+    """
+    Token bucket whose rate follows an AIMD (additive increase, multiplicative
+    decrease) controller.
+    
+    Every healthy response raises the rate by `increase` requests/second up to
+    `max_rate`. A throttling signal (HTTP 429/503 or a blank page) multiplies
+    the rate by `decrease`, down to `min_rate`, and honours Retry-After by
+    pausing all workers. The throttled request is then retried, up to
+    `max_retries` times, instead of counting as a failure.
+    """
+    
+    def __init__(self, rate, min_rate=0.1, max_rate=10.0, increase=0.05, decrease=0.5, max_retries=8):
+        super().__init__(rate)
+        self.min_rate = min_rate
+        self.max_rate = max_rate
+        self.increase = increase
+        self.decrease = decrease
+        self.max_retries = max_retries
+        self.paused_until = 0.0
+        self.last_decrease = 0.0
+    
+    def acquire(self):
+        """Wait out any Retry-After pause, then take a token."""
+        while True:
+            with self.lock:
+                wait = self.paused_until - time.monotonic()
+            if wait <= 0:
+                break
+            time.sleep(wait)
+        super().acquire()
+    
+    def on_success(self):
+        """Additive increase after a healthy response."""
+        with self.lock:
+            self.rate = min(self.max_rate, self.rate + self.increase)
+    
+    def on_throttle(self, retry_after=None):
+        """
+        Multiplicative decrease after a throttling signal.
+        
+        Requests already in flight when the rate was cut tend to be throttled
+        too, so further decreases within one request interval are ignored.
+        
+        Args:
+            retry_after (float): Seconds the server asked us to wait, if any
+        """
+        with self.lock:
+            now = time.monotonic()
+            if retry_after:
+                self.paused_until = max(self.paused_until, now + retry_after)
+            if now - self.last_decrease < 1.0 / self.rate:
+                return
+            self.rate = max(self.min_rate, self.rate * self.decrease)
+            self.tokens = 0.0
+            self.last_decrease = now
+        print(f"⚠ Throttled, slowing down to {self.rate:.2f} requests/second"
+              + (f" after a {retry_after:.0f}s pause" if retry_after else ""))
+
+def fetch_in_order(paper_nums, base_url, workers=1, rate_limiter=None, fetch=scrape_arxiv_paper):
+    """
+    Fetch papers concurrently while yielding results in ID order.
+    
+    At most `workers * 2` requests are queued ahead of the consumer, so
+    stopping early (breaking out of the loop) only wastes a few requests.
+    
+    Args:
+        paper_nums (iterable): Paper numbers to fetch, in order
+        base_url (str): URL template with a single format slot for the number
+        workers (int): Number of concurrent requests
+        rate_limiter (TokenBucket): Shared limiter, or None for no limit; an
+                                    AdaptiveRateLimiter also gets feedback and
+                                    retries throttled requests
+        fetch (callable): Function mapping a URL to paper data (or None),
+                          e.g. scrape_arxiv_paper bound to a session
+        
+    Yields:
+        tuple: (paper_num, url, paper_data) where paper_data is None for a
+               failed request, or THROTTLED if arXiv still answered 429/503
+               after the retries
+    """
+    # Limiters with AIMD feedback (AdaptiveRateLimiter) retry throttled requests
+    adaptive = hasattr(rate_limiter, 'on_throttle')
+    max_retries = rate_limiter.max_retries if adaptive else 0
+    
+    def limited_fetch(url):
+        for attempt in range(max_retries + 1):
+            if rate_limiter:
+                rate_limiter.acquire()
+            try:
+                paper_data = fetch(url)
+            except ThrottledError as e:
+                if not adaptive or attempt == max_retries:
+                    print(f"Error fetching URL {url}: {e}")
+                    return THROTTLED
+                rate_limiter.on_throttle(e.retry_after)
+                continue
+            
+            if adaptive and paper_data:
+                if not is_blank_response(paper_data):
+                    rate_limiter.on_success()
+                elif attempt < max_retries:
+                    rate_limiter.on_throttle()
+                    continue
+            return paper_data
+    
+    executor = ThreadPoolExecutor(max_workers=workers)
+    pending = deque()
+    nums = iter(paper_nums)
+    
+    def submit_next():
+        for paper_num in nums:
+            url = base_url.format(paper_num)
+            pending.append((paper_num, url, executor.submit(limited_fetch, url)))
+            return
+    
+    try:
+        for _ in range(workers * 2):
+            submit_next()
+        while pending:
+            paper_num, url, future = pending.popleft()
+            paper_data = future.result()
+            submit_next()
+            yield paper_num, url, paper_data
+    finally:
+        for _, _, future in pending:
+            future.cancel()
+        executor.shutdown(wait=True)
+
+def parse_args():
+    """Parse command-line arguments."""
+    parser = argparse.ArgumentParser(description='Scrape Computer Science papers from arXiv.')
+    parser.add_argument('year_month_prefix', nargs='?', help='Year-month prefix (e.g., 2511)')
+    parser.add_argument('--workers', type=int, default=1, help='Number of requests kept in flight (default: 1)')
+    parser.add_argument('--rate', type=float, default=1.0, help='Maximum requests per second (default: 1.0)')
+    parser.add_argument('--adaptive', action='store_true',
+                        help='Adjust the rate automatically (AIMD), starting at --rate')
+    parser.add_argument('--min-rate', type=float, default=0.1, help='Lowest adaptive rate (default: 0.1)')
+    parser.add_argument('--max-rate', type=float, default=10.0, help='Highest adaptive rate (default: 10.0)')
+    parser.add_argument('--parser', choices=sorted(PARSER_BACKENDS), default=DEFAULT_PARSER,
+                        help=f'HTML parser backend (default: {DEFAULT_PARSER})')
+    parser.add_argument('--full-parse', action='store_true',
+                        help='Download and parse every page, even non-CS ones')
+    parser.add_argument('--cache', action='store_true',
+                        help='Keep raw pages in ../data/page_cache for reparse.py')
+    parser.add_argument('--cache-max-gb', type=float, default=2.0, help='Page cache size cap in GB (default: 2)')
+    parser.add_argument('--flush-rows', type=int, default=50, help='Flush the CSV every N saved papers (default: 50)')
+    parser.add_argument('--flush-interval', type=float, default=30.0, help='Flush the CSV at least every T seconds (default: 30)')
+    args = parser.parse_args()
+    if args.workers <= 0 or args.rate <= 0:
+        parser.error('--workers and --rate must be positive')
+    return args
+
+def scrape_month(year_month_prefix, workers=1, rate_limiter=None, parser=DEFAULT_PARSER,
+                 full_parse=False, flush_rows=50, flush_interval=30.0, verbose=True, page_cache=None):
+    """
+    Scrape one month of arXiv IDs, resuming from its checkpoint.
+    
+    Args:
+        year_month_prefix (str): Year-month prefix (e.g., 2511)
+        workers (int): Number of requests kept in flight
+        rate_limiter: Object with an acquire() method (e.g. TokenBucket), or None
+        parser (str): Parser backend name from PARSER_BACKENDS
+        full_parse (bool): Parse non-CS pages in full instead of stopping early
+        flush_rows (int): Flush the CSV every N saved papers
+        flush_interval (float): Flush the CSV at least every T seconds
+        verbose (bool): Print a block per paper (otherwise only the summary)
+        page_cache (PageCache): Optional raw-page cache to fill while scraping
+        
+    Returns:
+        dict: Run statistics ('saved', 'skipped', 'failed', 'processed',
+              'already_stored', 'last_paper_num', 'elapsed', 'stop_reason',
+              ...); stop_reason is 'end_of_papers', 'rate_limited',
+              'range_exhausted' or 'interrupted'
+    """
+    log = print if verbose else (lambda *args, **kwargs: None)
     
     # Construct filename based on year_month prefix - save to data folder
     csv_filename = f"../data/{year_month_prefix}_arxiv_papers.csv"
     print(f"CSV file: {csv_filename}")
     
-    # Get the maximum paper_id from existing CSV
-    max_paper_num, detected_prefix = get_max_paper_id(csv_filename)
-    # Get the maximum paper_id from existing CSV
-    max_paper_num, detected_prefix = get_max_paper_id(csv_filename)
+    # Resume after the later of the checkpoint, which also covers skipped non-CS
+    # papers that never appear in the CSV, and the highest stored ID, which
+    # covers rows other tools (oai_harvester.py) added since
+    max_stored_num, detected_prefix = get_max_paper_id(csv_filename)
+    checkpoint = load_checkpoint(csv_filename, max_stored_num)
+    if checkpoint:
+        max_paper_num = max(int(checkpoint['last_paper_num']), max_stored_num)
+        detected_prefix = checkpoint.get('year_month_prefix', detected_prefix)
+        print(f"Resuming from checkpoint: {detected_prefix}.{max_paper_num:05d}")
+    else:
+        max_paper_num = max_stored_num
+        checkpoint = {'year_month_prefix': detected_prefix, 'last_paper_num': max_paper_num,
+                      'saved': 0, 'skipped': 0, 'failed': 0}
     
     # Use the detected prefix from file content if available, otherwise use the one from filename
     if detected_prefix != year_month_prefix and max_paper_num > 0:
@@ -249,6 +939,7 @@ def main():
     base_url = f"https://arxiv.org/abs/{year_month_prefix}.{{:05d}}"
     
     print(f"Scraping arXiv papers from {year_month_prefix}.{start_id:05d} to {year_month_prefix}.{end_id:05d}")
+    print(f"Workers: {workers}, parser: {parser}")
     print("=" * 80)
     
     successful_scrapes = 0
@@ -257,68 +948,192 @@ def main():
     consecutive_blank_responses = 0
     max_consecutive_failures = 3
     max_consecutive_blanks = 3
+    failures_since_checkpoint = 0
     
-    for paper_num in range(start_id, end_id + 1):
-        url = base_url.format(paper_num)
-        print(f"\n[{paper_num - start_id + 1}/{end_id - start_id + 1}] Scraping: {url}")
-        
-        # Scrape the paper
-        paper_data = scrape_arxiv_paper(url)
-        
-        if paper_data:
-            # Check if response is blank (rate limiting detected)
-            is_blank = (not paper_data['og_title'].strip() and 
-                       not paper_data['category'].strip())
+    # Rows are buffered; the checkpoint is saved after each flush so it never
+    # points past data that is not on disk yet, and flushed rows are added
+    # to the paper ID index
+    index = PaperIndex()
+    writer = BufferedCsvWriter(
+        csv_filename,
+        flush_rows=flush_rows,
+        flush_interval=flush_interval,
+        on_flush=lambda: save_checkpoint(csv_filename, checkpoint),
+        index=index
+    )
+    
+    # Results arrive in ID order regardless of which request finished first,
+    # so the blank and failure counters below see the same sequence as a serial run
+    if hasattr(rate_limiter, 'on_throttle'):
+        # Let 429/503 reach the adaptive limiter instead of retrying them blindly
+        session = create_session(pool_size=workers, retry_statuses=(500, 502, 504))
+    else:
+        session = create_session(pool_size=workers)
+    keep_category = None if full_parse else 'Computer Science'
+    fetch = partial(scrape_arxiv_paper, session=session, parser=parser,
+                    keep_category=keep_category, page_cache=page_cache)
+    
+    # IDs already stored in any month (e.g. a late listing filed under the
+    # next month) are not requested again
+    index.refresh()
+    already_stored = 0
+    
+    def unstored_paper_nums():
+        nonlocal already_stored
+        for paper_num in range(start_id, end_id + 1):
+            if index.contains(f"{year_month_prefix}.{paper_num:05d}"):
+                already_stored += 1
+                continue
+            yield paper_num
+    
+    papers = fetch_in_order(unstored_paper_nums(), base_url, workers, rate_limiter, fetch)
+    started = time.monotonic()
+    processed = 0
+    stop_reason = 'range_exhausted'
+    
+    try:
+        for paper_num, url, paper_data in papers:
+            processed += 1
+            log(f"\n[{paper_num - start_id + 1}/{end_id - start_id + 1}] Scraping: {url}")
             
-            if is_blank:
+            if paper_data is THROTTLED:
+                # Counted with blank responses: both mean arXiv is rate limiting us
                 consecutive_blank_responses += 1
-                print(f"⚠ Warning - Blank response detected (possible rate limiting)")
-                print(f"  Consecutive blank responses: {consecutive_blank_responses}/{max_consecutive_blanks}")
+                failed_scrapes += 1
+                failures_since_checkpoint += 1
+                log(f"⚠ Warning - Still throttled (429/503) after retries")
+                log(f"  Consecutive rate-limited responses: {consecutive_blank_responses}/{max_consecutive_blanks}")
                 
-                # Stop if we hit max consecutive blank responses
                 if consecutive_blank_responses >= max_consecutive_blanks:
-                    print(f"\n⚠ STOPPING: {max_consecutive_blanks} consecutive blank responses detected.")
-                    print(f"ArXiv may be rate limiting requests. Please wait before resuming.")
+                    print(f"\n⚠ STOPPING: {max_consecutive_blanks} consecutive rate-limited responses.")
+                    print(f"ArXiv is rate limiting requests. Please wait before resuming.")
                     print(f"Last processed paper: {year_month_prefix}.{paper_num:05d}")
+                    stop_reason = 'rate_limited'
                     break
-            else:
-                consecutive_blank_responses = 0  # Reset blank counter on valid response
-                consecutive_failures = 0  # Reset failure counter on success
-                
-                print(f"✓ Success - Title: {paper_data['og_title'][:80]}..." if len(paper_data['og_title']) > 80 else f"✓ Success - Title: {paper_data['og_title']}")
-                print(f"  Category: {paper_data['category']}" + (f" > {paper_data['subcategory']}" if paper_data['subcategory'] else ""))
-                print(f"  Submitted: {paper_data['submitted_on']}")
+            elif paper_data:
+                # Check if response is blank (rate limiting detected)
+                is_blank = is_blank_response(paper_data)
                 
-                # Only save to CSV if category is Computer Science
-                if paper_data['category'] == 'Computer Science':
-                    save_to_csv(paper_data, csv_filename)
-                    print(f"  → Saved to CSV (Computer Science paper)")
-                    successful_scrapes += 1
+                if is_blank:
+                    consecutive_blank_responses += 1
+                    log(f"⚠ Warning - Blank response detected (possible rate limiting)")
+                    log(f"  Consecutive blank responses: {consecutive_blank_responses}/{max_consecutive_blanks}")
+                    
+                    # Stop if we hit max consecutive blank responses
+                    if consecutive_blank_responses >= max_consecutive_blanks:
+                        print(f"\n⚠ STOPPING: {max_consecutive_blanks} consecutive blank responses detected.")
+                        print(f"ArXiv may be rate limiting requests. Please wait before resuming.")
+                        print(f"Last processed paper: {year_month_prefix}.{paper_num:05d}")
+                        stop_reason = 'rate_limited'
+                        break
                 else:
-                    print(f"  → Skipped (Not Computer Science)")
-        else:
-            consecutive_blank_responses = 0  # Reset blank counter on HTTP errors
-            print(f"✗ Failed to scrape paper {url}")
-            failed_scrapes += 1
-            consecutive_failures += 1
-            
-            # Stop if we hit max consecutive failures
-            if consecutive_failures >= max_consecutive_failures:
-                print(f"\n⚠ Stopping: {max_consecutive_failures} consecutive failures detected.")
-                print(f"Likely reached the end of available papers at {year_month_prefix}.{paper_num:05d}")
-                break
-        
-        # Add a small delay to be respectful to the server
-        time.sleep(1)
+                    consecutive_blank_responses = 0  # Reset blank counter on valid response
+                    consecutive_failures = 0  # Reset failure counter on success
+                    
+                    log(f"✓ Success - Title: {paper_data['og_title'][:80]}..." if len(paper_data['og_title']) > 80 else f"✓ Success - Title: {paper_data['og_title']}")
+                    log(f"  Category: {paper_data['category']}" + (f" > {paper_data['subcategory']}" if paper_data['subcategory'] else ""))
+                    log(f"  Submitted: {paper_data['submitted_on']}")
+                    
+                    # Advance the checkpoint before buffering the row, so a flush
+                    # triggered by this write records this ID as done
+                    checkpoint['failed'] = checkpoint.get('failed', 0) + failures_since_checkpoint
+                    failures_since_checkpoint = 0
+                    checkpoint['year_month_prefix'] = year_month_prefix
+                    checkpoint['last_paper_num'] = paper_num
+                    
+                    # Only save to CSV if category is Computer Science
+                    if paper_data['category'] == 'Computer Science':
+                        checkpoint['saved'] = checkpoint.get('saved', 0) + 1
+                        checkpoint['last_saved_num'] = paper_num
+                        writer.write(paper_data)
+                        log(f"  → Saved to CSV (Computer Science paper)")
+                        successful_scrapes += 1
+                    else:
+                        checkpoint['skipped'] = checkpoint.get('skipped', 0) + 1
+                        writer.tick()
+                        log(f"  → Skipped (Not Computer Science)")
+            else:
+                consecutive_blank_responses = 0  # Reset blank counter on HTTP errors
+                log(f"✗ Failed to scrape paper {url}")
+                failed_scrapes += 1
+                consecutive_failures += 1
+                failures_since_checkpoint += 1
+                
+                # Stop if we hit max consecutive failures
+                if consecutive_failures >= max_consecutive_failures:
+                    print(f"\n⚠ Stopping: {max_consecutive_failures} consecutive failures detected.")
+                    print(f"Likely reached the end of available papers at {year_month_prefix}.{paper_num:05d}")
+                    stop_reason = 'end_of_papers'
+                    break
+    except KeyboardInterrupt:
+        stop_reason = 'interrupted'
+        raise
+    finally:
+        # Also runs on Ctrl+C (KeyboardInterrupt), so buffered rows are not lost
+        papers.close()
+        session.close()
+        writer.close()
+        index.close()
     
+    elapsed = time.monotonic() - started
     print("\n" + "=" * 80)
     print(f"Scraping completed!")
     print(f"Computer Science papers saved: {successful_scrapes}")
     print(f"Failed to scrape: {failed_scrapes}")
     print(f"Total papers processed: {successful_scrapes + failed_scrapes}")
+    if already_stored:
+        print(f"Already stored (not requested): {already_stored}")
     
     if successful_scrapes > 0:
         print(f"\nComputer Science papers saved to {csv_filename}")
+    
+    return {
+        'year_month_prefix': year_month_prefix,
+        'saved': successful_scrapes,
+        'skipped': processed - successful_scrapes - failed_scrapes,
+        'failed': failed_scrapes,
+        'processed': processed,
+        'already_stored': already_stored,
+        'last_paper_num': checkpoint['last_paper_num'],
+        'elapsed': elapsed,
+        'stop_reason': stop_reason
+    }
+
+def main():
+    """Main function to scrape multiple arXiv papers starting from the maximum existing paper_id."""
+    args = parse_args()
+    
+    # Check if year_month prefix is provided as command-line argument
+    if args.year_month_prefix:
+        year_month_prefix = args.year_month_prefix
+        print(f"Using provided year-month prefix: {year_month_prefix}")
+    else:
+        year_month_prefix = get_year_month_prefix()
+        print(f"Using current year-month prefix: {year_month_prefix}")
+    
+    if args.adaptive:
+        rate_limiter = AdaptiveRateLimiter(args.rate, min_rate=args.min_rate, max_rate=args.max_rate)
+        print(f"Adaptive rate limit: starting at {args.rate:g}, between {args.min_rate:g} and {args.max_rate:g} requests/second")
+    else:
+        rate_limiter = TokenBucket(args.rate)
+        print(f"Rate limit: {args.rate:g} requests/second")
+    
+    stats = scrape_month(
+        year_month_prefix,
+        workers=args.workers,
+        rate_limiter=rate_limiter,
+        parser=args.parser,
+        full_parse=args.full_parse,
+        flush_rows=args.flush_rows,
+        flush_interval=args.flush_interval,
+        page_cache=PageCache(max_bytes=int(args.cache_max_gb * 1024 ** 3)) if args.cache else None
+    )
+    
+    # Embed the new papers, if an embedding index has been built (storage/embedding_index.py)
+    if stats['saved']:
+        # Imported here: the embedding code (NumPy, optional models) is not needed for scraping itself
+        from embedding_index import update_embeddings
+        update_embeddings()
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    main()
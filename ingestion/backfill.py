@@ -0,0 +1,241 @@
+#!/usr/bin/env python3
+"""
+Multi-month backfill for the arXiv scraper
+
+Scrapes a range of months in parallel. Each month (its own ID space, CSV
+file and checkpoint) is a shard handled by one worker process, and all
+processes draw from a single shared rate budget, so running more months at
+once never means hitting arXiv harder than --rate.
+
+Per-month progress is recorded in ../data/backfill_state.json. Interrupting
+(Ctrl+C) flushes every shard's buffered rows and checkpoint; running the
+same command again skips finished months and resumes the others. If a shard
+fails (including a worker process dying), the remaining results are still
+recorded and the command exits with status 1.
+
+Usage:
+    python backfill.py START END [--processes N] [--rate R] [--workers-per-month W]
+    
+    START, END:            First and last year-month prefix, inclusive (e.g., 2501 2512)
+    --processes N:         Months scraped at the same time (default: 4)
+    --rate R:              Total requests per second across all months (default: 1.0)
+    --workers-per-month W: Requests kept in flight per month (default: 1)
+    --rescan:              Also revisit months already marked as done
+"""
+
+import argparse
+import json
+import multiprocessing
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from concurrent.futures.process import BrokenProcessPool
+from datetime import datetime
+
+from arxiv_scraper import DEFAULT_PARSER, PARSER_BACKENDS, scrape_month
+
+STATE_FILE = '../data/backfill_state.json'
+
+class SharedTokenBucket:
+    """
+    Token bucket whose state lives in shared memory.
+    
+    Same interface as arxiv_scraper.TokenBucket, but one instance created in
+    the parent process limits the combined request rate of all workers.
+    """
+    
+    def __init__(self, rate, capacity=1):
+        self.rate = float(rate)
+        self.capacity = float(capacity)
+        # [tokens, last_refill]; time.monotonic() is system-wide, so the
+        # timestamps are comparable between processes
+        self.state = multiprocessing.Array('d', [float(capacity), time.monotonic()])
+    
+    def acquire(self):
+        """Block until a token is available, then consume it."""
+        while True:
+            with self.state.get_lock():
+                now = time.monotonic()
+                tokens = min(self.capacity, self.state[0] + (now - self.state[1]) * self.rate)
+                self.state[1] = now
+                if tokens >= 1:
+                    self.state[0] = tokens - 1
+                    return
+                self.state[0] = tokens
+                wait = (1 - tokens) / self.rate
+            time.sleep(wait)
+
+# Set in each worker process by _init_worker
+_rate_limiter = None
+
+def _init_worker(rate_limiter):
+    """Process pool initializer: keep the shared rate limiter for this worker."""
+    global _rate_limiter
+    _rate_limiter = rate_limiter
+
+def _run_shard(year_month_prefix, options):
+    """
+    Scrape one month inside a worker process.
+    
+    Returns:
+        dict: Statistics from scrape_month(), or an 'interrupted'/'error' record
+    """
+    try:
+        return scrape_month(year_month_prefix, rate_limiter=_rate_limiter, verbose=False, **options)
+    except KeyboardInterrupt:
+        # scrape_month() has already flushed the CSV and checkpoint
+        return {'year_month_prefix': year_month_prefix, 'stop_reason': 'interrupted'}
+    except Exception as e:
+        return {'year_month_prefix': year_month_prefix, 'stop_reason': 'error', 'error': str(e)}
+
+def month_range(start, end):
+    """
+    List year-month prefixes from start to end, inclusive.
+    
+    Args:
+        start (str): First prefix (e.g., 2501)
+        end (str): Last prefix (e.g., 2512)
+    
+    Returns:
+        list: Prefixes such as ['2501', '2502', ...]
+    """
+    year, month = int(start[:2]), int(start[2:])
+    end_year, end_month = int(end[:2]), int(end[2:])
+    months = []
+    while (year, month) <= (end_year, end_month):
+        months.append(f"{year:02d}{month:02d}")
+        month += 1
+        if month > 12:
+            year, month = year + 1, 1
+    return months
+
+def load_state():
+    """Load per-month backfill progress (empty dict if none saved)."""
+    if not os.path.isfile(STATE_FILE):
+        return {}
+    with open(STATE_FILE, 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+def save_state(state):
+    """Atomically write per-month backfill progress."""
+    tmp_path = STATE_FILE + '.tmp'
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(state, f, indent=2)
+    os.replace(tmp_path, STATE_FILE)
+
+def record_result(state, result):
+    """Store one shard's result in the backfill state and save it."""
+    month = result['year_month_prefix']
+    done = result.get('stop_reason') == 'end_of_papers'
+    state[month] = dict(result, status='done' if done else 'incomplete', updated_at=datetime.now().isoformat())
+    save_state(state)
+
+def print_summary(months, results):
+    """Print throughput and failures per shard."""
+    print("\n" + "=" * 80)
+    print("BACKFILL SUMMARY")
+    print("=" * 80)
+    print(f"{'Month':<8} {'Status':<16} {'Saved':>8} {'Skipped':>8} {'Failed':>7} {'Req/s':>7} {'Elapsed':>9}")
+    print("-" * 80)
+    totals = {'saved': 0, 'skipped': 0, 'failed': 0, 'processed': 0}
+    for month in months:
+        result = results.get(month)
+        if result is None:
+            print(f"{month:<8} {'not run':<16}")
+            continue
+        elapsed = result.get('elapsed', 0)
+        throughput = result.get('processed', 0) / elapsed if elapsed else 0
+        print(f"{month:<8} {result.get('stop_reason', ''):<16} {result.get('saved', 0):>8,} "
+              f"{result.get('skipped', 0):>8,} {result.get('failed', 0):>7,} {throughput:>7.2f} {elapsed:>8.0f}s")
+        if result.get('error'):
+            print(f"         ✗ {result['error']}")
+        for key in totals:
+            totals[key] += result.get(key, 0)
+    print("=" * 80)
+    print(f"{'TOTAL':<8} {'':<16} {totals['saved']:>8,} {totals['skipped']:>8,} {totals['failed']:>7,}")
+    print(f"Total requests: {totals['processed']:,}")
+
+def main():
+    """Backfill a range of months in parallel under one rate budget."""
+    parser = argparse.ArgumentParser(description='Scrape a range of months in parallel.')
+    parser.add_argument('start', help='First year-month prefix (e.g., 2501)')
+    parser.add_argument('end', help='Last year-month prefix, inclusive (e.g., 2512)')
+    parser.add_argument('--processes', type=int, default=4, help='Months scraped at the same time (default: 4)')
+    parser.add_argument('--rate', type=float, default=1.0, help='Total requests per second (default: 1.0)')
+    parser.add_argument('--workers-per-month', type=int, default=1, help='Requests in flight per month (default: 1)')
+    parser.add_argument('--parser', choices=sorted(PARSER_BACKENDS), default=DEFAULT_PARSER,
+                        help=f'HTML parser backend (default: {DEFAULT_PARSER})')
+    parser.add_argument('--rescan', action='store_true', help='Also revisit months already marked as done')
+    args = parser.parse_args()
+    
+    months = month_range(args.start, args.end)
+    state = load_state()
+    pending = [m for m in months if args.rescan or state.get(m, {}).get('status') != 'done']
+    
+    print(f"Backfill {args.start} to {args.end}: {len(months)} months, {len(pending)} to scrape")
+    for month in months:
+        if month not in pending:
+            print(f"  ✓ {month} already done")
+    if not pending:
+        return
+    print(f"Processes: {args.processes}, total rate limit: {args.rate:g} requests/second")
+    print("=" * 80)
+    
+    options = {'workers': args.workers_per_month, 'parser': args.parser}
+    rate_limiter = SharedTokenBucket(args.rate)
+    results = {}
+    executor = ProcessPoolExecutor(
+        max_workers=min(args.processes, len(pending)),
+        initializer=_init_worker,
+        initargs=(rate_limiter,)
+    )
+    futures = {executor.submit(_run_shard, month, options): month for month in pending}
+    
+    try:
+        for future in as_completed(futures):
+            month = futures[future]
+            try:
+                result = future.result()
+            except BrokenProcessPool as e:
+                # A worker died (killed, out of memory, crash); the pool fails every
+                # month still in it, and each resumes from its checkpoint next run
+                result = {'year_month_prefix': month, 'stop_reason': 'error',
+                          'error': f"worker process died: {e}"}
+            results[month] = result
+            record_result(state, result)
+            if result.get('stop_reason') == 'error':
+                print(f"\n✗ Shard {month} failed: {result.get('error')}")
+            else:
+                print(f"\n✓ Shard {month} finished: {result.get('stop_reason')}")
+    except KeyboardInterrupt:
+        print("\n⚠ Interrupted; waiting for running months to flush their progress...")
+        for future in futures:
+            future.cancel()
+        for future, month in futures.items():
+            if future.cancelled():
+                continue
+            try:
+                result = future.result()
+            except Exception:
+                continue
+            if month not in results:
+                results[month] = result
+                record_result(state, result)
+    finally:
+        executor.shutdown(wait=True)
+    
+    print_summary(pending, results)
+    # Embed the new papers once, here rather than in each shard process
+    if any(result.get('saved') for result in results.values()):
+        from embedding_index import update_embeddings
+        update_embeddings()
+    print(f"\nProgress saved to {STATE_FILE}; run the same command again to resume")
+    
+    failed = [month for month, result in results.items() if result.get('stop_reason') == 'error']
+    if failed:
+        print(f"✗ Failed months: {', '.join(sorted(failed))}")
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,127 @@
+#!/usr/bin/env python3
+"""
+Parser backend micro-benchmark
+
+Times each HTML parser backend in arxiv_scraper.PARSER_BACKENDS on saved
+arXiv abstract pages and checks that every backend extracts the same fields.
+
+Usage:
+    python benchmark_parsers.py [PAGES_DIR] [--fetch N] [--prefix YYMM] [--repeat R]
+    
+    PAGES_DIR (optional): Folder of saved abs pages (*.html), default ../data/sample_pages
+    --fetch N:            First download N pages starting at PREFIX.00001 into PAGES_DIR
+    --prefix YYMM:        Year-month prefix used with --fetch (default: 2511)
+    --repeat R:           Parse every page R times per backend (default: 5)
+"""
+
+import argparse
+import glob
+import os
+import statistics
+import time
+
+from arxiv_scraper import PARSER_BACKENDS, create_session, fetch_page, parse_paper_html
+
+# Fields compared between backends (scraped_at is a timestamp and always differs)
+COMPARED_FIELDS = ['paper_id', 'og_title', 'category', 'subcategory', 'submitted_on', 'abstract']
+
+def fetch_sample_pages(pages_dir, prefix, count):
+    """
+    Download abs pages into pages_dir, one request per second.
+    
+    Args:
+        pages_dir (str): Output folder
+        prefix (str): Year-month prefix (e.g., 2511)
+        count (int): Number of pages to download
+    """
+    os.makedirs(pages_dir, exist_ok=True)
+    session = create_session(pool_size=1)
+    for paper_num in range(1, count + 1):
+        paper_id = f"{prefix}.{paper_num:05d}"
+        path = os.path.join(pages_dir, f"{paper_id}.html")
+        if os.path.isfile(path):
+            continue
+        response = fetch_page(f"https://arxiv.org/abs/{paper_id}", session)
+        with open(path, 'wb') as f:
+            f.write(response.content)
+        print(f"  ✓ Saved {path}")
+        time.sleep(1)
+    session.close()
+
+def benchmark(pages, repeat):
+    """
+    Parse every page with every backend and collect timings.
+    
+    Args:
+        pages (list): (paper_id, url, content) tuples
+        repeat (int): Parses per page per backend
+        
+    Returns:
+        tuple: (timings, mismatches) where timings maps backend name to a list
+               of per-page seconds and mismatches lists (paper_id, field) pairs
+    """
+    timings = {name: [] for name in PARSER_BACKENDS}
+    results = {name: {} for name in PARSER_BACKENDS}
+    
+    for paper_id, url, content in pages:
+        for name in PARSER_BACKENDS:
+            start = time.perf_counter()
+            for _ in range(repeat):
+                parsed = parse_paper_html(content, url, name)
+            timings[name].append((time.perf_counter() - start) / repeat)
+            results[name][paper_id] = parsed
+    
+    mismatches = []
+    reference, *others = PARSER_BACKENDS
+    for paper_id, _, _ in pages:
+        for name in others:
+            for field in COMPARED_FIELDS:
+                if results[name][paper_id][field] != results[reference][paper_id][field]:
+                    mismatches.append((paper_id, f"{name}.{field}"))
+    
+    return timings, mismatches
+
+def main():
+    """Run the parser benchmark."""
+    parser = argparse.ArgumentParser(description='Benchmark arXiv abs page parser backends.')
+    parser.add_argument('pages_dir', nargs='?', default='../data/sample_pages', help='Folder of saved abs pages')
+    parser.add_argument('--fetch', type=int, default=0, help='Download N sample pages first')
+    parser.add_argument('--prefix', default='2511', help='Year-month prefix used with --fetch')
+    parser.add_argument('--repeat', type=int, default=5, help='Parses per page per backend')
+    args = parser.parse_args()
+    
+    if args.fetch:
+        print(f"Fetching {args.fetch} sample pages into {args.pages_dir}...")
+        fetch_sample_pages(args.pages_dir, args.prefix, args.fetch)
+    
+    page_files = sorted(glob.glob(os.path.join(args.pages_dir, '*.html')))
+    if not page_files:
+        print(f"No saved pages found in {args.pages_dir}. Use --fetch N to download some.")
+        return
+    
+    pages = []
+    for path in page_files:
+        paper_id = os.path.splitext(os.path.basename(path))[0]
+        with open(path, 'rb') as f:
+            pages.append((paper_id, f"https://arxiv.org/abs/{paper_id}", f.read()))
+    
+    print(f"Benchmarking {len(PARSER_BACKENDS)} parsers on {len(pages)} pages ({args.repeat} runs each)")
+    timings, mismatches = benchmark(pages, args.repeat)
+    
+    print("\n" + "=" * 80)
+    print(f"{'Parser':<10} {'Mean (ms)':>12} {'Median (ms)':>12} {'Pages/sec':>12}")
+    print("-" * 80)
+    for name, values in timings.items():
+        mean = statistics.mean(values)
+        print(f"{name:<10} {mean * 1000:>12.2f} {statistics.median(values) * 1000:>12.2f} {1 / mean:>12.1f}")
+    print("=" * 80)
+    
+    if mismatches:
+        print(f"\n✗ {len(mismatches)} field mismatches between backends:")
+        for paper_id, field in mismatches[:20]:
+            print(f"  - {paper_id}: {field}")
+    else:
+        print("\n✓ All backends extracted identical fields")
+
+if __name__ == "__main__":
+    main()
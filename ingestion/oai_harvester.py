@@ -0,0 +1,325 @@
+#!/usr/bin/env python3
+"""
+arXiv OAI-PMH Harvester
+
+Bulk alternative to arxiv_scraper.py. Instead of requesting one abstract
+page per paper ID, it pages through arXiv's OAI-PMH ListRecords feed for the
+'cs' set, so the server does the Computer Science filtering and each request
+returns up to ~1000 records. Records are mapped into the same nine-column
+schema used by the scraper and appended to ../data/YYMM_arxiv_papers.csv.
+
+Progress (the current resumption token and counters) is kept in
+../data/YYMM_arxiv_papers.oai.json, so an interrupted harvest resumes from
+the last completed page.
+
+Limitation: OAI-PMH selects records by datestamp (last modification), and
+the harvest only asks for datestamps inside the month. A paper from the
+month that was revised after the month ended has a later datestamp and is
+not harvested. arxiv_scraper.py does not fill these gaps either: it resumes
+after the highest ID already stored, which includes the harvested IDs. Use
+the scraper alone for months where completeness matters.
+
+Usage:
+    python oai_harvester.py [YYMM] [--endpoint URL] [--rate R]
+    
+    YYMM (optional): Year-month prefix (e.g., 2511 for November 2025)
+                     If not provided, uses current year-month
+    --endpoint URL:  OAI-PMH base URL (default: arXiv); point it at a local
+                     server replaying recorded XML pages for testing
+    --rate R:        Maximum requests per second (default: 0.5)
+"""
+
+import argparse
+import calendar
+import json
+import os
+import re
+import requests
+import xml.etree.ElementTree as ET
+from datetime import datetime
+from urllib.parse import quote
+
+from arxiv_scraper import (
+    BufferedCsvWriter, TokenBucket, create_session, fetch_page, get_year_month_prefix
+)
+from paper_index import PaperIndex
+
+OAI_ENDPOINT = 'https://oaipmh.arxiv.org/oai'
+OAI_NS = {'oai': 'http://www.openarchives.org/OAI/2.0/', 'arxiv': 'http://arxiv.org/OAI/arXiv/'}
+
+# Primary category codes mapped to the subcategory names shown on abs pages
+CS_SUBCATEGORIES = {
+    'cs.AI': 'Artificial Intelligence',
+    'cs.AR': 'Hardware Architecture',
+    'cs.CC': 'Computational Complexity',
+    'cs.CE': 'Computational Engineering, Finance, and Science',
+    'cs.CG': 'Computational Geometry',
+    'cs.CL': 'Computation and Language',
+    'cs.CR': 'Cryptography and Security',
+    'cs.CV': 'Computer Vision and Pattern Recognition',
+    'cs.CY': 'Computers and Society',
+    'cs.DB': 'Databases',
+    'cs.DC': 'Distributed, Parallel, and Cluster Computing',
+    'cs.DL': 'Digital Libraries',
+    'cs.DM': 'Discrete Mathematics',
+    'cs.DS': 'Data Structures and Algorithms',
+    'cs.ET': 'Emerging Technologies',
+    'cs.FL': 'Formal Languages and Automata Theory',
+    'cs.GL': 'General Literature',
+    'cs.GR': 'Graphics',
+    'cs.GT': 'Computer Science and Game Theory',
+    'cs.HC': 'Human-Computer Interaction',
+    'cs.IR': 'Information Retrieval',
+    'cs.IT': 'Information Theory',
+    'cs.LG': 'Machine Learning',
+    'cs.LO': 'Logic in Computer Science',
+    'cs.MA': 'Multiagent Systems',
+    'cs.MM': 'Multimedia',
+    'cs.MS': 'Mathematical Software',
+    'cs.NA': 'Numerical Analysis',
+    'cs.NE': 'Neural and Evolutionary Computing',
+    'cs.NI': 'Networking and Internet Architecture',
+    'cs.OH': 'Other Computer Science',
+    'cs.OS': 'Operating Systems',
+    'cs.PF': 'Performance',
+    'cs.PL': 'Programming Languages',
+    'cs.RO': 'Robotics',
+    'cs.SC': 'Symbolic Computation',
+    'cs.SD': 'Sound',
+    'cs.SE': 'Software Engineering',
+    'cs.SI': 'Social and Information Networks',
+    'cs.SY': 'Systems and Control',
+}
+
+def get_state_path(csv_filename):
+    """Return the harvest state sidecar path for a month CSV (e.g. 2511_arxiv_papers.oai.json)."""
+    return os.path.splitext(csv_filename)[0] + '.oai.json'
+
+def load_state(csv_filename):
+    """
+    Load the harvest state for a month CSV.
+    
+    Returns:
+        dict: State with 'resumption_token' and counters (fresh state if none saved)
+    """
+    state_path = get_state_path(csv_filename)
+    if os.path.isfile(state_path):
+        try:
+            with open(state_path, 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except (OSError, ValueError) as e:
+            print(f"Ignoring unreadable harvest state {state_path}: {e}")
+    return {'resumption_token': None, 'complete': False, 'pages': 0, 'saved': 0, 'skipped': 0}
+
+def save_state(csv_filename, state):
+    """Atomically write the harvest state for a month CSV."""
+    state_path = get_state_path(csv_filename)
+    state = dict(state, updated_at=datetime.now().isoformat())
+    tmp_path = state_path + '.tmp'
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(state, f, indent=2)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_path, state_path)
+
+def build_request_url(endpoint, year_month_prefix, resumption_token=None):
+    """
+    Build the ListRecords URL for the first page or a continuation page.
+    
+    Records are selected by datestamp (last modification), so the first
+    request covers the first to the last day of the month and papers from
+    that month are picked out by ID prefix afterwards. Papers revised after
+    the month ends carry a later datestamp and are missed (see the module
+    docstring).
+    """
+    if resumption_token:
+        return f"{endpoint}?verb=ListRecords&resumptionToken={quote(resumption_token, safe='')}"
+    year = 2000 + int(year_month_prefix[:2])
+    month = int(year_month_prefix[2:])
+    last_day = calendar.monthrange(year, month)[1]
+    return (f"{endpoint}?verb=ListRecords&metadataPrefix=arXiv&set=cs"
+            f"&from={year:04d}-{month:02d}-01&until={year:04d}-{month:02d}-{last_day:02d}")
+
+def normalize_whitespace(text):
+    """Collapse the line wrapping used in OAI metadata into single spaces."""
+    return ' '.join((text or '').split())
+
+def parse_record(record):
+    """
+    Map one OAI-PMH arXiv record into the scraper's CSV schema.
+    
+    Args:
+        record (Element): <record> element
+    
+    Returns:
+        dict: Paper metadata, or None for deleted or non-CS-primary records
+    """
+    header = record.find('oai:header', OAI_NS)
+    if header is not None and header.get('status') == 'deleted':
+        return None
+    
+    metadata = record.find('oai:metadata/arxiv:arXiv', OAI_NS)
+    if metadata is None:
+        return None
+    
+    def field(name):
+        return metadata.findtext(f'arxiv:{name}', default='', namespaces=OAI_NS)
+    
+    # The first listed category is the primary one shown in the abs page subheader;
+    # the cs set also contains cross-lists whose primary category is elsewhere
+    categories = field('categories').split()
+    primary = categories[0] if categories else ''
+    if not primary.startswith('cs.'):
+        return None
+    
+    paper_id = field('id').strip()
+    return {
+        'paper_id': paper_id,
+        'url': f"https://arxiv.org/abs/{paper_id}",
+        'og_title': normalize_whitespace(field('title')),
+        'category': 'Computer Science',
+        'subcategory': CS_SUBCATEGORIES.get(primary, primary),
+        'submitted_on': field('created').strip(),
+        'abstract': normalize_whitespace(field('abstract')),
+        'summary': '',  # Empty column to be filled later by Codex summarization
+        'scraped_at': datetime.now().isoformat()
+    }
+
+def parse_page(content):
+    """
+    Parse one ListRecords response.
+    
+    Args:
+        content (bytes): Response XML
+    
+    Returns:
+        tuple: (records, resumption_token, error_code) where records is a list of
+               <record> elements, resumption_token is None on the last page and
+               error_code is the OAI error code or None
+    """
+    root = ET.fromstring(content)
+    
+    error = root.find('oai:error', OAI_NS)
+    if error is not None:
+        return [], None, error.get('code')
+    
+    list_records = root.find('oai:ListRecords', OAI_NS)
+    if list_records is None:
+        return [], None, None
+    
+    records = list_records.findall('oai:record', OAI_NS)
+    token_element = list_records.find('oai:resumptionToken', OAI_NS)
+    resumption_token = (token_element.text or '').strip() if token_element is not None else ''
+    return records, resumption_token or None, None
+
+def harvest_month(year_month_prefix, endpoint=OAI_ENDPOINT, rate=0.5):
+    """
+    Harvest all Computer Science papers with a given YYMM prefix.
+    
+    Args:
+        year_month_prefix (str): Year-month prefix (e.g., 2511)
+        endpoint (str): OAI-PMH base URL
+        rate (float): Maximum requests per second
+    
+    Returns:
+        dict: Final harvest state
+    """
+    csv_filename = f"../data/{year_month_prefix}_arxiv_papers.csv"
+    print(f"CSV file: {csv_filename}")
+    
+    state = load_state(csv_filename)
+    if state.get('complete'):
+        print("Previous harvest completed; starting a new pass to pick up late records")
+        state.update(resumption_token=None, complete=False)
+    elif state.get('resumption_token'):
+        print(f"Resuming from page {state['pages'] + 1}")
+    
+    # Papers stored in any month are skipped, found through the paper ID index
+    index = PaperIndex()
+    index.refresh()
+    print(f"Papers already stored: {index.stats()[1]:,}")
+    harvested_ids = set()
+    id_pattern = re.compile(rf'^{re.escape(year_month_prefix)}\.\d{{4,5}}$')
+    
+    rate_limiter = TokenBucket(rate)
+    session = create_session(pool_size=1, max_retries=5, backoff_factor=5.0)
+    # The state (including the token for the next page) is saved only after
+    # the rows of the current page are on disk
+    writer = BufferedCsvWriter(
+        csv_filename,
+        flush_rows=1000,
+        flush_interval=60.0,
+        on_flush=lambda: save_state(csv_filename, state),
+        index=index
+    )
+    
+    print("=" * 80)
+    try:
+        while True:
+            url = build_request_url(endpoint, year_month_prefix, state.get('resumption_token'))
+            rate_limiter.acquire()
+            try:
+                response = fetch_page(url, session)
+                records, next_token, error_code = parse_page(response.content)
+            except (requests.RequestException, ET.ParseError) as e:
+                print(f"✗ Failed to fetch page {state['pages'] + 1}: {e}")
+                break
+            
+            if error_code == 'badResumptionToken' and state.get('resumption_token'):
+                # Tokens expire; restart the listing, already stored IDs are skipped
+                print("⚠ Resumption token expired, restarting from the first page")
+                state['resumption_token'] = None
+                continue
+            if error_code and error_code != 'noRecordsMatch':
+                print(f"✗ OAI-PMH error: {error_code}")
+                break
+            
+            saved_on_page = 0
+            for record in records:
+                paper_data = parse_record(record)
+                if (paper_data is None or not id_pattern.match(paper_data['paper_id'])
+                        or paper_data['paper_id'] in harvested_ids or index.contains(paper_data['paper_id'])):
+                    state['skipped'] += 1
+                    continue
+                harvested_ids.add(paper_data['paper_id'])
+                writer.write(paper_data)
+                saved_on_page += 1
+            
+            state['pages'] += 1
+            state['saved'] += saved_on_page
+            state['resumption_token'] = next_token
+            state['complete'] = next_token is None
+            print(f"[page {state['pages']}] {len(records)} records, {saved_on_page} new CS papers saved")
+            writer.tick()
+            writer.flush()
+            
+            if next_token is None:
+                break
+    finally:
+        session.close()
+        writer.close()
+        index.close()
+    
+    print("\n" + "=" * 80)
+    print("Harvest completed!" if state['complete'] else "Harvest stopped; run again to resume")
+    print(f"Computer Science papers saved: {state['saved']}")
+    print(f"Records skipped (other months, cross-lists, duplicates): {state['skipped']}")
+    return state
+
+def main():
+    """Harvest one month of Computer Science papers over OAI-PMH."""
+    parser = argparse.ArgumentParser(description='Harvest Computer Science papers from arXiv over OAI-PMH.')
+    parser.add_argument('year_month_prefix', nargs='?', help='Year-month prefix (e.g., 2511)')
+    parser.add_argument('--endpoint', default=OAI_ENDPOINT, help=f'OAI-PMH base URL (default: {OAI_ENDPOINT})')
+    parser.add_argument('--rate', type=float, default=0.5, help='Maximum requests per second (default: 0.5)')
+    args = parser.parse_args()
+    
+    year_month_prefix = args.year_month_prefix or get_year_month_prefix()
+    print(f"Harvesting {year_month_prefix} from {args.endpoint}")
+    state = harvest_month(year_month_prefix, args.endpoint, args.rate)
+    if state['saved']:
+        from embedding_index import update_embeddings
+        update_embeddings()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,137 @@
+#!/usr/bin/env python3
+"""
+Raw abs-page cache
+
+Stores the HTML of scraped arXiv abstract pages, gzip-compressed and keyed by
+paper ID, under ../data/page_cache/YYMM/YYMM.NNNNN.html.gz. With the cache
+filled, reparse.py can rebuild the month CSVs after extraction changes
+without downloading anything again.
+
+The cache has a size cap; when it is exceeded the least recently used pages
+(oldest modification time, refreshed on every read) are evicted until the
+cache is back under 90% of the cap.
+
+Usage:
+    python page_cache.py              # Show cache size per month
+"""
+
+import gzip
+import os
+import threading
+
+DEFAULT_CACHE_DIR = '../data/page_cache'
+DEFAULT_MAX_BYTES = 2 * 1024 ** 3  # 2 GB
+PAGE_SUFFIX = '.html.gz'
+
+class PageCache:
+    """Thread-safe, size-capped on-disk cache of raw abs pages."""
+    
+    def __init__(self, cache_dir=DEFAULT_CACHE_DIR, max_bytes=DEFAULT_MAX_BYTES):
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+        self.lock = threading.Lock()
+        os.makedirs(cache_dir, exist_ok=True)
+        self.total_bytes = sum(size for _, size, _ in self.scan())
+    
+    def path_for(self, paper_id):
+        """Return the cache file path for a paper ID (grouped by YYMM prefix)."""
+        prefix = paper_id.split('.')[0]
+        return os.path.join(self.cache_dir, prefix, paper_id + PAGE_SUFFIX)
+    
+    def scan(self):
+        """Yield (path, size, mtime) for every cached page."""
+        for month_entry in os.scandir(self.cache_dir):
+            if not month_entry.is_dir():
+                continue
+            for entry in os.scandir(month_entry.path):
+                if entry.name.endswith(PAGE_SUFFIX):
+                    stat = entry.stat()
+                    yield entry.path, stat.st_size, stat.st_mtime
+    
+    def get(self, paper_id):
+        """
+        Return the cached HTML for a paper, or None if it is not cached.
+        
+        Reading a page marks it as recently used.
+        """
+        path = self.path_for(paper_id)
+        try:
+            with gzip.open(path, 'rb') as f:
+                content = f.read()
+        except (OSError, EOFError):
+            return None
+        try:
+            os.utime(path)
+        except OSError:
+            pass
+        return content
+    
+    def put(self, paper_id, content):
+        """
+        Store the HTML for a paper, evicting old pages if the cap is exceeded.
+        
+        Args:
+            paper_id (str): arXiv ID (e.g., 2511.00010)
+            content (bytes): Raw page HTML
+        """
+        path = self.path_for(paper_id)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp_path = f"{path}.{threading.get_ident()}.tmp"
+        with gzip.open(tmp_path, 'wb', compresslevel=6) as f:
+            f.write(content)
+        new_size = os.path.getsize(tmp_path)
+        old_size = os.path.getsize(path) if os.path.isfile(path) else 0
+        os.replace(tmp_path, path)
+        
+        with self.lock:
+            self.total_bytes += new_size - old_size
+            if self.total_bytes > self.max_bytes:
+                self._evict(int(self.max_bytes * 0.9))
+    
+    def _evict(self, target_bytes):
+        """Delete least recently used pages until the cache is under target_bytes. Caller holds the lock."""
+        entries = sorted(self.scan(), key=lambda entry: entry[2])
+        total = sum(size for _, size, _ in entries)
+        for path, size, _ in entries:
+            if total <= target_bytes:
+                break
+            try:
+                os.remove(path)
+                total -= size
+            except OSError:
+                pass
+        self.total_bytes = total
+    
+    def paper_ids(self, year_month_prefix):
+        """
+        List the cached paper IDs for a month, sorted.
+        
+        Args:
+            year_month_prefix (str): Year-month prefix (e.g., 2511)
+        """
+        month_dir = os.path.join(self.cache_dir, year_month_prefix)
+        if not os.path.isdir(month_dir):
+            return []
+        return sorted(name[:-len(PAGE_SUFFIX)] for name in os.listdir(month_dir) if name.endswith(PAGE_SUFFIX))
+
+def main():
+    """Print cache usage per month."""
+    cache = PageCache()
+    usage = {}
+    for path, size, _ in cache.scan():
+        month = os.path.basename(os.path.dirname(path))
+        pages, total = usage.get(month, (0, 0))
+        usage[month] = (pages + 1, total + size)
+    
+    print(f"Page cache: {cache.cache_dir}")
+    print("=" * 80)
+    print(f"{'Month':<8} {'Pages':>10} {'Size (MB)':>12}")
+    print("-" * 80)
+    for month in sorted(usage):
+        pages, total = usage[month]
+        print(f"{month:<8} {pages:>10,} {total / 1024 ** 2:>12.1f}")
+    print("=" * 80)
+    print(f"Total: {cache.total_bytes / 1024 ** 2:.1f} MB of {cache.max_bytes / 1024 ** 2:.0f} MB cap")
+
+if __name__ == "__main__":
+    main()
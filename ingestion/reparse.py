@@ -0,0 +1,157 @@
+#!/usr/bin/env python3
+"""
+Rebuild month CSVs from the raw-page cache
+
+After a change to the extraction logic in arxiv_scraper.py (for example the
+dateline regex or the abstract prefix stripping), this re-parses every cached
+abs page for a month in parallel across CPU cores and rewrites
+../data/YYMM_arxiv_papers.csv, without sending a single request.
+
+Existing summaries (and scraped_at timestamps) are carried over by paper_id,
+and rows whose page is not in the cache, or could not be read or parsed,
+are kept unchanged. A page that yields no category counts as unparsable;
+a row is only dropped when its re-parsed page names another category. The new file is written next to the old one and
+swapped in atomically, under the month lock (paper_store.month_lock), so a
+scraper appending to the month at the same time loses no rows.
+
+Usage:
+    python reparse.py YYMM [YYMM ...] [--processes N] [--parser lxml|bs4]
+"""
+
+import argparse
+import csv
+import gzip
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from arxiv_scraper import DEFAULT_PARSER, FIELDNAMES, PARSER_BACKENDS, format_csv_row, parse_paper_html
+from page_cache import DEFAULT_CACHE_DIR, PageCache
+from paper_store import month_lock
+
+def _parse_cached_page(task):
+    """
+    Parse one cached page (runs in a worker process).
+    
+    Args:
+        task (tuple): (paper_id, path, parser)
+        
+    Returns:
+        dict: Paper metadata, or None if the page could not be read or parsed,
+              or yielded no category (a blank or truncated page, or a
+              selector that no longer matches)
+    """
+    paper_id, path, parser = task
+    try:
+        with gzip.open(path, 'rb') as f:
+            content = f.read()
+        paper_data = parse_paper_html(content, f"https://arxiv.org/abs/{paper_id}", parser)
+    except Exception as e:
+        print(f"✗ Could not reparse {paper_id}: {e}")
+        return None
+    if not paper_data['category'].strip():
+        print(f"✗ Could not reparse {paper_id}: no category found on the cached page")
+        return None
+    return paper_data
+
+def load_existing_rows(csv_filename):
+    """
+    Read the current month CSV keyed by paper_id.
+    
+    Returns:
+        dict: paper_id -> row dict (empty if the file does not exist)
+    """
+    if not os.path.isfile(csv_filename):
+        return {}
+    with open(csv_filename, 'r', encoding='utf-8', newline='') as csvfile:
+        return {row['paper_id']: row for row in csv.DictReader(csvfile)}
+
+def reparse_month(year_month_prefix, cache, processes=None, parser=DEFAULT_PARSER):
+    """
+    Rebuild one month CSV from cached pages.
+    
+    Args:
+        year_month_prefix (str): Year-month prefix (e.g., 2511)
+        cache (PageCache): Page cache to read from
+        processes (int): Worker processes (default: number of CPUs)
+        parser (str): Parser backend name from PARSER_BACKENDS
+        
+    Returns:
+        dict: Counts of 'reparsed', 'kept' (not cached, or not re-parsable) and
+              'dropped' (now in another category) rows, and 'failed' pages
+    """
+    csv_filename = f"../data/{year_month_prefix}_arxiv_papers.csv"
+    paper_ids = cache.paper_ids(year_month_prefix)
+    print(f"\n{year_month_prefix}: {len(paper_ids)} cached pages")
+    if not paper_ids:
+        return {'reparsed': 0, 'kept': 0, 'dropped': 0, 'failed': 0}
+    
+    tasks = [(paper_id, cache.path_for(paper_id), parser) for paper_id in paper_ids]
+    
+    start = time.perf_counter()
+    with ProcessPoolExecutor(max_workers=processes) as executor:
+        parsed = list(executor.map(_parse_cached_page, tasks, chunksize=64))
+    elapsed = time.perf_counter() - start
+    print(f"  Parsed {len(tasks)} pages in {elapsed:.1f}s ({len(tasks) / elapsed:.0f} pages/sec)")
+    
+    failed = sum(1 for paper_data in parsed if paper_data is None)
+    
+    # The scraper may be appending to this month: read and replace it under the month lock
+    with month_lock(csv_filename):
+        existing = load_existing_rows(csv_filename)
+        rows = {}
+        dropped_ids = set()
+        for paper_data in parsed:
+            if paper_data is None:
+                continue  # Unreadable or unparsable page: the existing row is kept below
+            if paper_data['category'] != 'Computer Science':
+                dropped_ids.add(paper_data['paper_id'])
+                continue
+            old_row = existing.get(paper_data['paper_id'])
+            if old_row:
+                # Keep enrichment and the original scrape time
+                paper_data['summary'] = old_row.get('summary', '')
+                paper_data['scraped_at'] = old_row.get('scraped_at', paper_data['scraped_at'])
+            rows[paper_data['paper_id']] = paper_data
+        
+        # Only rows with a successful replacement (or a page that is no longer CS) are replaced
+        kept = 0
+        for paper_id, old_row in existing.items():
+            if paper_id not in rows and paper_id not in dropped_ids:
+                rows[paper_id] = old_row
+                kept += 1
+        
+        tmp_filename = csv_filename + '.tmp'
+        with open(tmp_filename, 'w', newline='', encoding='utf-8') as csvfile:
+            csvfile.write(','.join(FIELDNAMES) + '\n')
+            for paper_id in sorted(rows):
+                csvfile.write(format_csv_row(rows[paper_id]))
+            csvfile.flush()
+            os.fsync(csvfile.fileno())
+        os.replace(tmp_filename, csv_filename)
+    
+    reparsed = len(rows) - kept
+    print(f"  ✓ Wrote {len(rows)} papers to {csv_filename} ({reparsed} reparsed, {kept} kept as-is, "
+          f"{len(dropped_ids)} no longer CS, {failed} unreadable pages kept from the CSV)")
+    return {'reparsed': reparsed, 'kept': kept, 'dropped': len(dropped_ids), 'failed': failed}
+
+def main():
+    """Rebuild the given month CSVs from the page cache."""
+    parser = argparse.ArgumentParser(description='Rebuild month CSVs from cached abs pages.')
+    parser.add_argument('months', nargs='+', help='Year-month prefixes (e.g., 2510 2511)')
+    parser.add_argument('--processes', type=int, default=None, help='Worker processes (default: all CPUs)')
+    parser.add_argument('--parser', choices=sorted(PARSER_BACKENDS), default=DEFAULT_PARSER,
+                        help=f'HTML parser backend (default: {DEFAULT_PARSER})')
+    parser.add_argument('--cache-dir', default=DEFAULT_CACHE_DIR, help=f'Page cache folder (default: {DEFAULT_CACHE_DIR})')
+    args = parser.parse_args()
+    
+    cache = PageCache(args.cache_dir)
+    print(f"Reparsing {len(args.months)} months from {args.cache_dir}")
+    print("=" * 80)
+    for year_month_prefix in args.months:
+        reparse_month(year_month_prefix, cache, args.processes, args.parser)
+    print("\n" + "=" * 80)
+    print("✓ Reparse complete")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,140 @@
+#!/usr/bin/env python3
+"""
+Corpus loading benchmark
+
+Compares the old way the analysis scripts loaded the corpus (a bare
+pd.read_csv of every month followed by pd.concat) with the loading paths in
+paper_store.py, on the full data/ folder. Each run happens in a fresh
+process, so the reported peak RSS belongs to that loading method alone.
+
+Methods:
+    baseline     pd.read_csv(file) of every month, all columns, inferred types
+    csv-c        read_csv_typed() with the pandas C engine
+    csv-pyarrow  read_csv_typed() with pyarrow.csv
+    mirror       read_corpus() from the per-month Parquet mirrors
+    cache        load_corpus() from the combined corpus cache
+
+Usage:
+    python benchmark_loading.py [--columns COL ...] [--all-columns] [--repeat R]
+    
+    --columns COL ...: Columns to load (default: paper_id subcategory submitted_on,
+                       what leaderboard_viz.py uses)
+    --all-columns:     Load every column instead
+    --repeat R:        Runs per method; the median time and the highest peak
+                       RSS are reported (default: 3)
+"""
+
+import argparse
+import multiprocessing
+import resource
+import statistics
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import pandas as pd
+
+from paper_store import (
+    HAVE_PYARROW, ensure_mirror, list_month_files, load_corpus, read_corpus, read_csv_typed
+)
+
+DEFAULT_COLUMNS = ['paper_id', 'subcategory', 'submitted_on']
+
+def _load_baseline(columns):
+    """The pre-storage-layer loading code of the analysis scripts."""
+    dfs = [pd.read_csv(f) for f in list_month_files()]
+    df = pd.concat(dfs, ignore_index=True)
+    return df[columns] if columns else df
+
+def _load_csv(columns, engine):
+    """Projected, typed CSV parse of every month without any Parquet files."""
+    dfs = [read_csv_typed(f, columns, engine=engine) for f in list_month_files()]
+    return pd.concat(dfs, ignore_index=True)
+
+METHODS = {
+    'baseline': _load_baseline,
+    'csv-c': lambda columns: _load_csv(columns, 'c'),
+    'csv-pyarrow': lambda columns: _load_csv(columns, 'pyarrow'),
+    'mirror': lambda columns: read_corpus(columns=columns, verbose=False),
+    'cache': lambda columns: load_corpus(columns=columns, verbose=False),
+}
+PYARROW_METHODS = {'csv-pyarrow', 'mirror', 'cache'}
+
+def _run_method(name, columns):
+    """
+    Load the corpus once with one method (called in a fresh process).
+    
+    Returns:
+        tuple: (seconds, peak_rss_mb, frame_mb, rows)
+    """
+    start = time.perf_counter()
+    df = METHODS[name](columns)
+    elapsed = time.perf_counter() - start
+    # ru_maxrss is in kilobytes on Linux
+    peak_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+    frame_size = df.memory_usage(deep=True).sum() / 1024 ** 2
+    return elapsed, peak_rss, frame_size, len(df)
+
+def _baseline_rss():
+    """Peak RSS of a fresh process that has only imported the libraries."""
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+def benchmark(names, columns, repeat):
+    """
+    Run every method `repeat` times, each in its own process.
+    
+    Returns:
+        tuple: (results, import_rss) where results maps method name to a list
+               of _run_method() tuples and import_rss is the peak RSS of an
+               idle worker in MB
+    """
+    context = multiprocessing.get_context('spawn')
+    with ProcessPoolExecutor(max_workers=1, mp_context=context) as executor:
+        import_rss = executor.submit(_baseline_rss).result()
+    
+    results = {name: [] for name in names}
+    for _ in range(repeat):
+        for name in names:
+            with ProcessPoolExecutor(max_workers=1, mp_context=context) as executor:
+                results[name].append(executor.submit(_run_method, name, columns).result())
+    return results, import_rss
+
+def main():
+    """Benchmark every loading method and print a comparison table."""
+    parser = argparse.ArgumentParser(description='Compare corpus loading methods.')
+    parser.add_argument('--columns', nargs='+', default=DEFAULT_COLUMNS, help='Columns to load')
+    parser.add_argument('--all-columns', action='store_true', help='Load every column')
+    parser.add_argument('--repeat', type=int, default=3, help='Runs per method (default: 3)')
+    args = parser.parse_args()
+    columns = None if args.all_columns else args.columns
+    
+    csv_files = list_month_files()
+    if not csv_files:
+        print("No month CSV files found in data/")
+        return
+    
+    names = [name for name in METHODS if HAVE_PYARROW or name not in PYARROW_METHODS]
+    if HAVE_PYARROW:
+        # Build the mirrors and the corpus cache up front; rebuild cost is not what is measured
+        for csv_path in csv_files:
+            ensure_mirror(csv_path)
+        load_corpus(columns=['paper_id'], verbose=False)
+    
+    print(f"Benchmarking {len(names)} loading methods on {len(csv_files)} month files ({args.repeat} runs each)")
+    print(f"Columns: {', '.join(columns) if columns else 'all'}")
+    results, import_rss = benchmark(names, columns, args.repeat)
+    
+    baseline_time = statistics.median(run[0] for run in results['baseline'])
+    print("\n" + "=" * 80)
+    print(f"{'Method':<13} {'Rows':>9} {'Median (s)':>11} {'Speedup':>8} {'Peak RSS (MB)':>14} {'Over idle':>10} {'Frame (MB)':>11}")
+    print("-" * 80)
+    for name in names:
+        runs = results[name]
+        elapsed = statistics.median(run[0] for run in runs)
+        peak_rss = max(run[1] for run in runs)
+        print(f"{name:<13} {runs[0][3]:>9,} {elapsed:>11.3f} {baseline_time / elapsed:>7.1f}x "
+              f"{peak_rss:>14.0f} {peak_rss - import_rss:>10.0f} {runs[0][2]:>11.1f}")
+    print("=" * 80)
+    print(f"Idle worker peak RSS (imports only): {import_rss:.0f} MB")
+
+if __name__ == "__main__":
+    main()
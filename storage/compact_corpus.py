@@ -0,0 +1,385 @@
+#!/usr/bin/env python3
+"""
+Memory-compact corpus representation
+
+A pandas frame of the full corpus keeps one Python string object per cell,
+including 'Computer Science' on every row and a URL that is just the paper
+ID with a prefix. CompactCorpus stores the same papers in a handful of
+NumPy arrays instead:
+
+- paper_id packed as uint16 YYMM plus uint32 sequence number
+- category and subcategory as small integer codes into a name list
+- submitted_on as int32 days since 1970-01-01 and scraped_at as int64
+  seconds (MISSING_DAY / MISSING_SECONDS when unknown)
+- og_title, abstract and summary each in one contiguous UTF-8 buffer with
+  an int64 offset array, decoded one row at a time on access; by default
+  the buffers are also zlib-compressed in blocks of TEXT_BLOCK_SIZE rows
+- url not stored at all, built from paper_id on access
+
+Usage from other folders:
+    sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'storage'))
+    from compact_corpus import CompactCorpus
+    corpus = CompactCorpus.load()
+    print(corpus.paper_id(0), corpus.abstract(0))
+
+Usage as a script:
+    python compact_corpus.py          # Compare memory use with the pandas frame
+"""
+
+import re
+import sys
+import zlib
+
+import numpy as np
+import pandas as pd
+
+from paper_store import DATA_DIR, list_month_files, load_corpus, month_of, read_month
+
+PAPER_ID_PATTERN = re.compile(r'^(\d{4})\.(\d{4,5})$')
+MISSING_DAY = np.iinfo(np.int32).min
+MISSING_SECONDS = np.iinfo(np.int64).min
+TEXT_COLUMNS = ['og_title', 'abstract', 'summary']
+# Rows per compressed block of text (about 80 KB of abstracts)
+TEXT_BLOCK_SIZE = 64
+
+class StringBuffer:
+    """
+    Immutable list of strings stored as one UTF-8 buffer plus offsets.
+    
+    With a block size, the buffer is split into blocks of that many rows and
+    each block is zlib-compressed; reading a row decompresses its block
+    (the last decompressed block is kept, so sequential reads decompress
+    each block once).
+    """
+    
+    def __init__(self, data, offsets, block_size=None):
+        self.data = data
+        self.offsets = offsets
+        self.block_size = block_size
+        self._last_block = (None, b'')
+    
+    @classmethod
+    def from_values(cls, values, block_size=None):
+        """
+        Pack a sequence of strings (None/NaN are stored as empty strings).
+        
+        Args:
+            values (iterable): Strings
+            block_size (int): Rows per compressed block (default: no compression)
+        """
+        builder = StringBufferBuilder(block_size)
+        builder.extend(values)
+        return builder.build()
+    
+    def __len__(self):
+        return len(self.offsets) - 1
+    
+    def __getitem__(self, index):
+        if not self.block_size:
+            return self.data[self.offsets[index]:self.offsets[index + 1]].decode('utf-8')
+        block = index // self.block_size
+        cached_block, raw = self._last_block
+        if cached_block != block:
+            raw = zlib.decompress(self.data[block])
+            self._last_block = (block, raw)
+        base = self.offsets[block * self.block_size]
+        return raw[self.offsets[index] - base:self.offsets[index + 1] - base].decode('utf-8')
+    
+    def lengths(self):
+        """Return the encoded length of every string in bytes."""
+        return np.diff(self.offsets)
+    
+    @property
+    def nbytes(self):
+        if not self.block_size:
+            return len(self.data) + self.offsets.nbytes
+        return sum(sys.getsizeof(block) for block in self.data) + self.offsets.nbytes
+
+class StringBufferBuilder:
+    """
+    Packs strings into a StringBuffer chunk by chunk.
+    
+    Full blocks are compressed as soon as they fill, so only the encoded
+    text of the current chunk and one partial block is held uncompressed.
+    """
+    
+    def __init__(self, block_size=None):
+        self.block_size = block_size
+        self.lengths = []
+        self.parts = []
+        self.pending = []
+    
+    def extend(self, values):
+        """Append strings (None/NaN are stored as empty strings)."""
+        encoded = [value.encode('utf-8') if isinstance(value, str) else b'' for value in values]
+        self.lengths.append(np.fromiter(map(len, encoded), dtype=np.int64, count=len(encoded)))
+        if not self.block_size:
+            self.parts.append(b''.join(encoded))
+            return
+        self.pending.extend(encoded)
+        full = len(self.pending) - len(self.pending) % self.block_size
+        for start in range(0, full, self.block_size):
+            self.parts.append(zlib.compress(b''.join(self.pending[start:start + self.block_size]), 6))
+        del self.pending[:full]
+    
+    def build(self):
+        """Return the StringBuffer holding every appended string."""
+        lengths = np.concatenate(self.lengths) if self.lengths else np.zeros(0, dtype=np.int64)
+        offsets = np.zeros(len(lengths) + 1, dtype=np.int64)
+        np.cumsum(lengths, out=offsets[1:])
+        if not self.block_size:
+            return StringBuffer(b''.join(self.parts), offsets)
+        if self.pending:
+            self.parts.append(zlib.compress(b''.join(self.pending), 6))
+            self.pending = []
+        return StringBuffer(self.parts, offsets, self.block_size)
+
+def _encode_categories(values):
+    """Return (codes, names) for a column, with -1 marking missing values."""
+    categorical = pd.Categorical(values)
+    names = [str(name) for name in categorical.categories]
+    dtype = np.int8 if len(names) < 127 else np.int16
+    return categorical.codes.astype(dtype), names
+
+def _merge_categories(parts):
+    """
+    Combine (codes, names) pairs encoded separately into one code array.
+    
+    Returns:
+        tuple: (codes, names) over the sorted union of the names
+    """
+    names = sorted({name for _, part_names in parts for name in part_names})
+    positions = {name: i for i, name in enumerate(names)}
+    dtype = np.int8 if len(names) < 127 else np.int16
+    merged = []
+    for codes, part_names in parts:
+        mapping = np.array([positions[name] for name in part_names] + [-1], dtype=dtype)
+        # Code -1 (missing) picks the trailing -1 of the mapping
+        merged.append(mapping[codes])
+    return (np.concatenate(merged) if merged else np.zeros(0, dtype=dtype)), names
+
+def _pack_paper_ids(paper_ids):
+    """
+    Split IDs like 2511.00010 into YYMM and sequence arrays.
+    
+    Raises:
+        ValueError: If an ID does not have the YYMM.NNNNN form
+    """
+    parts = pd.Series(paper_ids, dtype=str).str.strip().str.extract(PAPER_ID_PATTERN.pattern)
+    invalid = parts[0].isna()
+    if invalid.any():
+        examples = ', '.join(pd.Series(paper_ids)[invalid.to_numpy()].astype(str).head(3))
+        raise ValueError(f"{invalid.sum()} paper IDs are not in YYMM.NNNNN form (e.g. {examples})")
+    return parts[0].astype(np.uint16).to_numpy(), parts[1].astype(np.uint32).to_numpy()
+
+def _to_days(values):
+    """Convert dates to int32 days since the epoch (MISSING_DAY for NaT)."""
+    dates = pd.to_datetime(pd.Series(values), format='mixed', errors='coerce')
+    days = dates.to_numpy(dtype='datetime64[D]').astype(np.int64)
+    days[dates.isna().to_numpy()] = MISSING_DAY
+    return days.astype(np.int32)
+
+def _to_seconds(values):
+    """Convert timestamps to int64 seconds since the epoch (MISSING_SECONDS for NaT)."""
+    timestamps = pd.to_datetime(pd.Series(values), format='ISO8601', errors='coerce')
+    seconds = timestamps.to_numpy(dtype='datetime64[s]').astype(np.int64)
+    seconds[timestamps.isna().to_numpy()] = MISSING_SECONDS
+    return seconds
+
+class CompactCorpus:
+    """Column arrays for the whole corpus; row i is the same paper in every array."""
+    
+    def __init__(self, id_months, id_numbers, category_codes, categories, subcategory_codes,
+                 subcategories, submitted_days, scraped_seconds, texts):
+        self.id_months = id_months
+        self.id_numbers = id_numbers
+        self.category_codes = category_codes
+        self.categories = categories
+        self.subcategory_codes = subcategory_codes
+        self.subcategories = subcategories
+        self.submitted_days = submitted_days
+        self.scraped_seconds = scraped_seconds
+        self.texts = texts
+    
+    @classmethod
+    def from_frame(cls, df, compress_text=True):
+        """
+        Build a compact corpus from a papers DataFrame (as returned by load_corpus).
+        
+        Args:
+            df (DataFrame): Papers with at least paper_id; other columns are optional
+            compress_text (bool): Block-compress the text buffers (slower random access)
+        """
+        return cls.from_frames([df], compress_text)
+    
+    @classmethod
+    def from_frames(cls, frames, compress_text=True, drop_duplicates=False):
+        """
+        Build a compact corpus from papers DataFrames, one at a time.
+        
+        Each frame is packed into arrays before the next one is requested,
+        so a generator of month frames never has more than one month in
+        pandas form. Text columns are those present in the first frame.
+        
+        Args:
+            frames (iterable): DataFrames with at least paper_id
+            compress_text (bool): Block-compress the text buffers
+            drop_duplicates (bool): Keep only the first row of each paper ID
+        """
+        block_size = TEXT_BLOCK_SIZE if compress_text else None
+        id_months, id_numbers, categories, subcategories, submitted_days, scraped_seconds = [], [], [], [], [], []
+        texts = None
+        seen = np.zeros(0, dtype=np.int64)
+        for df in frames:
+            months, numbers = _pack_paper_ids(df['paper_id'])
+            if drop_duplicates:
+                keys = months.astype(np.int64) * 1_000_000 + numbers
+                keep = ~pd.Series(keys).duplicated().to_numpy() & ~np.isin(keys, seen)
+                seen = np.concatenate([seen, keys[keep]])
+                if not keep.all():
+                    df, months, numbers = df[keep], months[keep], numbers[keep]
+            n = len(df)
+            id_months.append(months)
+            id_numbers.append(numbers)
+            categories.append(_encode_categories(df['category'] if 'category' in df else [None] * n))
+            subcategories.append(_encode_categories(df['subcategory'] if 'subcategory' in df else [None] * n))
+            submitted_days.append(_to_days(df['submitted_on']) if 'submitted_on' in df
+                                  else np.full(n, MISSING_DAY, np.int32))
+            scraped_seconds.append(_to_seconds(df['scraped_at']) if 'scraped_at' in df
+                                   else np.full(n, MISSING_SECONDS, np.int64))
+            if texts is None:
+                texts = {column: StringBufferBuilder(block_size) for column in TEXT_COLUMNS if column in df}
+            for column, builder in texts.items():
+                builder.extend(df[column] if column in df else [None] * n)
+        
+        def concatenate(arrays, dtype):
+            return np.concatenate(arrays) if arrays else np.zeros(0, dtype=dtype)
+        
+        category_codes, category_names = _merge_categories(categories)
+        subcategory_codes, subcategory_names = _merge_categories(subcategories)
+        return cls(concatenate(id_months, np.uint16), concatenate(id_numbers, np.uint32),
+                   category_codes, category_names, subcategory_codes, subcategory_names,
+                   concatenate(submitted_days, np.int32), concatenate(scraped_seconds, np.int64),
+                   {column: builder.build() for column, builder in (texts or {}).items()})
+    
+    @classmethod
+    def load(cls, columns=None, months=None, compress_text=True, data_dir=DATA_DIR):
+        """
+        Load the deduplicated corpus one month at a time and compact it.
+        
+        Months are read through their Parquet mirrors (or the CSVs) and packed
+        one by one, so the full corpus never exists as a DataFrame. Rows match
+        load_corpus(): month order, first occurrence of a paper ID wins.
+        
+        Args:
+            columns (list): Columns to keep (paper_id is always kept; default: all)
+            months (list): YYMM prefixes to include (default: all)
+            compress_text (bool): Block-compress the text buffers
+            data_dir (str): Folder containing the month CSVs
+        """
+        if columns is not None:
+            columns = list(dict.fromkeys(['paper_id'] + columns))
+        csv_files = [f for f in list_month_files(data_dir) if months is None or month_of(f) in months]
+        frames = (read_month(csv_path, columns) for csv_path in csv_files)
+        return cls.from_frames(frames, compress_text, drop_duplicates=True)
+    
+    def __len__(self):
+        return len(self.id_numbers)
+    
+    def paper_id(self, index):
+        """Return the arXiv ID of one row (e.g., 2511.00010)."""
+        month = int(self.id_months[index])
+        # IDs from before 2015 have four-digit sequence numbers
+        width = 5 if month >= 1501 else 4
+        return f"{month:04d}.{int(self.id_numbers[index]):0{width}d}"
+    
+    def paper_ids(self):
+        """Return all paper IDs as a list of strings."""
+        return [self.paper_id(i) for i in range(len(self))]
+    
+    def url(self, index):
+        """Return the abs page URL of one row."""
+        return f"https://arxiv.org/abs/{self.paper_id(index)}"
+    
+    def subcategory(self, index):
+        """Return the subcategory name of one row, or None."""
+        code = self.subcategory_codes[index]
+        return self.subcategories[code] if code >= 0 else None
+    
+    def text(self, column, index):
+        """Return og_title, abstract or summary of one row ('' when missing)."""
+        return self.texts[column][index]
+    
+    def abstract(self, index):
+        """Return the abstract of one row."""
+        return self.texts['abstract'][index]
+    
+    def submitted_dates(self):
+        """Return submission dates as a datetime64[D] array (NaT when unknown)."""
+        dates = self.submitted_days.astype('datetime64[D]')
+        dates[self.submitted_days == MISSING_DAY] = np.datetime64('NaT')
+        return dates
+    
+    def scraped_times(self):
+        """Return scrape timestamps as a datetime64[s] array (NaT when unknown)."""
+        times = self.scraped_seconds.astype('datetime64[s]')
+        times[self.scraped_seconds == MISSING_SECONDS] = np.datetime64('NaT')
+        return times
+    
+    def find(self, paper_id):
+        """
+        Return the row index of a paper ID, or None.
+        
+        Args:
+            paper_id (str): arXiv ID (e.g., 2511.00010)
+        """
+        match = PAPER_ID_PATTERN.match(paper_id.strip())
+        if not match:
+            return None
+        hits = np.flatnonzero((self.id_months == int(match.group(1))) & (self.id_numbers == int(match.group(2))))
+        return int(hits[0]) if len(hits) else None
+    
+    def to_frame(self, columns=None):
+        """
+        Expand back into a pandas DataFrame for code that needs one.
+        
+        Args:
+            columns (list): Columns to build (default: all available)
+        """
+        builders = {
+            'paper_id': self.paper_ids,
+            'url': lambda: [self.url(i) for i in range(len(self))],
+            'category': lambda: pd.Categorical.from_codes(self.category_codes, self.categories),
+            'subcategory': lambda: pd.Categorical.from_codes(self.subcategory_codes, self.subcategories),
+            'submitted_on': self.submitted_dates,
+            'scraped_at': self.scraped_times,
+        }
+        for column, buffer in self.texts.items():
+            builders[column] = lambda buffer=buffer: [buffer[i] or None for i in range(len(buffer))]
+        columns = columns or [column for column in builders if column not in TEXT_COLUMNS or column in self.texts]
+        return pd.DataFrame({column: builders[column]() for column in columns})
+    
+    @property
+    def nbytes(self):
+        """Approximate resident size of the arrays and buffers in bytes."""
+        arrays = [self.id_months, self.id_numbers, self.category_codes, self.subcategory_codes,
+                  self.submitted_days, self.scraped_seconds]
+        return sum(array.nbytes for array in arrays) + sum(buffer.nbytes for buffer in self.texts.values())
+
+def main():
+    """Print the memory use of the corpus as a pandas frame and as a CompactCorpus."""
+    df = load_corpus()
+    frame_bytes = df.memory_usage(deep=True).sum()
+    
+    print("=" * 80)
+    print(f"Papers:                       {len(df):,}")
+    print(f"pandas frame:                 {frame_bytes / 1024 ** 2:>10.1f} MB")
+    for label, compress_text in (('CompactCorpus:', False), ('CompactCorpus (compressed):', True)):
+        corpus = CompactCorpus.from_frame(df, compress_text)
+        print(f"{label:<29} {corpus.nbytes / 1024 ** 2:>10.1f} MB  ({frame_bytes / corpus.nbytes:.1f}x smaller)")
+        for column, buffer in corpus.texts.items():
+            print(f"  {column:<27} {buffer.nbytes / 1024 ** 2:>10.1f} MB")
+    print("=" * 80)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,573 @@
+#!/usr/bin/env python3
+"""
+Embedding index over abstracts
+
+Dense vectors for every paper's abstract (or summary), for semantic search
+("papers like this one / like this text") and near-duplicate detection
+across the whole corpus, without an LLM reading a sample.
+
+The index lives in data/embeddings/<field>/:
+    vectors.f16     Row-major float16 matrix, one L2-normalized row per paper,
+                    opened as a read-only memory map
+    paper_ids.txt   Paper ID of each row, one per line, in row order
+    meta.json       Embedder settings, row count, and the size and mtime of
+                    each month CSV when it was last read
+    idf.npy         Inverse document frequencies (hashing embedder only)
+
+Embedders:
+    hashing                Signed feature hashing of words and word pairs,
+                           sublinear TF weighted by IDF (default; NumPy only)
+    sentence-transformers  A local model on CPU (default all-MiniLM-L6-v2),
+                           if the sentence-transformers package is installed
+
+update() re-reads only months whose CSV changed since the last update and
+embeds papers not yet in the index, appending to the vector and ID files;
+meta.json is replaced last, so a crash mid-update leaves the previous
+index intact (extra bytes beyond the recorded row count are ignored and
+overwritten next time). arxiv_scraper.py and oai_harvester.py call it
+after saving papers when the index exists. The IDF weights are fitted when
+the index is built; --rebuild refits them.
+
+Queries are batched matrix products over blocks of rows, so a query over
+the full corpus touches each row once and memory stays at one block.
+Scores are cosine similarities.
+
+Usage from other folders:
+    sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'storage'))
+    from embedding_index import EmbeddingIndex
+    index = EmbeddingIndex()
+    index.update()
+    for paper_id, score in index.search('retrieval-augmented generation test coverage', k=10):
+        ...
+
+Usage as a script:
+    python embedding_index.py                           # Build or update the index
+    python embedding_index.py --rebuild [--embedder E]  # Re-embed everything
+    python embedding_index.py --query "graph neural networks for chip placement"
+    python embedding_index.py --similar 2511.00010      # Nearest papers to one paper
+    python embedding_index.py --duplicates [--months 2511] [--threshold 0.9]
+"""
+
+import argparse
+import fcntl
+import json
+import os
+import re
+import shutil
+import time
+import zlib
+
+import numpy as np
+
+from paper_index import PaperIndex
+from paper_store import DATA_DIR, list_month_files, month_of, read_month, source_signature
+
+EMBEDDINGS_DIR = os.path.join(DATA_DIR, 'embeddings')
+FIELDS = ('abstract', 'summary')
+
+DEFAULT_HASHING_DIM = 512
+DEFAULT_MODEL = 'all-MiniLM-L6-v2'
+EMBED_BATCH_SIZE = 1024  # Texts embedded (and appended) at a time
+SEARCH_BLOCK_ROWS = 32768  # Rows of the matrix multiplied per block during a search
+QUERY_BATCH_SIZE = 512  # Queries scored together by near_duplicates()
+
+TOKEN_PATTERN = re.compile(r"[a-z0-9]+(?:[-'][a-z0-9]+)*")
+
+class HashingEmbedder:
+    """
+    Feature-hashing TF-IDF embedder: no model, no vocabulary, stable across runs.
+    
+    Words and adjacent word pairs are hashed (CRC32) into `dim` buckets with
+    a hash-derived sign, counts are damped to 1 + log(count), weighted by
+    IDF and L2-normalized.
+    """
+    
+    name = 'hashing'
+    
+    def __init__(self, dim=DEFAULT_HASHING_DIM, idf=None):
+        self.dim = dim
+        self.idf = idf
+    
+    def _hashes(self, text):
+        words = TOKEN_PATTERN.findall(text.lower())
+        features = words + [f"{a} {b}" for a, b in zip(words, words[1:])]
+        return np.fromiter((zlib.crc32(feature.encode('utf-8')) for feature in features),
+                           dtype=np.uint32, count=len(features))
+    
+    def fit(self, texts):
+        """
+        Fit IDF weights from document frequencies of the hashed features.
+        
+        Args:
+            texts (iterable): Corpus texts (read once)
+        """
+        document_counts = np.zeros(self.dim, dtype=np.int64)
+        documents = 0
+        for text in texts:
+            document_counts[np.unique(self._hashes(text) % self.dim)] += 1
+            documents += 1
+        self.idf = (np.log((1 + documents) / (1 + document_counts)) + 1).astype(np.float32)
+    
+    def embed(self, texts):
+        """
+        Embed texts.
+        
+        Args:
+            texts (list): Strings
+        
+        Returns:
+            ndarray: float32 matrix (len(texts) x dim), rows L2-normalized
+                     (all zeros for a text without words)
+        """
+        vectors = np.zeros((len(texts), self.dim), dtype=np.float32)
+        for row, text in enumerate(texts):
+            hashes = self._hashes(text)
+            if not len(hashes):
+                continue
+            signs = np.where(hashes & 0x80000000, -1.0, 1.0)
+            counts = np.bincount(hashes % self.dim, weights=signs, minlength=self.dim)
+            vectors[row] = np.sign(counts) * np.log1p(np.abs(counts))
+        if self.idf is not None:
+            vectors *= self.idf
+        return normalize_rows(vectors)
+    
+    def settings(self):
+        return {'embedder': self.name, 'dim': self.dim}
+
+class SentenceTransformerEmbedder:
+    """
+    A local sentence-transformers model, run on CPU.
+    
+    The package (and torch with it) is imported only when this embedder is
+    created, so importing this module stays cheap for the scrapers.
+    """
+    
+    name = 'sentence-transformers'
+    
+    def __init__(self, model=DEFAULT_MODEL):
+        try:
+            from sentence_transformers import SentenceTransformer
+        except ImportError:
+            raise RuntimeError("sentence-transformers is not installed (pip install sentence-transformers), "
+                               "use the hashing embedder instead")
+        self.model_name = model
+        self.model = SentenceTransformer(model, device='cpu')
+        self.dim = self.model.get_sentence_embedding_dimension()
+        self.idf = None
+    
+    def fit(self, texts):
+        """Nothing to fit: the model is pretrained."""
+    
+    def embed(self, texts):
+        vectors = self.model.encode(list(texts), batch_size=64, convert_to_numpy=True, normalize_embeddings=True)
+        return vectors.astype(np.float32)
+    
+    def settings(self):
+        return {'embedder': self.name, 'model': self.model_name, 'dim': self.dim}
+
+def create_embedder(name='hashing', dim=DEFAULT_HASHING_DIM, model=DEFAULT_MODEL):
+    """
+    Create an embedder by name.
+    
+    Args:
+        name (str): 'hashing' or 'sentence-transformers'
+        dim (int): Vector size of the hashing embedder
+        model (str): Model name for sentence-transformers
+    
+    Raises:
+        ValueError: If the name is unknown
+    """
+    if name == 'hashing':
+        return HashingEmbedder(dim)
+    if name == 'sentence-transformers':
+        return SentenceTransformerEmbedder(model)
+    raise ValueError(f"Unknown embedder '{name}' (choose from hashing, sentence-transformers)")
+
+def normalize_rows(vectors):
+    """L2-normalize the rows of a float32 matrix in place (zero rows stay zero)."""
+    norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+    np.divide(vectors, norms, out=vectors, where=norms > 0)
+    return vectors
+
+def top_k(scores, k):
+    """
+    Return the indices and values of the k highest scores in each row.
+    
+    Args:
+        scores (ndarray): Matrix (queries x candidates)
+        k (int): Number of results per row
+    
+    Returns:
+        tuple: (indices, values), both queries x min(k, candidates), best first
+    """
+    k = min(k, scores.shape[1])
+    indices = np.argpartition(-scores, k - 1, axis=1)[:, :k]
+    values = np.take_along_axis(scores, indices, axis=1)
+    order = np.argsort(-values, axis=1)
+    return np.take_along_axis(indices, order, axis=1), np.take_along_axis(values, order, axis=1)
+
+class EmbeddingIndex:
+    """Memory-mapped embedding matrix with the paper ID of each row."""
+    
+    def __init__(self, field='abstract', path=None, data_dir=DATA_DIR):
+        if field not in FIELDS:
+            raise ValueError(f"Unknown field '{field}' (choose from {', '.join(FIELDS)})")
+        self.field = field
+        self.path = path or os.path.join(EMBEDDINGS_DIR, field)
+        self.data_dir = data_dir
+        self.meta_path = os.path.join(self.path, 'meta.json')
+        self.vectors_path = os.path.join(self.path, 'vectors.f16')
+        self.ids_path = os.path.join(self.path, 'paper_ids.txt')
+        self.idf_path = os.path.join(self.path, 'idf.npy')
+        self.embedder = None
+        self._load()
+    
+    def exists(self):
+        """Return True if the index has been built."""
+        return self.meta is not None
+    
+    def __len__(self):
+        return self.meta['rows'] if self.meta else 0
+    
+    def _load(self):
+        """(Re)read the metadata, paper IDs and vector memory map from disk."""
+        self.meta = None
+        self.paper_ids = []
+        self.rows = {}
+        self.vectors = None
+        if not os.path.isfile(self.meta_path):
+            return
+        with open(self.meta_path, 'r', encoding='utf-8') as f:
+            self.meta = json.load(f)
+        rows = self.meta['rows']
+        with open(self.ids_path, 'r', encoding='utf-8') as f:
+            # Lines beyond the recorded row count are from an interrupted update
+            self.paper_ids = [line.rstrip('\n') for _, line in zip(range(rows), f)]
+        self.rows = {paper_id: row for row, paper_id in enumerate(self.paper_ids)}
+        if rows:
+            self.vectors = np.memmap(self.vectors_path, dtype=np.float16, mode='r', shape=(rows, self.meta['dim']))
+        if self.embedder is None:
+            self.embedder = self._open_embedder()
+    
+    def _open_embedder(self):
+        if self.meta['embedder'] == 'hashing':
+            idf = np.load(self.idf_path) if os.path.isfile(self.idf_path) else None
+            return HashingEmbedder(self.meta['dim'], idf)
+        return SentenceTransformerEmbedder(self.meta['model'])
+    
+    def _texts(self, csv_path):
+        """Read (paper_id, text) pairs of one month with a non-empty text, first occurrence per ID."""
+        df = read_month(csv_path, columns=['paper_id', self.field])
+        df = df[df[self.field].notna() & (df[self.field].str.strip() != '')].drop_duplicates('paper_id')
+        return zip(df['paper_id'].tolist(), df[self.field].tolist())
+    
+    def _write_meta(self, meta):
+        tmp_path = f"{self.meta_path}.tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(meta, f, indent=2)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, self.meta_path)
+    
+    def build(self, embedder=None, verbose=True):
+        """
+        Embed the whole corpus from scratch, replacing any existing index.
+        
+        Args:
+            embedder: HashingEmbedder or SentenceTransformerEmbedder (default:
+                      hashing, or the embedder of the existing index)
+            verbose (bool): Print progress
+        
+        Returns:
+            int: Papers embedded
+        """
+        embedder = embedder or self.embedder or HashingEmbedder()
+        os.makedirs(self.path, exist_ok=True)
+        with self._locked():
+            csv_files = list_month_files(self.data_dir)
+            if embedder.name == 'hashing':
+                if verbose:
+                    print(f"Fitting IDF weights on {len(csv_files)} months...")
+                embedder.fit(text for csv_path in csv_files for _, text in self._texts(csv_path))
+                np.save(self.idf_path, embedder.idf)
+            elif os.path.isfile(self.idf_path):
+                os.remove(self.idf_path)
+            for path in (self.vectors_path, self.ids_path):
+                open(path, 'wb').close()
+            self._write_meta(dict(embedder.settings(), field=self.field, rows=0, months={},
+                                  built_at=time.strftime('%Y-%m-%dT%H:%M:%S')))
+            self.embedder = embedder
+            self._load()
+            return self._update(verbose)
+    
+    def update(self, verbose=True):
+        """
+        Embed papers of months whose CSV changed since the last update.
+        
+        Builds the index first if there is none.
+        
+        Returns:
+            int: Papers added
+        """
+        if not self.exists():
+            return self.build(verbose=verbose)
+        with self._locked():
+            self._load()  # Another process may have updated the index
+            return self._update(verbose)
+    
+    def _update(self, verbose):
+        meta = dict(self.meta)
+        months = dict(meta['months'])
+        dim = meta['dim']
+        rows = meta['rows']
+        added = 0
+        
+        # Drop anything an interrupted update wrote past the recorded rows
+        with open(self.vectors_path, 'ab') as f:
+            f.truncate(rows * dim * 2)
+        with open(self.ids_path, 'ab') as f:
+            f.truncate(sum(len(paper_id.encode('utf-8')) + 1 for paper_id in self.paper_ids))
+        
+        known = set(self.paper_ids)
+        for csv_path in list_month_files(self.data_dir):
+            month = month_of(csv_path)
+            signature = list(source_signature(csv_path))
+            if months.get(month) == signature:
+                continue
+            new = [(paper_id, text) for paper_id, text in self._texts(csv_path) if paper_id not in known]
+            with open(self.vectors_path, 'ab') as vectors_file, open(self.ids_path, 'a', encoding='utf-8') as ids_file:
+                for start in range(0, len(new), EMBED_BATCH_SIZE):
+                    batch = new[start:start + EMBED_BATCH_SIZE]
+                    vectors = self.embedder.embed([text for _, text in batch])
+                    vectors_file.write(vectors.astype('<f2').tobytes())
+                    ids_file.writelines(f"{paper_id}\n" for paper_id, _ in batch)
+                vectors_file.flush()
+                os.fsync(vectors_file.fileno())
+                ids_file.flush()
+                os.fsync(ids_file.fileno())
+            known.update(paper_id for paper_id, _ in new)
+            rows += len(new)
+            added += len(new)
+            months[month] = signature
+            meta.update(rows=rows, months=months)
+            self._write_meta(meta)
+            if verbose and new:
+                print(f"  ✓ Embedded {len(new):,} papers from {os.path.basename(csv_path)}")
+        self._load()
+        return added
+    
+    def _locked(self):
+        """Exclusive lock on the index directory, so concurrent updates (e.g. backfill workers) take turns."""
+        os.makedirs(self.path, exist_ok=True)
+        return _FileLock(os.path.join(self.path, 'lock'))
+    
+    def search_vectors(self, queries, k=10, exclude_rows=None):
+        """
+        Find the k rows most similar to each query vector.
+        
+        Args:
+            queries (ndarray): float32 matrix (n x dim), rows L2-normalized
+            k (int): Results per query
+            exclude_rows (list): Row number to leave out of each query's results
+                                 (e.g. the query paper itself), or None
+        
+        Returns:
+            tuple: (rows, scores), both n x min(k, len(index)), best first
+        """
+        queries = np.asarray(queries, dtype=np.float32)
+        n = len(queries)
+        best_rows = np.zeros((n, 0), dtype=np.int64)
+        best_scores = np.zeros((n, 0), dtype=np.float32)
+        if self.vectors is None:
+            return best_rows, best_scores
+        for start in range(0, len(self.vectors), SEARCH_BLOCK_ROWS):
+            block = np.asarray(self.vectors[start:start + SEARCH_BLOCK_ROWS], dtype=np.float32)
+            scores = queries @ block.T
+            if exclude_rows is not None:
+                for query, row in enumerate(exclude_rows):
+                    if start <= row < start + len(block):
+                        scores[query, row - start] = -np.inf
+            rows, values = top_k(scores, k)
+            # Merge this block's best with the best so far
+            candidates = np.concatenate([best_rows, rows + start], axis=1)
+            candidate_scores = np.concatenate([best_scores, values], axis=1)
+            order, best_scores = top_k(candidate_scores, k)
+            best_rows = np.take_along_axis(candidates, order, axis=1)
+        return best_rows, best_scores
+    
+    def search(self, text, k=10):
+        """
+        Find the papers most similar to a piece of text.
+        
+        Returns:
+            list: (paper_id, cosine similarity) tuples, best first; papers with
+                  nothing in common with the text are left out
+        """
+        return self.search_many([text], k)[0]
+    
+    def search_many(self, texts, k=10):
+        """Run search() for several texts with one pass over the matrix."""
+        rows, scores = self.search_vectors(self.embedder.embed(list(texts)), k)
+        return [self._results(query_rows, query_scores) for query_rows, query_scores in zip(rows, scores)]
+    
+    def similar(self, paper_id, k=10):
+        """
+        Find the papers most similar to an indexed paper (excluding itself).
+        
+        Returns:
+            list: (paper_id, cosine similarity) tuples, or None if the paper is not indexed
+        """
+        row = self.rows.get(paper_id)
+        if row is None:
+            return None
+        rows, scores = self.search_vectors(np.asarray(self.vectors[row:row + 1], dtype=np.float32), k, [row])
+        return self._results(rows[0], scores[0])
+    
+    def near_duplicates(self, paper_ids=None, threshold=0.9, k=5, verbose=False):
+        """
+        Find pairs of papers whose vectors are at least `threshold` similar.
+        
+        Args:
+            paper_ids (list): Papers to check against the whole index (default:
+                              every indexed paper)
+            threshold (float): Minimum cosine similarity
+            k (int): Neighbours examined per paper
+            verbose (bool): Print progress per batch of queries
+        
+        Returns:
+            list: (paper_id, other_paper_id, similarity) tuples, each pair once,
+                  most similar first
+        """
+        if paper_ids is None:
+            query_rows = list(range(len(self)))
+        else:
+            query_rows = [self.rows[paper_id] for paper_id in paper_ids if paper_id in self.rows]
+        pairs = {}
+        for start in range(0, len(query_rows), QUERY_BATCH_SIZE):
+            batch = query_rows[start:start + QUERY_BATCH_SIZE]
+            queries = np.asarray(self.vectors[batch], dtype=np.float32)
+            rows, scores = self.search_vectors(queries, k, batch)
+            for query_row, neighbour_rows, neighbour_scores in zip(batch, rows, scores):
+                for row, score in zip(neighbour_rows, neighbour_scores):
+                    if score < threshold:
+                        break
+                    pair = tuple(sorted((self.paper_ids[query_row], self.paper_ids[row])))
+                    pairs[pair] = max(pairs.get(pair, 0.0), float(score))
+            if verbose:
+                print(f"  Checked {min(start + QUERY_BATCH_SIZE, len(query_rows)):,}/{len(query_rows):,} papers, "
+                      f"{len(pairs):,} pairs so far")
+        return sorted(((a, b, score) for (a, b), score in pairs.items()), key=lambda pair: -pair[2])
+    
+    def _results(self, rows, scores):
+        # A score of 0 means nothing in common (e.g. a query without any words)
+        return [(self.paper_ids[row], float(score)) for row, score in zip(rows, scores) if np.isfinite(score) and score > 0]
+
+class _FileLock:
+    """Context manager holding an exclusive flock on a lock file."""
+    
+    def __init__(self, path):
+        self.path = path
+        self.file = None
+    
+    def __enter__(self):
+        self.file = open(self.path, 'a')
+        fcntl.flock(self.file.fileno(), fcntl.LOCK_EX)
+        return self
+    
+    def __exit__(self, *exc_info):
+        fcntl.flock(self.file.fileno(), fcntl.LOCK_UN)
+        self.file.close()
+
+def update_embeddings(verbose=True):
+    """
+    Update every embedding index that has been built (for the scrapers to call after saving papers).
+    
+    Returns:
+        int: Papers added across the indexes
+    """
+    added = 0
+    for field in FIELDS:
+        index = EmbeddingIndex(field)
+        if index.exists():
+            if verbose:
+                print(f"Updating the {field} embedding index...")
+            added += index.update(verbose=verbose)
+    return added
+
+def print_results(results, paper_index=None):
+    """Print (paper_id, score) results with titles read through the paper index."""
+    for paper_id, score in results:
+        title = ''
+        if paper_index is not None:
+            row = paper_index.read_paper(paper_id)
+            title = (row or {}).get('og_title', '')
+        print(f"  {score:.3f}  {paper_id}  {title[:64]}")
+
+def main():
+    """Build or update the index, or run a query against it."""
+    parser = argparse.ArgumentParser(description='Build and query the embedding index over abstracts.')
+    parser.add_argument('--field', choices=FIELDS, default='abstract', help='Text to embed (default: abstract)')
+    parser.add_argument('--rebuild', action='store_true', help='Re-embed every paper (refits IDF weights)')
+    parser.add_argument('--embedder', choices=['hashing', 'sentence-transformers'],
+                        help='Embedder for a new or rebuilt index (default: hashing, or the current one)')
+    parser.add_argument('--dim', type=int, default=DEFAULT_HASHING_DIM,
+                        help=f'Vector size for the hashing embedder (default: {DEFAULT_HASHING_DIM})')
+    parser.add_argument('--model', default=DEFAULT_MODEL, help=f'sentence-transformers model (default: {DEFAULT_MODEL})')
+    parser.add_argument('--query', help='Find papers similar to this text')
+    parser.add_argument('--similar', metavar='PAPER_ID', help='Find papers similar to this paper')
+    parser.add_argument('--duplicates', action='store_true', help='List near-duplicate pairs')
+    parser.add_argument('--months', nargs='+', help='With --duplicates, only check papers of these months')
+    parser.add_argument('--threshold', type=float, default=0.9, help='Similarity for --duplicates (default: 0.9)')
+    parser.add_argument('-k', type=int, default=10, help='Number of results (default: 10)')
+    args = parser.parse_args()
+    
+    index = EmbeddingIndex(args.field)
+    started = time.perf_counter()
+    if args.rebuild or (args.embedder and not index.exists()):
+        if os.path.isdir(index.path):
+            shutil.rmtree(index.path)
+        index = EmbeddingIndex(args.field)
+        print(f"Building the {args.field} embedding index...")
+        added = index.build(create_embedder(args.embedder or 'hashing', args.dim, args.model))
+    else:
+        print(f"Updating the {args.field} embedding index...")
+        added = index.update()
+    if added:
+        print(f"✓ Embedded {added:,} papers in {time.perf_counter() - started:.1f}s")
+    
+    # Titles are read through the paper index, so bring it up to date with the CSVs first
+    paper_index = PaperIndex()
+    paper_index.refresh()
+    try:
+        if args.query:
+            print(f"\nMost similar to: {args.query[:70]}")
+            print_results(index.search(args.query, args.k), paper_index)
+        elif args.similar:
+            results = index.similar(args.similar, args.k)
+            if results is None:
+                print(f"✗ {args.similar}: not in the index")
+                return
+            print(f"\nMost similar to {args.similar}:")
+            print_results(results, paper_index)
+        elif args.duplicates:
+            paper_ids = None
+            if args.months:
+                paper_ids = [paper_id for paper_id in index.paper_ids if paper_id.split('.')[0] in args.months]
+            pairs = index.near_duplicates(paper_ids, args.threshold, verbose=True)
+            print(f"\n{len(pairs):,} pairs with similarity >= {args.threshold}")
+            for paper_id, other, score in pairs[:50]:
+                print(f"  {score:.3f}  {paper_id}  {other}")
+        else:
+            size = os.path.getsize(index.vectors_path) if os.path.isfile(index.vectors_path) else 0
+            print("=" * 80)
+            print(f"Index: {index.path}")
+            print(f"Embedder:       {index.meta['embedder']} ({index.meta['dim']} dimensions)")
+            print(f"Papers:         {len(index):,}")
+            print(f"Months:         {len(index.meta['months'])}")
+            print(f"Vectors:        {size / 1024 ** 2:.1f} MB (float16)")
+            print("=" * 80)
+    finally:
+        paper_index.close()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,350 @@
+#!/usr/bin/env python3
+"""
+Persistent paper ID index
+
+A SQLite database (data/paper_index.sqlite) mapping every paper ID to the
+month CSV that contains it and the byte offset and length of its row. It
+answers "do we already have paper X, and where?" without reading any month,
+and lets a single paper be read with one seek.
+
+The writers keep it current: BufferedCsvWriter records the offset of every
+row it flushes. For files changed by other tools, refresh_month() compares
+the CSV's size and mtime with the indexed values; when a file only grew, it
+scans just the new bytes, otherwise it rescans the whole month.
+
+A paper that appears in more than one month has one entry per month;
+lookups return the earliest month, matching the deduplication order used by
+paper_store.load_corpus().
+
+Usage from other folders:
+    sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'storage'))
+    from paper_index import PaperIndex
+    index = PaperIndex()
+    row = index.read_paper('2511.00010')
+
+Usage as a script:
+    python paper_index.py                 # Refresh and show index statistics
+    python paper_index.py 2511.00010 ...  # Print where papers are stored, and their rows
+    python paper_index.py --rebuild       # Drop and rebuild the index
+"""
+
+import argparse
+import csv
+import io
+import os
+import sqlite3
+import threading
+
+from paper_store import DATA_DIR, list_month_files, month_file, month_of, source_signature
+
+INDEX_PATH = os.path.join(DATA_DIR, 'paper_index.sqlite')
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS papers (
+    paper_id TEXT NOT NULL,
+    month TEXT NOT NULL,
+    offset INTEGER NOT NULL,
+    length INTEGER NOT NULL,
+    PRIMARY KEY (paper_id, month)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS papers_by_month ON papers (month);
+CREATE TABLE IF NOT EXISTS files (
+    month TEXT PRIMARY KEY,
+    size INTEGER NOT NULL,
+    mtime_ns INTEGER NOT NULL
+);
+"""
+
+def scan_records(csv_path, start=0):
+    """
+    Yield (paper_id, offset, length) for every row of a month CSV.
+    
+    Rows are split on newlines outside quoted fields, so abstracts that
+    contain line breaks are handled. paper_id is the first column and never
+    contains a comma.
+    
+    Args:
+        csv_path (str): Month CSV path
+        start (int): Byte offset of the first row to read (0 skips the header)
+    """
+    with open(csv_path, 'rb') as f:
+        f.seek(start)
+        if start == 0:
+            start = len(f.readline())
+        offset = start
+        pending = b''
+        for line in f:
+            pending += line
+            if pending.count(b'"') % 2:
+                continue  # Newline inside a quoted field
+            paper_id = pending.split(b',', 1)[0].strip().strip(b'"').decode('utf-8')
+            if paper_id:
+                yield paper_id, offset, len(pending)
+            offset += len(pending)
+            pending = b''
+
+class PaperIndex:
+    """Thread-safe handle on the paper ID index."""
+    
+    def __init__(self, path=INDEX_PATH, data_dir=DATA_DIR):
+        self.path = path
+        self.data_dir = data_dir
+        self.lock = threading.Lock()
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        # Several scraper processes may write to the index at once (backfill.py)
+        self.db = sqlite3.connect(path, timeout=60, check_same_thread=False)
+        self.db.execute('PRAGMA journal_mode=WAL')
+        self.db.execute('PRAGMA synchronous=NORMAL')
+        self.db.executescript(SCHEMA)
+    
+    def close(self):
+        with self.lock:
+            self.db.close()
+    
+    def _file_entry(self, month):
+        row = self.db.execute('SELECT size, mtime_ns FROM files WHERE month = ?', (month,)).fetchone()
+        return tuple(row) if row else None
+    
+    def _tail_is_intact(self, csv_path, month):
+        """Check that the last indexed row of a month is still where the index says."""
+        row = self.db.execute(
+            'SELECT paper_id, offset, length FROM papers WHERE month = ? ORDER BY offset DESC LIMIT 1', (month,)
+        ).fetchone()
+        if row is None:
+            return True
+        paper_id, offset, length = row
+        with open(csv_path, 'rb') as f:
+            f.seek(offset)
+            record = f.read(length)
+        return record.split(b',', 1)[0].strip().strip(b'"').decode('utf-8', 'replace') == paper_id and record.endswith(b'\n')
+    
+    def refresh_month(self, csv_path):
+        """
+        Bring the entries of one month up to date with its CSV.
+        
+        Returns:
+            int: Number of rows scanned (0 if the month was already current)
+        """
+        month = month_of(csv_path)
+        with self.lock:
+            entry = self._file_entry(month)
+            if not os.path.isfile(csv_path):
+                if entry:
+                    with self.db:
+                        self.db.execute('DELETE FROM papers WHERE month = ?', (month,))
+                        self.db.execute('DELETE FROM files WHERE month = ?', (month,))
+                return 0
+            
+            size, mtime_ns = source_signature(csv_path)
+            if entry == (size, mtime_ns):
+                return 0
+            
+            # Appended to since the last refresh: only the new bytes need scanning
+            appended = entry is not None and size > entry[0] and self._tail_is_intact(csv_path, month)
+            start = entry[0] if appended else 0
+            rows = [(paper_id, month, offset, length) for paper_id, offset, length in scan_records(csv_path, start)]
+            with self.db:
+                if not appended:
+                    self.db.execute('DELETE FROM papers WHERE month = ?', (month,))
+                # First occurrence within a month wins, like drop_duplicates()
+                self.db.executemany('INSERT OR IGNORE INTO papers VALUES (?, ?, ?, ?)', rows)
+                self.db.execute('INSERT OR REPLACE INTO files VALUES (?, ?, ?)', (month, size, mtime_ns))
+            return len(rows)
+    
+    def refresh(self, verbose=False):
+        """
+        Refresh every month, and drop months whose CSV no longer exists.
+        
+        Returns:
+            int: Number of rows scanned
+        """
+        csv_files = list_month_files(self.data_dir)
+        present = {month_of(f) for f in csv_files}
+        scanned = 0
+        for csv_path in csv_files:
+            count = self.refresh_month(csv_path)
+            scanned += count
+            if verbose and count:
+                print(f"  ✓ Indexed {count:,} rows of {os.path.basename(csv_path)}")
+        with self.lock:
+            indexed = [row[0] for row in self.db.execute('SELECT month FROM files')]
+        for month in indexed:
+            if month not in present:
+                self.refresh_month(month_file(month, self.data_dir))
+        return scanned
+    
+    def record_rows(self, csv_path, rows, previous_size):
+        """
+        Record rows that a writer just appended to a month CSV.
+        
+        If the index covered the file up to previous_size, the rows are
+        inserted directly and the file signature is updated; otherwise the
+        month is refreshed from disk, which picks the rows up as well. Call
+        after the rows are flushed.
+        
+        Args:
+            csv_path (str): Month CSV path
+            rows (list): (paper_id, offset, length) tuples
+            previous_size (int): File size before the rows were written
+        """
+        month = month_of(csv_path)
+        with self.lock:
+            entry = self._file_entry(month)
+            if entry is not None and entry[0] == previous_size:
+                size, mtime_ns = source_signature(csv_path)
+                with self.db:
+                    self.db.executemany(
+                        'INSERT OR IGNORE INTO papers VALUES (?, ?, ?, ?)',
+                        [(paper_id, month, offset, length) for paper_id, offset, length in rows]
+                    )
+                    self.db.execute('INSERT OR REPLACE INTO files VALUES (?, ?, ?)', (month, size, mtime_ns))
+                return
+        self.refresh_month(csv_path)
+    
+    def lookup(self, paper_id, month=None):
+        """
+        Find where a paper is stored.
+        
+        Args:
+            paper_id (str): arXiv ID (e.g., 2511.00010)
+            month (str): Only look in this month file (default: any)
+        
+        Returns:
+            tuple: (csv_path, offset, length) for the earliest month containing
+                   the paper, or None
+        """
+        with self.lock:
+            if month is None:
+                row = self.db.execute(
+                    'SELECT month, offset, length FROM papers WHERE paper_id = ? ORDER BY month LIMIT 1', (paper_id,)
+                ).fetchone()
+            else:
+                row = self.db.execute(
+                    'SELECT month, offset, length FROM papers WHERE paper_id = ? AND month = ?', (paper_id, month)
+                ).fetchone()
+        if row is None:
+            return None
+        month, offset, length = row
+        return month_file(month, self.data_dir), offset, length
+    
+    def contains(self, paper_id):
+        """Return True if the paper is stored in any month."""
+        with self.lock:
+            return self.db.execute('SELECT 1 FROM papers WHERE paper_id = ? LIMIT 1', (paper_id,)).fetchone() is not None
+    
+    def months_of(self, paper_id):
+        """List every month file containing the paper, earliest first."""
+        with self.lock:
+            return [row[0] for row in self.db.execute(
+                'SELECT month FROM papers WHERE paper_id = ? ORDER BY month', (paper_id,)
+            )]
+    
+    def max_paper_id(self, month):
+        """Return the highest paper ID stored in a month's CSV, or None."""
+        with self.lock:
+            row = self.db.execute('SELECT MAX(paper_id) FROM papers WHERE month = ?', (month,)).fetchone()
+        return row[0] if row else None
+    
+    def _read_row(self, csv_path, offset, length):
+        """Read and parse the row at an offset; None if the bytes there are not a valid row."""
+        try:
+            with open(csv_path, 'rb') as f:
+                header = f.readline().decode('utf-8')
+                f.seek(offset)
+                record = f.read(length).decode('utf-8')
+            return next(csv.DictReader(io.StringIO(header + record)), None)
+        except (OSError, UnicodeDecodeError, csv.Error):
+            return None
+    
+    def read_paper(self, paper_id, month=None):
+        """
+        Read one paper's row with a single seek.
+        
+        If the month was rewritten (e.g. compacted) since it was indexed, the
+        stored offset may point into another row or the middle of a
+        character; the month is then refreshed and the read retried once.
+        
+        Args:
+            paper_id (str): arXiv ID (e.g., 2511.00010)
+            month (str): Read the copy in this month file (default: earliest)
+        
+        Returns:
+            dict: Column name to value (all strings), or None if not indexed
+                  or not readable
+        """
+        for attempt in range(2):
+            location = self.lookup(paper_id, month)
+            if location is None:
+                return None
+            csv_path, offset, length = location
+            row = self._read_row(csv_path, offset, length)
+            if row is not None and row.get('paper_id') == paper_id:
+                return row
+            if attempt == 0:
+                self.refresh_month(csv_path)
+        return None
+    
+    def duplicates(self):
+        """
+        List papers stored in more than one month.
+        
+        Returns:
+            list: (paper_id, [months]) tuples
+        """
+        with self.lock:
+            rows = self.db.execute(
+                'SELECT paper_id, GROUP_CONCAT(month) FROM papers GROUP BY paper_id HAVING COUNT(*) > 1'
+            ).fetchall()
+        return [(paper_id, sorted(months.split(','))) for paper_id, months in rows]
+    
+    def stats(self):
+        """Return (papers, unique_ids, months) counts."""
+        with self.lock:
+            papers, unique_ids = self.db.execute('SELECT COUNT(*), COUNT(DISTINCT paper_id) FROM papers').fetchone()
+            months = self.db.execute('SELECT COUNT(*) FROM files').fetchone()[0]
+        return papers, unique_ids, months
+
+def main():
+    """Refresh the index, then print statistics or look up the given papers."""
+    parser = argparse.ArgumentParser(description='Maintain and query the paper ID index.')
+    parser.add_argument('paper_ids', nargs='*', help='Paper IDs to look up (e.g., 2511.00010)')
+    parser.add_argument('--rebuild', action='store_true', help='Drop and rebuild the index')
+    args = parser.parse_args()
+    
+    if args.rebuild and os.path.isfile(INDEX_PATH):
+        for suffix in ('', '-wal', '-shm'):
+            if os.path.isfile(INDEX_PATH + suffix):
+                os.remove(INDEX_PATH + suffix)
+    index = PaperIndex()
+    index.refresh(verbose=True)
+    
+    if args.paper_ids:
+        for paper_id in args.paper_ids:
+            location = index.lookup(paper_id)
+            if location is None:
+                print(f"✗ {paper_id}: not found")
+                continue
+            csv_path, offset, length = location
+            print(f"✓ {paper_id}: {os.path.basename(csv_path)} at byte {offset:,} ({length:,} bytes)")
+            months = index.months_of(paper_id)
+            if len(months) > 1:
+                print(f"  ⚠ Also stored in: {', '.join(months[1:])}")
+            row = index.read_paper(paper_id)
+            print(f"  {row.get('og_title', '')[:76]}")
+            print(f"  {row.get('subcategory', '')}, submitted {row.get('submitted_on', '')}")
+        return
+    
+    papers, unique_ids, months = index.stats()
+    duplicates = index.duplicates()
+    print("=" * 80)
+    print(f"Index: {INDEX_PATH}")
+    print(f"Months indexed:              {months}")
+    print(f"Rows indexed:                {papers:,}")
+    print(f"Unique paper IDs:            {unique_ids:,}")
+    print(f"Papers in more than 1 month: {len(duplicates):,}")
+    for paper_id, dup_months in duplicates[:10]:
+        print(f"  - {paper_id}: {', '.join(dup_months)}")
+    print("=" * 80)
+
+if __name__ == "__main__":
+    main()
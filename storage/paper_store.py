@@ -0,0 +1,407 @@
+#!/usr/bin/env python3
+"""
+Shared storage layer for the monthly paper corpus.
+
+The month CSVs in data/ stay the source of truth (the scraper appends to
+them), but every reader loads through this module. For each
+YYMM_arxiv_papers.csv it keeps a typed Parquet mirror in data/parquet/:
+
+- paper_id, url, og_title, abstract, summary and scraped_at as strings
+  (paper_id is never parsed as a float, so 2511.00010 stays 2511.00010)
+- category and subcategory as categoricals
+- submitted_on as a datetime
+
+A mirror is rebuilt only when its CSV's size or modification time changes.
+Reads support column projection and filters that are pushed down to the
+Parquet reader. Without pyarrow installed, the same calls fall back to
+reading the CSVs directly.
+
+Analysis scripts use load_corpus(), which also caches the combined,
+deduplicated corpus in data/parquet/corpus.parquet. On each call only the
+months whose CSV changed since the cache was written are read again, so a
+warm start is a single Parquet read.
+
+Usage from other folders:
+    sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'storage'))
+    from paper_store import load_corpus
+    df = load_corpus(columns=['paper_id', 'subcategory', 'submitted_on'])
+
+Usage as a script:
+    python paper_store.py             # Build or refresh all mirrors
+"""
+
+import fcntl
+import glob
+import json
+import os
+from contextlib import contextmanager
+
+import pandas as pd
+
+try:
+    import pyarrow as pa
+    import pyarrow.csv as pa_csv
+    import pyarrow.parquet as pq
+    HAVE_PYARROW = True
+except ImportError:
+    HAVE_PYARROW = False
+
+DATA_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'data')
+MIRROR_DIR_NAME = 'parquet'
+CORPUS_CACHE_NAME = 'corpus.parquet'
+MONTH_FILE_PATTERN = '[0-9][0-9][0-9][0-9]_arxiv_papers.csv'
+
+COLUMNS = ['paper_id', 'url', 'og_title', 'category', 'subcategory', 'submitted_on', 'abstract', 'summary', 'scraped_at']
+CATEGORICAL_COLUMNS = ['category', 'subcategory']
+DATE_COLUMNS = ['submitted_on']
+# Extra column in the combined cache recording which month file a row came from
+SOURCE_MONTH_COLUMN = 'source_month'
+
+def list_month_files(data_dir=DATA_DIR):
+    """
+    List the month CSVs in the data folder, sorted by YYMM prefix.
+    
+    Returns:
+        list: CSV paths
+    """
+    return sorted(glob.glob(os.path.join(data_dir, MONTH_FILE_PATTERN)))
+
+def month_file(year_month_prefix, data_dir=DATA_DIR):
+    """Return the CSV path for a YYMM prefix."""
+    return os.path.join(data_dir, f"{year_month_prefix}_arxiv_papers.csv")
+
+def month_of(csv_path):
+    """Return the YYMM prefix of a month CSV path."""
+    return os.path.basename(csv_path).split('_')[0]
+
+def mirror_path(csv_path):
+    """Return the Parquet mirror path for a month CSV."""
+    name = os.path.splitext(os.path.basename(csv_path))[0] + '.parquet'
+    return os.path.join(os.path.dirname(csv_path), MIRROR_DIR_NAME, name)
+
+@contextmanager
+def month_lock(csv_path):
+    """
+    Hold an exclusive lock on a month CSV while appending to or replacing it.
+    
+    The lock is an flock on a sidecar (YYMM_arxiv_papers.lock) rather than on
+    the CSV itself, because tools that rewrite a month replace the CSV with a
+    new file. Writers that keep the CSV open must check, under the lock,
+    that their handle still refers to the file at csv_path.
+    """
+    lock_path = os.path.splitext(csv_path)[0] + '.lock'
+    with open(lock_path, 'a') as lock_file:
+        fcntl.flock(lock_file.fileno(), fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(lock_file.fileno(), fcntl.LOCK_UN)
+
+def source_signature(csv_path):
+    """Return (size, mtime_ns) of a CSV, used to detect changes."""
+    stat = os.stat(csv_path)
+    return stat.st_size, stat.st_mtime_ns
+
+def read_csv_typed(csv_path, columns=None, engine=None):
+    """
+    Parse a month CSV into the typed corpus schema.
+    
+    Only the requested columns are tokenized and kept, and every column has
+    a pinned type, so nothing is left to pandas' type inference (which
+    would, for example, turn the paper_id 2511.00010 into the float 2511.0001).
+    
+    Args:
+        csv_path (str): Month CSV path
+        columns (list): Columns to read (default: all)
+        engine (str): 'pyarrow' (multi-threaded, default when installed) or 'c'
+    
+    Returns:
+        DataFrame: Requested columns, typed as described in the module docstring
+    """
+    engine = engine or ('pyarrow' if HAVE_PYARROW else 'c')
+    if engine == 'pyarrow':
+        # pyarrow.csv directly rather than pandas' engine='pyarrow', which
+        # infers numeric types before applying dtype=str
+        table = pa_csv.read_csv(
+            csv_path,
+            parse_options=pa_csv.ParseOptions(newlines_in_values=True),
+            convert_options=pa_csv.ConvertOptions(
+                column_types={column: pa.string() for column in COLUMNS},
+                include_columns=columns,
+                strings_can_be_null=True
+            )
+        )
+        df = table.to_pandas()
+    else:
+        dtypes = {column: 'category' if column in CATEGORICAL_COLUMNS else str for column in COLUMNS}
+        df = pd.read_csv(csv_path, usecols=columns, dtype=dtypes, encoding='utf-8')
+    
+    for column in CATEGORICAL_COLUMNS:
+        if column in df.columns and df[column].dtype != 'category':
+            df[column] = df[column].astype('category')
+    for column in DATE_COLUMNS:
+        if column in df.columns:
+            df[column] = pd.to_datetime(df[column], format='mixed', dayfirst=False, errors='coerce')
+    return df[columns] if columns else df
+
+def _mirror_is_fresh(csv_path, parquet_path):
+    """Check whether a mirror was built from the current version of its CSV."""
+    if not os.path.isfile(parquet_path):
+        return False
+    try:
+        metadata = pq.read_schema(parquet_path).metadata or {}
+    except (OSError, pa.ArrowInvalid):
+        return False
+    size, mtime_ns = source_signature(csv_path)
+    return (metadata.get(b'source_size') == str(size).encode() and
+            metadata.get(b'source_mtime_ns') == str(mtime_ns).encode())
+
+def ensure_mirror(csv_path):
+    """
+    Build or refresh the Parquet mirror of a month CSV if it is stale.
+    
+    Args:
+        csv_path (str): Month CSV path
+    
+    Returns:
+        str: Mirror path, or None if pyarrow is not installed
+    """
+    if not HAVE_PYARROW:
+        return None
+    
+    parquet_path = mirror_path(csv_path)
+    if _mirror_is_fresh(csv_path, parquet_path):
+        return parquet_path
+    
+    size, mtime_ns = source_signature(csv_path)
+    df = read_csv_typed(csv_path)
+    table = pa.Table.from_pandas(df, preserve_index=False)
+    table = table.replace_schema_metadata({
+        **(table.schema.metadata or {}),
+        b'source_size': str(size).encode(),
+        b'source_mtime_ns': str(mtime_ns).encode()
+    })
+    
+    os.makedirs(os.path.dirname(parquet_path), exist_ok=True)
+    tmp_path = f"{parquet_path}.{os.getpid()}.tmp"
+    pq.write_table(table, tmp_path, row_group_size=10000, compression='zstd')
+    os.replace(tmp_path, parquet_path)
+    print(f"  ✓ Rebuilt Parquet mirror for {os.path.basename(csv_path)} ({len(df):,} papers)")
+    return parquet_path
+
+def _apply_filters(df, filters):
+    """
+    Apply filters in the pyarrow format ([(column, op, value), ...], all ANDed) to a DataFrame.
+    
+    Used when the data was not read through pyarrow.
+    """
+    operators = {
+        '==': lambda s, v: s == v,
+        '=': lambda s, v: s == v,
+        '!=': lambda s, v: s != v,
+        '<': lambda s, v: s < v,
+        '<=': lambda s, v: s <= v,
+        '>': lambda s, v: s > v,
+        '>=': lambda s, v: s >= v,
+        'in': lambda s, v: s.isin(v),
+        'not in': lambda s, v: ~s.isin(v),
+    }
+    mask = pd.Series(True, index=df.index)
+    for column, op, value in filters:
+        mask &= operators[op](df[column], value)
+    return df[mask]
+
+def read_month(csv_path, columns=None, filters=None):
+    """
+    Read one month through its Parquet mirror.
+    
+    Args:
+        csv_path (str): Month CSV path
+        columns (list): Columns to load (default: all)
+        filters (list): Row filters as [(column, op, value), ...], ANDed, e.g.
+                        [('subcategory', '==', 'Machine Learning')]; pushed
+                        down to the Parquet reader
+    
+    Returns:
+        DataFrame: Requested columns and rows
+    """
+    parquet_path = ensure_mirror(csv_path)
+    if parquet_path:
+        return pd.read_parquet(parquet_path, columns=columns, filters=filters or None)
+    
+    filter_columns = [column for column, _, _ in filters or []]
+    read_columns = None if columns is None else list(dict.fromkeys(columns + filter_columns))
+    df = read_csv_typed(csv_path, read_columns)
+    if filters:
+        df = _apply_filters(df, filters)
+    return df[columns] if columns else df
+
+def read_month_raw(csv_path):
+    """
+    Read a month CSV with every column as a string, exactly as stored.
+    
+    Meant for scripts that modify a month and write it back, so no value is
+    reformatted by type conversion.
+    """
+    return pd.read_csv(csv_path, dtype=str, encoding='utf-8')
+
+def read_corpus(columns=None, filters=None, months=None, data_dir=DATA_DIR, verbose=True):
+    """
+    Read all months (or the given ones) and concatenate them.
+    
+    Args:
+        columns (list): Columns to load (default: all)
+        filters (list): Row filters, see read_month()
+        months (list): YYMM prefixes to include (default: every month file)
+        data_dir (str): Folder containing the month CSVs
+        verbose (bool): Print one line per month
+    
+    Returns:
+        DataFrame: Combined papers (empty if there are no month files)
+    """
+    dfs = []
+    for csv_path in list_month_files(data_dir):
+        if months is not None and month_of(csv_path) not in months:
+            continue
+        df = read_month(csv_path, columns, filters)
+        dfs.append(df)
+        if verbose:
+            print(f"  ✓ Loaded {len(df):,} papers from {os.path.basename(csv_path)}")
+    if not dfs:
+        return pd.DataFrame(columns=columns or COLUMNS)
+    # Categoricals with different categories per month would fall back to object
+    combined = pd.concat(dfs, ignore_index=True)
+    for column in CATEGORICAL_COLUMNS:
+        if column in combined.columns and combined[column].dtype != 'category':
+            combined[column] = combined[column].astype('category')
+    return combined
+
+def corpus_cache_path(data_dir=DATA_DIR):
+    """Return the path of the combined corpus cache."""
+    return os.path.join(data_dir, MIRROR_DIR_NAME, CORPUS_CACHE_NAME)
+
+def _read_cache_signatures(cache_path):
+    """
+    Read the per-month CSV signatures stored in the corpus cache metadata.
+    
+    Returns:
+        dict: {month: [size, mtime_ns]}, or None if there is no usable cache
+    """
+    if not os.path.isfile(cache_path):
+        return None
+    try:
+        metadata = pq.read_schema(cache_path).metadata or {}
+        return json.loads(metadata[b'source_signatures'])
+    except (OSError, KeyError, ValueError, pa.ArrowInvalid):
+        return None
+
+def refresh_corpus_cache(data_dir=DATA_DIR, verbose=True):
+    """
+    Bring the combined corpus cache up to date with the month CSVs.
+    
+    Rows from months whose CSV is unchanged are taken from the existing
+    cache; only new or modified months are read again (through their
+    mirrors). Rows are kept in month order, then file order, with duplicate
+    paper IDs removed within each month; duplicates across months are
+    dropped by load_corpus(), so that updating one month never loses a paper
+    whose other copy was in a month that changed.
+    
+    Args:
+        data_dir (str): Folder containing the month CSVs
+        verbose (bool): Print which months were re-read
+    
+    Returns:
+        str: Cache path
+    """
+    cache_path = corpus_cache_path(data_dir)
+    signatures = {month_of(f): list(source_signature(f)) for f in list_month_files(data_dir)}
+    cached_signatures = _read_cache_signatures(cache_path)
+    if cached_signatures == signatures:
+        return cache_path
+    
+    cached_signatures = cached_signatures or {}
+    stale = [m for m in signatures if cached_signatures.get(m) != signatures[m]]
+    parts = []
+    if cached_signatures:
+        # Months that are unchanged are reused; removed months drop out here too
+        kept = [m for m in signatures if m not in stale]
+        if kept:
+            parts.append(pd.read_parquet(cache_path, filters=[(SOURCE_MONTH_COLUMN, 'in', kept)]))
+    for month in stale:
+        df = read_month(month_file(month, data_dir)).drop_duplicates(subset=['paper_id'])
+        df[SOURCE_MONTH_COLUMN] = month
+        parts.append(df)
+        if verbose:
+            print(f"  ✓ Re-read {month} ({len(df):,} papers)")
+    
+    if parts:
+        combined = pd.concat(parts, ignore_index=True)
+        combined = combined.sort_values(SOURCE_MONTH_COLUMN, kind='stable')
+    else:
+        combined = pd.DataFrame(columns=COLUMNS + [SOURCE_MONTH_COLUMN])
+    for column in CATEGORICAL_COLUMNS:
+        combined[column] = combined[column].astype('category')
+    
+    table = pa.Table.from_pandas(combined, preserve_index=False)
+    table = table.replace_schema_metadata({
+        **(table.schema.metadata or {}),
+        b'source_signatures': json.dumps(signatures).encode()
+    })
+    os.makedirs(os.path.dirname(cache_path), exist_ok=True)
+    tmp_path = f"{cache_path}.{os.getpid()}.tmp"
+    pq.write_table(table, tmp_path, row_group_size=50000, compression='zstd')
+    os.replace(tmp_path, cache_path)
+    return cache_path
+
+def load_corpus(columns=None, months=None, data_dir=DATA_DIR, verbose=True):
+    """
+    Load the combined corpus: every month, duplicate paper IDs removed
+    (first occurrence in month order wins) and submitted_on parsed to dates.
+    
+    Args:
+        columns (list): Columns to return (default: all)
+        months (list): YYMM prefixes to include (default: every month file)
+        data_dir (str): Folder containing the month CSVs
+        verbose (bool): Print a one-line summary
+    
+    Returns:
+        DataFrame: Papers with a fresh RangeIndex
+    """
+    if not HAVE_PYARROW:
+        df = read_corpus(months=months, data_dir=data_dir, verbose=verbose)
+        df = df.drop_duplicates(subset=['paper_id']).reset_index(drop=True)
+        return df[columns] if columns else df
+    
+    if months is not None and not months:
+        return pd.DataFrame(columns=columns or COLUMNS)
+    
+    cache_path = refresh_corpus_cache(data_dir, verbose)
+    # paper_id is always needed for deduplication
+    read_columns = None if columns is None else list(dict.fromkeys(['paper_id'] + columns))
+    filters = [(SOURCE_MONTH_COLUMN, 'in', list(months))] if months is not None else None
+    # Deduplicate and project on the Arrow table, so only the final frame is
+    # converted to pandas
+    table = pq.read_table(cache_path, columns=read_columns, filters=filters)
+    keep = ~table.column('paper_id').to_pandas().duplicated().to_numpy()
+    if not keep.all():
+        table = table.filter(pa.array(keep))
+    table = table.select(columns) if columns else table.drop_columns([SOURCE_MONTH_COLUMN])
+    df = table.to_pandas()
+    if verbose:
+        print(f"  ✓ Loaded {len(df):,} unique papers from the corpus cache")
+    return df
+
+def main():
+    """Build or refresh the Parquet mirror of every month."""
+    if not HAVE_PYARROW:
+        print("pyarrow is not installed; readers will parse the CSVs directly")
+        return
+    csv_files = list_month_files()
+    print(f"Refreshing Parquet mirrors for {len(csv_files)} month files...")
+    for csv_path in csv_files:
+        ensure_mirror(csv_path)
+    refresh_corpus_cache()
+    print("✓ All mirrors and the corpus cache up to date")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,175 @@
+#!/usr/bin/env python3
+"""
+Content-addressed summary cache
+
+The same abstract turns up more than once: in duplicates across monthly
+files, after re-scrapes, and in repeated test runs. This cache
+(data/summary_cache.sqlite) maps a hash of the normalized abstract text and
+the prompt version to the summary Codex produced for it, so a repeated
+abstract never costs another model call.
+
+Abstracts are normalized before hashing (Unicode NFC, whitespace runs
+collapsed, ends stripped), so re-scraped text that only differs in line
+breaks still hits. Each prompt template has its own version
+(PROMPT_VERSION and PACKED_PROMPT_VERSION in codex_abstract_summarizer.py);
+changing a prompt means bumping its version, which makes its old entries
+miss.
+
+The cache holds at most max_entries summaries; when that is exceeded the
+least recently used entries are evicted until it is back under 90% of the
+cap.
+
+Usage from other folders:
+    sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'storage'))
+    from summary_cache import SummaryCache
+    cache = SummaryCache()
+    summary = cache.get(abstract, prompt_version=1)
+
+Usage as a script:
+    python summary_cache.py           # Show cache statistics
+"""
+
+import hashlib
+import os
+import re
+import sqlite3
+import threading
+import time
+import unicodedata
+
+from paper_store import DATA_DIR
+
+CACHE_PATH = os.path.join(DATA_DIR, 'summary_cache.sqlite')
+DEFAULT_MAX_ENTRIES = 500_000
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS summaries (
+    key TEXT PRIMARY KEY,
+    summary TEXT NOT NULL,
+    last_used REAL NOT NULL,
+    hits INTEGER NOT NULL DEFAULT 0
+);
+CREATE INDEX IF NOT EXISTS summaries_by_last_used ON summaries (last_used);
+"""
+
+def normalize_abstract(abstract):
+    """Normalize abstract text for hashing: NFC, collapsed whitespace, stripped."""
+    return re.sub(r'\s+', ' ', unicodedata.normalize('NFC', abstract)).strip()
+
+def cache_key(abstract, prompt_version):
+    """Return the SHA-256 hex key of an abstract under a prompt version."""
+    text = f"{prompt_version}\n{normalize_abstract(abstract)}"
+    return hashlib.sha256(text.encode('utf-8')).hexdigest()
+
+class SummaryCache:
+    """Thread-safe, size-capped summary cache with hit statistics for this session."""
+    
+    def __init__(self, path=CACHE_PATH, max_entries=DEFAULT_MAX_ENTRIES):
+        self.path = path
+        self.max_entries = max_entries
+        self.lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        # Several summarizer processes may share the cache
+        self.db = sqlite3.connect(path, timeout=60, check_same_thread=False)
+        self.db.execute('PRAGMA journal_mode=WAL')
+        self.db.execute('PRAGMA synchronous=NORMAL')
+        self.db.executescript(SCHEMA)
+        self.entries = self.db.execute('SELECT COUNT(*) FROM summaries').fetchone()[0]
+    
+    def close(self):
+        with self.lock:
+            self.db.close()
+    
+    def __len__(self):
+        return self.entries
+    
+    def get(self, abstract, prompt_version):
+        """
+        Return the cached summary of an abstract, or None.
+        
+        A hit marks the entry as recently used.
+        
+        Args:
+            abstract (str): Abstract text (normalized before hashing)
+            prompt_version (int): Version of the prompt that produced the summary;
+                                  a tuple of versions tries each in order and
+                                  counts as a single lookup
+        """
+        versions = prompt_version if isinstance(prompt_version, tuple) else (prompt_version,)
+        with self.lock:
+            for version in versions:
+                key = cache_key(abstract, version)
+                row = self.db.execute('SELECT summary FROM summaries WHERE key = ?', (key,)).fetchone()
+                if row is not None:
+                    break
+            if row is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+            with self.db:
+                self.db.execute('UPDATE summaries SET last_used = ?, hits = hits + 1 WHERE key = ?', (time.time(), key))
+        return row[0]
+    
+    def put(self, abstract, prompt_version, summary):
+        """
+        Store a summary, evicting old entries if the cap is exceeded.
+        
+        Empty summaries are not cached.
+        
+        Args:
+            abstract (str): Abstract text
+            prompt_version (int): Version of the prompt that produced the summary
+            summary (str): Summary text
+        """
+        if not summary:
+            return
+        key = cache_key(abstract, prompt_version)
+        with self.lock:
+            with self.db:
+                cursor = self.db.execute(
+                    'INSERT OR IGNORE INTO summaries (key, summary, last_used) VALUES (?, ?, ?)',
+                    (key, summary, time.time())
+                )
+                if cursor.rowcount == 0:
+                    self.db.execute('UPDATE summaries SET summary = ?, last_used = ? WHERE key = ?',
+                                    (summary, time.time(), key))
+                self.entries += cursor.rowcount
+                if self.entries > self.max_entries:
+                    self._evict(int(self.max_entries * 0.9))
+    
+    def _evict(self, target_entries):
+        """Delete least recently used entries until at most target_entries remain. Caller holds the lock."""
+        self.db.execute(
+            'DELETE FROM summaries WHERE key IN (SELECT key FROM summaries ORDER BY last_used LIMIT ?)',
+            (max(self.entries - target_entries, 0),)
+        )
+        self.entries = self.db.execute('SELECT COUNT(*) FROM summaries').fetchone()[0]
+    
+    def hit_rate(self):
+        """Return the fraction of lookups in this session that hit (0.0 with no lookups)."""
+        lookups = self.hits + self.misses
+        return self.hits / lookups if lookups else 0.0
+    
+    def stats(self):
+        """Return (entries, lifetime_hits, size_bytes) for the whole cache."""
+        with self.lock:
+            entries, hits = self.db.execute('SELECT COUNT(*), COALESCE(SUM(hits), 0) FROM summaries').fetchone()
+        size = sum(os.path.getsize(self.path + suffix) for suffix in ('', '-wal') if os.path.isfile(self.path + suffix))
+        return entries, hits, size
+
+def main():
+    """Print cache statistics."""
+    cache = SummaryCache()
+    entries, hits, size = cache.stats()
+    print("=" * 80)
+    print(f"Summary cache: {cache.path}")
+    print(f"Cached summaries:  {entries:,} (cap {cache.max_entries:,})")
+    print(f"Hits (lifetime):   {hits:,}")
+    print(f"Size:              {size / 1024 ** 2:.1f} MB")
+    print("=" * 80)
+    cache.close()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,216 @@
+#!/usr/bin/env python3
+"""
+Append-only summary journal
+
+Rewriting a whole month CSV for every new summary costs I/O proportional
+to the file size per paper, and a crash mid-write can leave the month
+truncated. Instead, each summary is appended as one JSON line to a sidecar
+next to the month (YYMM_arxiv_papers.summaries.jsonl) and fsynced, which
+is O(1) per update. A torn last line from a crash is ignored on read.
+
+compact() merges the journal into the CSV: rows without a pending summary
+are copied byte for byte, the rest are rewritten with the new summary, and
+the result replaces the CSV atomically (temp file, fsync, os.replace).
+Only then is the journal truncated; if the process dies in between, the
+next compaction applies the same summaries again, which is harmless.
+
+Compaction holds the month lock (paper_store.month_lock) from reading the
+CSV until it is replaced. The scraper's BufferedCsvWriter appends under
+the same lock and reopens the CSV when it was replaced, so rows written
+while a scraper is running end up in the new file. If the CSV changes
+anyway (a tool that does not take the lock), the compaction is abandoned
+and the journal kept for next time.
+
+Several processes may journal summaries for the same month: appends and
+compactions take an exclusive flock on the journal file, so no entry is
+written between a compaction reading the journal and truncating it.
+
+Usage from other folders:
+    sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'storage'))
+    from summary_journal import SummaryJournal
+    journal = SummaryJournal('../data/2511_arxiv_papers.csv')
+    journal.append('2511.00010', 'One-line summary...')
+    journal.compact()
+
+Usage as a script:
+    python summary_journal.py [YYMM ...]   # Compact the journals of these (or all) months
+"""
+
+import argparse
+import csv
+import fcntl
+import io
+import json
+import os
+import threading
+from datetime import datetime
+
+from paper_index import PaperIndex, scan_records
+from paper_store import list_month_files, month_file, month_lock, source_signature
+
+def get_journal_path(csv_path):
+    """Return the journal sidecar path for a month CSV (e.g. 2511_arxiv_papers.summaries.jsonl)."""
+    return os.path.splitext(csv_path)[0] + '.summaries.jsonl'
+
+def read_journal(journal_path):
+    """
+    Read a journal file.
+    
+    Returns:
+        dict: paper_id -> summary (the latest entry per paper wins; a torn
+              last line from a crash is ignored)
+    """
+    summaries = {}
+    if not os.path.isfile(journal_path):
+        return summaries
+    with open(journal_path, 'r', encoding='utf-8') as f:
+        for line in f:
+            try:
+                entry = json.loads(line)
+            except ValueError:
+                continue  # Torn write from a crash
+            summaries[entry['paper_id']] = entry['summary']
+    return summaries
+
+def format_row(values, fieldnames):
+    """Format a row the way the scraper writes it: every column quoted except url."""
+    parts = []
+    for field, value in zip(fieldnames, values):
+        if field == 'url':
+            parts.append(value)
+        else:
+            parts.append('"' + value.replace('"', '""') + '"')
+    return ','.join(parts) + '\n'
+
+class SummaryJournal:
+    """Thread-safe append-only log of summary updates for one month CSV."""
+    
+    def __init__(self, csv_path):
+        self.csv_path = csv_path
+        self.journal_path = get_journal_path(csv_path)
+        self.lock = threading.Lock()
+        self.file = open(self.journal_path, 'a', encoding='utf-8')
+        self.entries = len(self.pending())
+    
+    def __len__(self):
+        """Number of journal entries not yet compacted into the CSV."""
+        return self.entries
+    
+    def append(self, paper_id, summary):
+        """
+        Durably record a summary for one paper.
+        
+        Args:
+            paper_id (str): arXiv ID (e.g., 2511.00010)
+            summary (str): New summary text
+        """
+        line = json.dumps({'paper_id': paper_id, 'summary': summary,
+                           'at': datetime.now().isoformat()}, ensure_ascii=False) + '\n'
+        with self.lock:
+            fcntl.flock(self.file.fileno(), fcntl.LOCK_EX)
+            try:
+                self.file.write(line)
+                self.file.flush()
+                os.fsync(self.file.fileno())
+            finally:
+                fcntl.flock(self.file.fileno(), fcntl.LOCK_UN)
+            self.entries += 1
+    
+    def pending(self):
+        """
+        Read the journal.
+        
+        Returns:
+            dict: paper_id -> summary (the latest entry per paper wins)
+        """
+        return read_journal(self.journal_path)
+    
+    def compact(self, verbose=True):
+        """
+        Merge pending summaries into the CSV and truncate the journal.
+        
+        Returns:
+            int: Rows updated in the CSV (0 if there was nothing to do or the
+                 CSV changed during the compaction)
+        """
+        with self.lock, open(self.journal_path, 'a') as lock_file:
+            # Other processes may append to the same journal; hold them off until it is truncated
+            fcntl.flock(lock_file.fileno(), fcntl.LOCK_EX)
+            summaries = self.pending()
+            if not summaries:
+                return 0
+            
+            # Scrapers append to the CSV under the same lock, and reopen it after the replace
+            with month_lock(self.csv_path):
+                signature = source_signature(self.csv_path)
+                tmp_path = f"{self.csv_path}.{os.getpid()}.compact.tmp"
+                updated = 0
+                with open(self.csv_path, 'rb') as source, open(tmp_path, 'wb') as target:
+                    header = source.readline()
+                    target.write(header)
+                    fieldnames = next(csv.reader([header.decode('utf-8')]))
+                    summary_column = fieldnames.index('summary')
+                    position = len(header)
+                    for paper_id, offset, length in scan_records(self.csv_path):
+                        # Copy anything scan_records() does not report (rows without an ID)
+                        target.write(source.read(offset - position))
+                        record = source.read(length)
+                        position = offset + length
+                        if paper_id not in summaries:
+                            target.write(record)
+                            continue
+                        values = next(csv.reader(io.StringIO(record.decode('utf-8'))))
+                        values[summary_column] = summaries[paper_id]
+                        target.write(format_row(values, fieldnames).encode('utf-8'))
+                        updated += 1
+                    target.write(source.read())
+                    target.flush()
+                    os.fsync(target.fileno())
+                
+                if source_signature(self.csv_path) != signature:
+                    os.remove(tmp_path)
+                    if verbose:
+                        print(f"⚠ {os.path.basename(self.csv_path)} changed during compaction; journal kept for the next one")
+                    return 0
+                os.replace(tmp_path, self.csv_path)
+            
+            # The CSV now holds every summary, so the journal can start over
+            # (truncated in place: the handle is in append mode, so writes after this go to the new end)
+            self.file.truncate(0)
+            os.fsync(self.file.fileno())
+            self.entries = 0
+        
+        index = PaperIndex()
+        try:
+            index.refresh_month(self.csv_path)
+        finally:
+            index.close()
+        if verbose:
+            print(f"✓ Compacted {updated} summaries into {os.path.basename(self.csv_path)}")
+        return updated
+    
+    def close(self):
+        """Close the journal file (pending entries stay on disk)."""
+        with self.lock:
+            if not self.file.closed:
+                self.file.close()
+
+def main():
+    """Compact the summary journals of the given months (default: all)."""
+    parser = argparse.ArgumentParser(description='Merge summary journals into the month CSVs.')
+    parser.add_argument('months', nargs='*', help='Year-month prefixes (e.g., 2511)')
+    args = parser.parse_args()
+    
+    csv_files = [month_file(month) for month in args.months] if args.months else list_month_files()
+    for csv_path in csv_files:
+        if not os.path.isfile(get_journal_path(csv_path)):
+            continue
+        journal = SummaryJournal(csv_path)
+        try:
+            print(f"{os.path.basename(csv_path)}: {len(journal)} journal entries")
+            journal.compact()
+        finally:
+            journal.close()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,8 @@
+"""Make the script folders importable the way the scripts import each other."""
+
+import os
+import sys
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')
+for folder in ('storage', 'ingestion', 'enrichment'):
+    sys.path.insert(0, os.path.join(ROOT, folder))
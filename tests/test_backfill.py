@@ -0,0 +1,60 @@
+"""backfill.py failure handling: dead workers and rate-limited months."""
+
+import json
+import os
+import sys
+
+import pytest
+
+import arxiv_scraper
+import backfill
+from arxiv_scraper import ThrottledError, scrape_month
+from paper_index import PaperIndex
+
+def crashing_shard(year_month_prefix, options):
+    if year_month_prefix == '2502':
+        os._exit(1)
+    return {'year_month_prefix': year_month_prefix, 'stop_reason': 'end_of_papers', 'saved': 0}
+
+def test_dead_worker_fails_its_month_and_exits_non_zero(tmp_path, monkeypatch):
+    (tmp_path / 'data').mkdir()
+    (tmp_path / 'ingestion').mkdir()
+    monkeypatch.chdir(tmp_path / 'ingestion')
+    # Worker processes are forked, so they inherit the patched shard function
+    monkeypatch.setattr(backfill, '_run_shard', crashing_shard)
+    monkeypatch.setattr(sys, 'argv', ['backfill.py', '2501', '2502', '--processes', '1'])
+    
+    with pytest.raises(SystemExit) as exit_info:
+        backfill.main()
+    
+    assert exit_info.value.code == 1
+    with open(tmp_path / 'data' / 'backfill_state.json', encoding='utf-8') as f:
+        state = json.load(f)
+    assert state['2501']['status'] == 'done'
+    assert state['2502']['status'] == 'incomplete'
+    assert 'worker process died' in state['2502']['error']
+
+def test_throttled_month_is_not_marked_done(tmp_path, monkeypatch):
+    (tmp_path / 'data').mkdir()
+    (tmp_path / 'ingestion').mkdir()
+    monkeypatch.chdir(tmp_path / 'ingestion')
+    index_path = str(tmp_path / 'paper_index.sqlite')
+    monkeypatch.setattr(arxiv_scraper, 'PaperIndex', lambda: PaperIndex(index_path, str(tmp_path / 'data')))
+    
+    def throttled_scrape(url, **kwargs):
+        number = int(url.rsplit('.', 1)[1])
+        if number >= 3:
+            raise ThrottledError(f"429 Throttled for url: {url}")
+        return {'paper_id': f"2511.{number:05d}", 'url': url, 'og_title': f"Paper {number}",
+                'category': 'Computer Science', 'subcategory': 'Machine Learning', 'submitted_on': '2025-11-03',
+                'abstract': 'Abstract', 'summary': '', 'scraped_at': '2025-11-04'}
+    monkeypatch.setattr(arxiv_scraper, 'scrape_arxiv_paper', throttled_scrape)
+    
+    # Fixed-rate mode: no adaptive limiter to retry the 429s
+    result = scrape_month('2511', verbose=False)
+    assert result['stop_reason'] == 'rate_limited'
+    assert result['saved'] == 2
+    
+    state = {}
+    backfill.record_result(state, result)
+    assert state['2511']['status'] == 'incomplete'
@@ -0,0 +1,36 @@
+"""The scraper checkpoint survives legitimate CSV changes and is dropped when rows were lost."""
+
+from arxiv_scraper import FIELDNAMES, format_csv_row, load_checkpoint, save_checkpoint
+
+def paper(number):
+    return {'paper_id': f"2511.{number:05d}", 'url': f"https://arxiv.org/abs/2511.{number:05d}",
+            'og_title': f"Paper {number}", 'category': 'Computer Science', 'subcategory': 'Machine Learning',
+            'submitted_on': '2025-11-03', 'abstract': f"Abstract {number}", 'summary': '', 'scraped_at': '2025-11-04'}
+
+def write_csv(csv_path, numbers):
+    with open(csv_path, 'w', encoding='utf-8') as f:
+        f.write(','.join(FIELDNAMES) + '\n' + ''.join(format_csv_row(paper(number)) for number in numbers))
+
+def test_checkpoint_kept_when_the_csv_grows(tmp_path):
+    csv_path = str(tmp_path / '2511_arxiv_papers.csv')
+    write_csv(csv_path, [1, 5])
+    save_checkpoint(csv_path, {'year_month_prefix': '2511', 'last_paper_num': 40, 'last_saved_num': 5})
+    assert load_checkpoint(csv_path, 5)['last_paper_num'] == 40
+    
+    # E.g. a journal compaction filled in summaries, or a harvest appended rows
+    with open(csv_path, 'a', encoding='utf-8') as f:
+        f.write(format_csv_row(paper(3)))
+    assert load_checkpoint(csv_path, 5)['last_paper_num'] == 40
+
+def test_checkpoint_dropped_when_rows_were_lost(tmp_path):
+    csv_path = str(tmp_path / '2511_arxiv_papers.csv')
+    write_csv(csv_path, [1, 5])
+    save_checkpoint(csv_path, {'year_month_prefix': '2511', 'last_paper_num': 40, 'last_saved_num': 5})
+    
+    # Restored from an older backup
+    write_csv(csv_path, [1])
+    assert load_checkpoint(csv_path, 1) is None
+    
+    # Same size or larger, but the last saved paper is gone
+    write_csv(csv_path, [1, 2, 3])
+    assert load_checkpoint(csv_path, 3) is None
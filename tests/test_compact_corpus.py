@@ -0,0 +1,36 @@
+"""CompactCorpus.load streams months and matches the load_corpus() frame."""
+
+import pandas as pd
+
+from arxiv_scraper import FIELDNAMES, format_csv_row
+from compact_corpus import CompactCorpus
+from paper_store import load_corpus
+
+def paper(paper_id, subcategory, scraped_at='2025-11-04T10:00:00'):
+    return {'paper_id': paper_id, 'url': f"https://arxiv.org/abs/{paper_id}", 'og_title': f"Title {paper_id}",
+            'category': 'Computer Science', 'subcategory': subcategory, 'submitted_on': '3 Nov 2025',
+            'abstract': f"Abstract {paper_id} é", 'summary': '', 'scraped_at': scraped_at}
+
+def write_month(path, rows):
+    path.write_text(','.join(FIELDNAMES) + '\n' + ''.join(format_csv_row(row) for row in rows), encoding='utf-8')
+
+def test_load_matches_load_corpus(tmp_path):
+    write_month(tmp_path / '2511_arxiv_papers.csv', [
+        paper('2511.00001', 'Machine Learning'),
+        paper('2511.00002', 'Robotics', scraped_at=''),
+        paper('2511.00001', 'Machine Learning'),
+    ])
+    write_month(tmp_path / '2512_arxiv_papers.csv', [
+        paper('2512.00001', 'Computation and Language'),
+        paper('2511.00002', 'Databases'),
+    ])
+    
+    corpus = CompactCorpus.load(data_dir=str(tmp_path))
+    expected = load_corpus(data_dir=str(tmp_path), verbose=False)
+    frame = corpus.to_frame()
+    
+    assert frame['paper_id'].tolist() == expected['paper_id'].tolist() == ['2511.00001', '2511.00002', '2512.00001']
+    assert frame['subcategory'].astype(str).tolist() == expected['subcategory'].astype(str).tolist()
+    assert frame['abstract'].tolist() == expected['abstract'].tolist()
+    assert frame['scraped_at'].tolist() == pd.to_datetime(expected['scraped_at'], format='ISO8601').tolist()
+    assert corpus.find('2512.00001') == 2
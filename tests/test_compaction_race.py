@@ -0,0 +1,75 @@
+"""Summary journal compaction while a scraper's BufferedCsvWriter is appending to the same month."""
+
+import csv
+import threading
+
+import pytest
+
+import summary_journal
+from arxiv_scraper import BufferedCsvWriter
+from paper_index import PaperIndex
+from summary_journal import SummaryJournal
+
+def paper(number):
+    return {'paper_id': f"2511.{number:05d}", 'url': f"https://arxiv.org/abs/2511.{number:05d}",
+            'og_title': f"Paper {number}", 'category': 'Computer Science', 'subcategory': 'Machine Learning',
+            'submitted_on': '2025-11-03', 'abstract': f"Abstract {number}", 'summary': '', 'scraped_at': '2025-11-04'}
+
+def read_rows(csv_path):
+    with open(csv_path, newline='', encoding='utf-8') as f:
+        return {row['paper_id']: row for row in csv.DictReader(f)}
+
+@pytest.fixture
+def csv_path(tmp_path, monkeypatch):
+    # Keep compaction's index refresh away from the real data/paper_index.sqlite
+    index_path = str(tmp_path / 'paper_index.sqlite')
+    monkeypatch.setattr(summary_journal, 'PaperIndex', lambda: PaperIndex(index_path, str(tmp_path)))
+    return str(tmp_path / '2511_arxiv_papers.csv')
+
+def test_rows_written_after_compaction_reach_the_new_csv(csv_path):
+    writer = BufferedCsvWriter(csv_path, flush_rows=1000)
+    writer.write(paper(1))
+    writer.write(paper(2))
+    writer.flush()
+    
+    journal = SummaryJournal(csv_path)
+    journal.append('2511.00001', 'keep me')
+    assert journal.compact(verbose=False) == 1
+    journal.close()
+    
+    writer.write(paper(3))
+    writer.write(paper(4))
+    writer.close()
+    
+    rows = read_rows(csv_path)
+    assert list(rows) == [f"2511.{number:05d}" for number in range(1, 5)]
+    assert rows['2511.00001']['summary'] == 'keep me'
+
+def test_interleaved_flushes_and_compactions_lose_nothing(csv_path):
+    writer = BufferedCsvWriter(csv_path, flush_rows=1000)
+    writer.write(paper(1))
+    writer.flush()
+    total = 300
+    
+    def scrape():
+        for number in range(2, total + 1):
+            writer.write(paper(number))
+            if number % 7 == 0:
+                writer.flush()
+        writer.close()
+    
+    scraper = threading.Thread(target=scrape)
+    scraper.start()
+    journal = SummaryJournal(csv_path)
+    compactions = 0
+    while scraper.is_alive() or compactions < 3:
+        journal.append('2511.00001', f"summary {compactions}")
+        journal.compact(verbose=False)
+        compactions += 1
+    scraper.join()
+    journal.compact(verbose=False)
+    journal.close()
+    
+    rows = read_rows(csv_path)
+    assert list(rows) == [f"2511.{number:05d}" for number in range(1, total + 1)]
+    assert rows['2511.00001']['summary'].startswith('summary ')
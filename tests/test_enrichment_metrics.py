@@ -0,0 +1,35 @@
+"""EnrichmentMetrics keeps constant memory per backend and still reports counts, histogram and percentiles."""
+
+from enrichment_metrics import RESERVOIR_SIZE, EnrichmentMetrics
+
+def test_small_run_is_exact():
+    metrics = EnrichmentMetrics()
+    for seconds in (1.0, 2.0, 3.0, 4.0):
+        metrics.record_call('stub', seconds, 'ok', prompt_chars=100, response_chars=50)
+    metrics.record_call('stub', 40.0, 'timeout', prompt_chars=100)
+    
+    stats = metrics.report()['backends']['stub']
+    assert stats['calls'] == 5
+    assert stats['outcomes']['ok'] == 4 and stats['outcomes']['timeout'] == 1
+    assert stats['latency_seconds'] == {'count': 5, 'total': 50.0, 'mean': 10.0, 'max': 40.0,
+                                        'p50': 3.0, 'p95': 32.8, 'p99': 38.56}
+    assert stats['ok_latency_seconds']['max'] == 4.0
+    assert stats['response_chars']['total'] == 200
+    assert stats['latency_histogram']['2'] == 2 and stats['latency_histogram']['60'] == 5
+    assert stats['latency_histogram']['+Inf'] == 5
+
+def test_long_run_keeps_a_bounded_sample():
+    metrics = EnrichmentMetrics()
+    calls = RESERVOIR_SIZE * 10
+    for i in range(calls):
+        metrics.record_call('stub', (i % 100) / 10, 'ok', prompt_chars=1000)
+    
+    backend = metrics.calls['stub']
+    assert len(backend.latency.sample) == RESERVOIR_SIZE
+    stats = metrics.report()['backends']['stub']
+    assert stats['calls'] == calls
+    assert stats['latency_seconds']['max'] == 9.9
+    assert stats['prompt_chars']['total'] == calls * 1000
+    # Latencies are uniform over 0.0-9.9, so the sampled median is close to 4.95
+    assert abs(stats['latency_seconds']['p50'] - 4.95) < 0.5
+    assert stats['latency_histogram']['+Inf'] == calls
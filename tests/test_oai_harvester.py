@@ -0,0 +1,118 @@
+"""oai_harvester.py against a local server replaying recorded ListRecords pages."""
+
+import csv
+import threading
+from http.server import BaseHTTPRequestHandler, HTTPServer
+from urllib.parse import parse_qs, urlparse
+
+import pytest
+
+import oai_harvester
+from arxiv_scraper import FIELDNAMES
+from paper_index import PaperIndex
+
+def record(paper_id, categories, title='A title', datestamp='2025-11-05'):
+    return f"""
+    <record>
+      <header><identifier>oai:arXiv.org:{paper_id}</identifier><datestamp>{datestamp}</datestamp></header>
+      <metadata>
+        <arXiv xmlns="http://arxiv.org/OAI/arXiv/">
+          <id>{paper_id}</id><created>2025-11-03</created>
+          <title>{title}
+            wrapped</title>
+          <categories>{categories}</categories>
+          <abstract>  Abstract of
+            {paper_id}. </abstract>
+        </arXiv>
+      </metadata>
+    </record>"""
+
+def page(records, token=None):
+    token_element = f"<resumptionToken>{token}</resumptionToken>" if token else "<resumptionToken/>"
+    return f"""<?xml version="1.0" encoding="UTF-8"?>
+<OAI-PMH xmlns="http://www.openarchives.org/OAI/2.0/">
+  <ListRecords>{''.join(records)}{token_element}</ListRecords>
+</OAI-PMH>""".encode('utf-8')
+
+PAGES = {
+    None: page([record('2511.00001', 'cs.LG stat.ML'), record('2511.00002', 'math.CO cs.DM'),
+                record('2510.09999', 'cs.AI')], token='page2'),
+    'page2': page([record('2511.00003', 'cs.CL'),
+                   '<record><header status="deleted"><identifier>oai:arXiv.org:2511.00004</identifier>'
+                   '</header></record>',
+                   record('2511.00001', 'cs.LG')]),
+}
+
+@pytest.fixture
+def endpoint():
+    requests_seen = []
+    
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            query = parse_qs(urlparse(self.path).query)
+            requests_seen.append(query)
+            body = PAGES[query.get('resumptionToken', [None])[0]]
+            self.send_response(200)
+            self.send_header('Content-Type', 'text/xml')
+            self.send_header('Content-Length', str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+        
+        def log_message(self, *args):
+            pass
+    
+    server = HTTPServer(('127.0.0.1', 0), Handler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield f"http://127.0.0.1:{server.server_port}/oai", requests_seen
+    server.shutdown()
+    server.server_close()
+
+@pytest.fixture
+def data_dir(tmp_path, monkeypatch):
+    (tmp_path / 'data').mkdir()
+    (tmp_path / 'ingestion').mkdir()
+    monkeypatch.chdir(tmp_path / 'ingestion')
+    index_path = str(tmp_path / 'paper_index.sqlite')
+    monkeypatch.setattr(oai_harvester, 'PaperIndex', lambda: PaperIndex(index_path, str(tmp_path / 'data')))
+    return tmp_path / 'data'
+
+def read_rows(csv_path):
+    with open(csv_path, newline='', encoding='utf-8') as f:
+        return list(csv.DictReader(f))
+
+def test_harvest_maps_cs_records(data_dir, endpoint):
+    url, requests_seen = endpoint
+    state = oai_harvester.harvest_month('2511', endpoint=url, rate=100)
+    
+    assert state['complete'] and state['pages'] == 2 and state['saved'] == 2
+    first = requests_seen[0]
+    assert first['set'] == ['cs'] and first['from'] == ['2025-11-01'] and first['until'] == ['2025-11-30']
+    assert requests_seen[1]['resumptionToken'] == ['page2']
+    
+    rows = read_rows(data_dir / '2511_arxiv_papers.csv')
+    assert list(rows[0]) == FIELDNAMES
+    # Cross-lists, other months, deleted records and repeats are skipped
+    assert [row['paper_id'] for row in rows] == ['2511.00001', '2511.00003']
+    assert rows[0]['og_title'] == 'A title wrapped'
+    assert rows[0]['subcategory'] == 'Machine Learning'
+    assert rows[0]['abstract'] == 'Abstract of 2511.00001.'
+    assert rows[1]['subcategory'] == 'Computation and Language'
+
+def test_harvest_resumes_from_saved_token(data_dir, endpoint):
+    url, requests_seen = endpoint
+    csv_path = str(data_dir / '2511_arxiv_papers.csv')
+    oai_harvester.save_state(csv_path, {'resumption_token': 'page2', 'complete': False,
+                                        'pages': 1, 'saved': 0, 'skipped': 0})
+    
+    state = oai_harvester.harvest_month('2511', endpoint=url, rate=100)
+    
+    assert [query.get('resumptionToken') for query in requests_seen] == [['page2']]
+    assert state['complete'] and state['pages'] == 2
+    assert [row['paper_id'] for row in read_rows(csv_path)] == ['2511.00003', '2511.00001']
+    
+    # A later pass starts from the first page again and adds nothing
+    requests_seen.clear()
+    oai_harvester.harvest_month('2511', endpoint=url, rate=100)
+    assert 'resumptionToken' not in requests_seen[0]
+    assert len(read_rows(csv_path)) == 2
@@ -0,0 +1,38 @@
+"""PaperIndex.read_paper recovers when the month was rewritten after it was indexed."""
+
+from arxiv_scraper import FIELDNAMES, format_csv_row
+from paper_index import PaperIndex
+
+def paper(number, abstract):
+    return {'paper_id': f"2511.{number:05d}", 'url': f"https://arxiv.org/abs/2511.{number:05d}",
+            'og_title': f"Paper {number}", 'category': 'Computer Science', 'subcategory': 'Machine Learning',
+            'submitted_on': '2025-11-03', 'abstract': abstract, 'summary': '', 'scraped_at': '2025-11-04'}
+
+def write_csv(csv_path, rows):
+    csv_path.write_text(','.join(FIELDNAMES) + '\n' + ''.join(format_csv_row(row) for row in rows), encoding='utf-8')
+
+def test_stale_offset_inside_a_multibyte_character(tmp_path):
+    csv_path = tmp_path / '2511_arxiv_papers.csv'
+    write_csv(csv_path, [paper(1, 'Plain abstract.'), paper(2, 'Second abstract.')])
+    index = PaperIndex(str(tmp_path / 'paper_index.sqlite'), str(tmp_path))
+    index.refresh()
+    _, offset, length = index.lookup('2511.00002')
+    
+    # Rewritten by another process: the old offset of paper 2 now falls inside
+    # a run of two-byte characters, on the second byte of one of them
+    header = len((','.join(FIELDNAMES) + '\n').encode('utf-8'))
+    for padding in ('', 'x'):
+        first = paper(1, padding + 'é' * 200)
+        write_csv(csv_path, [first, paper(2, 'Second abstract.')])
+        try:
+            csv_path.read_bytes()[offset:offset + length].decode('utf-8')
+        except UnicodeDecodeError:
+            break
+    else:
+        raise AssertionError('could not place the stale offset inside a character')
+    assert offset > header
+    
+    row = index.read_paper('2511.00002')
+    assert row['paper_id'] == '2511.00002'
+    assert row['abstract'] == 'Second abstract.'
+    index.close()
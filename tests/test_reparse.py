@@ -0,0 +1,59 @@
+"""reparse.py keeps rows whose cached page cannot be re-parsed."""
+
+import csv
+import gzip
+import os
+
+from arxiv_scraper import FIELDNAMES, format_csv_row
+from page_cache import PageCache
+from reparse import reparse_month
+
+def test_unreadable_cached_page_keeps_existing_row(tmp_path, monkeypatch):
+    (tmp_path / 'data').mkdir()
+    (tmp_path / 'ingestion').mkdir()
+    monkeypatch.chdir(tmp_path / 'ingestion')
+    csv_path = tmp_path / 'data' / '2511_arxiv_papers.csv'
+    rows = [{'paper_id': f"2511.0000{number}", 'url': f"https://arxiv.org/abs/2511.0000{number}",
+             'og_title': f"Paper {number}", 'category': 'Computer Science', 'subcategory': 'Machine Learning',
+             'submitted_on': '2025-11-03', 'abstract': f"Abstract {number}", 'summary': 'keep me',
+             'scraped_at': '2025-11-04'} for number in (1, 2)]
+    csv_path.write_text(','.join(FIELDNAMES) + '\n' + ''.join(format_csv_row(row) for row in rows), encoding='utf-8')
+    
+    cache = PageCache(str(tmp_path / 'data' / 'page_cache'))
+    corrupt = cache.path_for('2511.00002')
+    os.makedirs(os.path.dirname(corrupt))
+    with open(corrupt, 'wb') as f:
+        f.write(b'\x1f\x8b truncated')
+    
+    counts = reparse_month('2511', cache, processes=1)
+    
+    with open(csv_path, newline='', encoding='utf-8') as f:
+        result = {row['paper_id']: row for row in csv.DictReader(f)}
+    assert counts['failed'] == 1
+    assert list(result) == ['2511.00001', '2511.00002']
+    assert result['2511.00002']['summary'] == 'keep me'
+
+def test_cached_page_without_category_keeps_existing_row(tmp_path, monkeypatch):
+    (tmp_path / 'data').mkdir()
+    (tmp_path / 'ingestion').mkdir()
+    monkeypatch.chdir(tmp_path / 'ingestion')
+    csv_path = tmp_path / 'data' / '2511_arxiv_papers.csv'
+    row = {'paper_id': '2511.00001', 'url': 'https://arxiv.org/abs/2511.00001', 'og_title': 'Paper 1',
+           'category': 'Computer Science', 'subcategory': 'Machine Learning', 'submitted_on': '2025-11-03',
+           'abstract': 'Abstract 1', 'summary': 'keep me', 'scraped_at': '2025-11-04'}
+    csv_path.write_text(','.join(FIELDNAMES) + '\n' + format_csv_row(row), encoding='utf-8')
+    
+    # A truncated page: the title made it, the subheader with the category did not
+    cache = PageCache(str(tmp_path / 'data' / 'page_cache'))
+    cached = cache.path_for('2511.00001')
+    os.makedirs(os.path.dirname(cached))
+    with gzip.open(cached, 'wb') as f:
+        f.write(b'<html><head><meta property="og:title" content="Paper 1"></head><body><h1>Paper 1</h1>')
+    
+    counts = reparse_month('2511', cache, processes=1)
+    
+    with open(csv_path, newline='', encoding='utf-8') as f:
+        result = list(csv.DictReader(f))
+    assert counts == {'reparsed': 0, 'kept': 1, 'dropped': 0, 'failed': 1}
+    assert [r['paper_id'] for r in result] == ['2511.00001']
+    assert result[0]['summary'] == 'keep me'
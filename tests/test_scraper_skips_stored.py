@@ -0,0 +1,46 @@
+"""arxiv_scraper.scrape_month does not request IDs another writer already stored."""
+
+import atexit
+import csv
+
+import arxiv_scraper
+from arxiv_scraper import FIELDNAMES, format_csv_row, scrape_month
+from paper_index import PaperIndex
+
+def paper(number, category='Computer Science'):
+    return {'paper_id': f"2511.{number:05d}", 'url': f"https://arxiv.org/abs/2511.{number:05d}",
+            'og_title': f"Paper {number}", 'category': category, 'subcategory': 'Machine Learning',
+            'submitted_on': '2025-11-03', 'abstract': f"Abstract {number}", 'summary': '', 'scraped_at': '2025-11-04'}
+
+def test_ids_stored_elsewhere_are_not_requested(tmp_path, monkeypatch):
+    (tmp_path / 'data').mkdir()
+    (tmp_path / 'ingestion').mkdir()
+    monkeypatch.chdir(tmp_path / 'ingestion')
+    csv_path = tmp_path / 'data' / '2511_arxiv_papers.csv'
+    csv_path.write_text(','.join(FIELDNAMES) + '\n' + format_csv_row(paper(1)) + format_csv_row(paper(3)),
+                        encoding='utf-8')
+    # A paper listed late, stored in the next month's file
+    (tmp_path / 'data' / '2512_arxiv_papers.csv').write_text(
+        ','.join(FIELDNAMES) + '\n' + format_csv_row(paper(4)), encoding='utf-8')
+    index_path = str(tmp_path / 'paper_index.sqlite')
+    monkeypatch.setattr(arxiv_scraper, 'PaperIndex', lambda: PaperIndex(index_path, str(tmp_path / 'data')))
+    
+    requested = []
+    def fake_scrape(url, **kwargs):
+        number = int(url.rsplit('.', 1)[1])
+        requested.append(number)
+        return paper(number) if number <= 5 else None
+    monkeypatch.setattr(arxiv_scraper, 'scrape_arxiv_paper', fake_scrape)
+    
+    exit_handlers = atexit._ncallbacks()
+    # No checkpoint, so the scan resumes after the highest stored ID, 2511.00003
+    stats = scrape_month('2511', verbose=False)
+    assert requested[:4] == [5, 6, 7, 8]
+    assert stats['already_stored'] == 1
+    assert stats['saved'] == 1
+    # The writer is closed by scrape_month itself, not left registered at exit
+    assert atexit._ncallbacks() == exit_handlers
+    
+    with open(csv_path, newline='', encoding='utf-8') as f:
+        ids = [row['paper_id'] for row in csv.DictReader(f)]
+    assert ids == ['2511.00001', '2511.00003', '2511.00005']
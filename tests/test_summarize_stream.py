@@ -0,0 +1,101 @@
+"""batch_summarizer.summarize_stream with a fake `codex` command on PATH."""
+
+import os
+import stat
+import sys
+
+import pytest
+
+import codex_abstract_summarizer
+from batch_summarizer import summarize_stream
+from llm_backends import CodexCliBackend
+
+# Fake `codex exec PROMPT`: tracks how many copies run at once, sleeps longer
+# for earlier papers (so they finish out of order), fails for FAIL abstracts
+FAKE_CODEX = '''#!{python}
+import fcntl, os, re, sys, time
+state = {state!r}
+
+def update(name, change):
+    with open(os.path.join(state, 'lock'), 'a') as lock:
+        fcntl.flock(lock, fcntl.LOCK_EX)
+        path = os.path.join(state, name)
+        value = int(open(path).read()) if os.path.exists(path) else 0
+        value = change(value)
+        open(path, 'w').write(str(value))
+        return value
+
+running = update('running', lambda n: n + 1)
+update('max_running', lambda n: max(n, running))
+abstract = re.search(r'Abstract: "(.*)"', sys.argv[-1], re.S).group(1)
+try:
+    if abstract.startswith('FAIL'):
+        update('fail_attempts', lambda n: n + 1)
+        print('model crashed', file=sys.stderr)
+        sys.exit(1)
+    time.sleep(0.3 * (10 - int(abstract.split()[1])) / 10)
+    print(f"Summary of {{abstract}}")
+finally:
+    update('running', lambda n: n - 1)
+'''
+
+@pytest.fixture
+def state(tmp_path, monkeypatch):
+    state = tmp_path / 'state'
+    state.mkdir()
+    bin_dir = tmp_path / 'bin'
+    bin_dir.mkdir()
+    script = bin_dir / 'codex'
+    script.write_text(FAKE_CODEX.format(python=sys.executable, state=str(state)))
+    script.chmod(script.stat().st_mode | stat.S_IEXEC)
+    monkeypatch.setenv('PATH', f"{bin_dir}{os.pathsep}{os.environ['PATH']}")
+    monkeypatch.setattr(codex_abstract_summarizer, '_backend', CodexCliBackend(max_retries=1, backoff=0))
+    return state
+
+def read_state(state, name):
+    path = state / name
+    return int(path.read_text()) if path.exists() else 0
+
+def run(papers, workers):
+    pulled = []
+    summaries, failures, ahead = [], [], []
+    
+    def source():
+        for paper in papers:
+            pulled.append(paper[1])
+            # Papers taken from the stream but not finished yet
+            ahead.append(len(pulled) - len(summaries) - len(failures))
+            yield paper
+    
+    result = summarize_stream(source(), lambda month, paper_id, summary: summaries.append((paper_id, summary)),
+                              lambda month, paper_id: failures.append(paper_id), workers=workers, use_cache=False)
+    return result, summaries, failures, max(ahead)
+
+def test_workers_bound_in_flight_calls(state):
+    papers = [('2511', f"2511.{i:05d}", f"Abstract {i} text") for i in range(9)]
+    (succeeded, failed), summaries, failures, ahead = run(papers, workers=3)
+    
+    assert (succeeded, failed) == (9, 0) and failures == []
+    assert read_state(state, 'max_running') == 3
+    # iter_packed() reads one paper ahead to know a group is complete
+    assert ahead <= 3 + 1
+    # Results arrive as calls complete, but each one belongs to its own paper
+    assert sorted(summaries) == [(f"2511.{i:05d}", f"Summary of Abstract {i} text") for i in range(9)]
+
+def test_single_worker_keeps_input_order(state):
+    papers = [('2511', f"2511.{i:05d}", f"Abstract {i} text") for i in range(4)]
+    _, summaries, _, _ = run(papers, workers=1)
+    
+    assert read_state(state, 'max_running') == 1
+    assert [paper_id for paper_id, _ in summaries] == [paper_id for _, paper_id, _ in papers]
+
+def test_failing_call_is_retried_then_reported(state):
+    papers = [('2511', '2511.00001', 'Abstract 1 text'), ('2511', '2511.00002', 'FAIL 2 always'),
+              ('2511', '2511.00003', 'Abstract 3 text')]
+    (succeeded, failed), summaries, failures, _ = run(papers, workers=2)
+    
+    # One attempt plus max_retries=1 retry, then the paper is reported as failed
+    assert read_state(state, 'fail_attempts') == 2
+    assert (succeeded, failed) == (2, 1)
+    assert failures == ['2511.00002']
+    assert sorted(paper_id for paper_id, _ in summaries) == ['2511.00001', '2511.00003']
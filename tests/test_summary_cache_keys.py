@@ -0,0 +1,45 @@
+"""Packed and single-prompt replies are cached under their own prompt versions, and only when valid."""
+
+import pytest
+
+import codex_abstract_summarizer as summarizer
+from llm_backends import StubBackend
+from summary_cache import SummaryCache
+
+@pytest.fixture
+def cache(tmp_path, monkeypatch):
+    cache = SummaryCache(str(tmp_path / 'summary_cache.sqlite'))
+    monkeypatch.setattr(summarizer, '_summary_cache', cache)
+    monkeypatch.setattr(summarizer, '_backend', StubBackend())
+    yield cache
+    cache.close()
+
+def test_packed_and_fallback_replies_use_separate_keys(cache):
+    papers = [('2511.00001', 'First abstract.'), ('2511.00002', 'Second abstract.'),
+              ('2511.00003', 'Third abstract.')]
+    
+    def ask(prompt):
+        if prompt.startswith('For each paper'):
+            # Covers the first paper only; the others fall back to single prompts
+            return '{"paper_id": "2511.00001", "summary": "Packed summary of the first paper."}'
+        if 'Second' in prompt:
+            return 'Single summary of the second paper.'
+        return 'word ' * (summarizer.MAX_SUMMARY_WORDS + 1)
+    
+    summaries = summarizer.summarize_abstracts_packed(papers, ask=ask)
+    
+    assert summaries['2511.00001'] == 'Packed summary of the first paper.'
+    assert cache.get('First abstract.', summarizer.PACKED_PROMPT_VERSION) == 'Packed summary of the first paper.'
+    assert cache.get('First abstract.', summarizer.PROMPT_VERSION) is None
+    assert cache.get('Second abstract.', summarizer.PROMPT_VERSION) == 'Single summary of the second paper.'
+    assert cache.get('Second abstract.', summarizer.PACKED_PROMPT_VERSION) is None
+    # The overlong fallback reply is returned but not cached
+    assert '2511.00003' in summaries
+    assert cache.get('Third abstract.', summarizer.CACHE_LOOKUP_VERSIONS) is None
+    
+    # A second run finds both cached summaries without asking again
+    asked = []
+    summaries = summarizer.summarize_abstracts_packed(papers[:2], ask=lambda prompt: asked.append(prompt) or '')
+    assert asked == []
+    assert summaries == {'2511.00001': 'Packed summary of the first paper.',
+                         '2511.00002': 'Single summary of the second paper.'}
@@ -1,33 +1,26 @@
 import pandas as pd
 import numpy as np
 from datetime import datetime
-import glob
 import os
+import sys
 import json
 
-# Find all CSV files with "arxiv_papers" in the name in the data folder
-csv_files = sorted(glob.glob('../data/*arxiv_papers.csv'))
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'storage'))
+from paper_store import list_month_files, load_corpus
+
+# Find all monthly CSV files in the data folder
+csv_files = list_month_files()
 print(f"Found {len(csv_files)} CSV files to consolidate:")
 for f in csv_files:
     print(f"  - {os.path.basename(f)}")
 
-# Load and concatenate all CSV files
+# Load only the columns the charts need from the corpus cache
+# (duplicates removed and submission dates already parsed)
 print("\nLoading and consolidating data...")
-dfs = []
-for file in csv_files:
-    df = pd.read_csv(file)
-    dfs.append(df)
-
-# Combine all dataframes
-all_papers = pd.concat(dfs, ignore_index=True)
-print(f"Total papers loaded: {len(all_papers):,}")
-
-# Remove duplicates based on paper_id
-all_papers = all_papers.drop_duplicates(subset=['paper_id'])
+all_papers = load_corpus(columns=['paper_id', 'subcategory', 'submitted_on'], verbose=False)
 print(f"Unique papers: {len(all_papers):,}")
 
-# Convert submission date to datetime (handle mixed formats)
-all_papers['submitted_date'] = pd.to_datetime(all_papers['submitted_on'], format='mixed', dayfirst=False)
+all_papers['submitted_date'] = all_papers['submitted_on']
 
 # Filter to only 2025 data
 all_papers_2025 = all_papers[all_papers['submitted_date'].dt.year == 2025].copy()
@@ -21,12 +21,14 @@ Optional argument:
 """
 
 import pandas as pd
-import glob
 from datetime import datetime, timedelta
 import os
 import sys
 import re
 
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'storage'))
+from paper_store import DATA_DIR, list_month_files, load_corpus
+
 def get_last_friday_and_week():
     """
     Get the last Friday's date and calculate its ISO week number.
@@ -82,26 +84,17 @@ def load_all_csvs():
     Returns:
         tuple: (DataFrame, file_count) or (None, 0) if no files found
     """
-    csv_pattern = '../data/*_arxiv_papers.csv'
-    csv_files = glob.glob(csv_pattern)
+    csv_files = list_month_files()
     
     if not csv_files:
-        print(f"No CSV files found matching pattern: {csv_pattern}")
+        print(f"No CSV files found in: {DATA_DIR}")
         return None, 0
     
-    # Sort by filename (YYMM prefix)
-    csv_files = sorted(csv_files)
     print(f"Loading {len(csv_files)} CSV files from data folder...")
     
     try:
-        dfs = []
-        for csv_file in csv_files:
-            df = pd.read_csv(csv_file)
-            dfs.append(df)
-            print(f"  ✓ Loaded {len(df)} papers from {csv_file}")
-        
-        # Combine all dataframes
-        combined_df = pd.concat(dfs, ignore_index=True)
+        # Only the columns used for week filtering and export are read
+        combined_df = load_corpus(columns=['paper_id', 'abstract', 'submitted_on'])
         
         # Shuffle the dataframe randomly
         combined_df = combined_df.sample(frac=1, random_state=42).reset_index(drop=True)